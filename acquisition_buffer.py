@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+from sheets_executor import background_priority
+
+
+class AcquisitionLogBuffer:
+    """
+    획득 로그를 모아 한 번의 append로 기록하는 버퍼
+
+    행이 max_rows개 쌓이거나 flush_interval초가 지나면 저장소의
+    append_acquisition_rows로 한 번에 기록합니다. 아직 기록되지 않은 행은
+    로컬 스풀 파일(JSON Lines)에도 저장되어 프로세스가 비정상 종료되어도
+    다음 시작 시 다시 기록됩니다.
+    """
+
+    def __init__(self, storage, sheet_name, spool_path, max_rows=50, flush_interval=10):
+        self.storage = storage
+        self.sheet_name = sheet_name
+        self.spool_path = spool_path
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self.logger = logging.getLogger(__name__)
+
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        spool_dir = os.path.dirname(os.path.abspath(spool_path))
+        os.makedirs(spool_dir, exist_ok=True)
+        self._load_spool()
+
+    def _load_spool(self):
+        """이전 실행에서 기록되지 못한 행 복구"""
+        if not os.path.exists(self.spool_path):
+            return
+
+        with open(self.spool_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self._pending.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # 기록 도중 종료되어 잘린 마지막 줄은 버림
+                    self.logger.warning(f"손상된 획득 로그 스풀 행을 건너뜁니다: {line[:50]}")
+
+        if self._pending:
+            self.logger.info(f"기록되지 않은 획득 로그 {len(self._pending)}건 복구")
+
+    def _rewrite_spool(self, rows):
+        """스풀 파일을 남은 행으로 원자적으로 교체"""
+        tmp_path = self.spool_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.spool_path)
+
+    def append(self, username, item, timestamp=None):
+        """획득 로그 한 행 추가"""
+        return self.extend(username, [item], timestamp)
+
+    def extend(self, username, items, timestamp=None):
+        """한 유저의 획득 로그 여러 행을 한 번의 스풀 기록으로 추가"""
+        if timestamp is None:
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = [[timestamp, username, item] for item in items]
+        if not rows:
+            return True
+
+        with self._lock:
+            with open(self.spool_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows))
+                f.flush()
+                os.fsync(f.fileno())
+            self._pending.extend(rows)
+            should_flush = len(self._pending) >= self.max_rows
+
+        if should_flush:
+            self._flush_event.set()
+        return True
+
+    def flush(self):
+        """쌓인 행을 한 번에 기록 (성공 여부 반환)"""
+        with self._flush_lock:
+            with self._lock:
+                rows = list(self._pending)
+            if not rows:
+                return True
+
+            with background_priority():
+                if not self.storage.append_acquisition_rows(self.sheet_name, rows):
+                    return False
+
+            with self._lock:
+                del self._pending[:len(rows)]
+                self._rewrite_spool(self._pending)
+            return True
+
+    def pending_count(self):
+        """기록 대기 중인 행 수"""
+        with self._lock:
+            return len(self._pending)
+
+    def start(self):
+        """주기적 기록 스레드 시작"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """기록 스레드 중지 후 남은 행 기록"""
+        self._stop_event.set()
+        self._flush_event.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+        if not self.flush():
+            self.logger.warning(f"획득 로그 {self.pending_count()}건은 스풀 파일에 남겨 두고 다음 실행 시 기록합니다.")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._flush_event.wait(self.flush_interval)
+            self._flush_event.clear()
+            if self._stop_event.is_set():
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"획득 로그 기록 오류: {e}")
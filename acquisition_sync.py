@@ -0,0 +1,115 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+from sheets_executor import background_priority
+
+
+class SyncCheckpoint:
+    """획득 로그 시트별로 마지막으로 동기화한 행 번호를 저장하는 파일"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load_all(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def get_last_row(self, sheet_name):
+        """마지막으로 반영한 행 번호 (처음이면 헤더 행인 1)"""
+        with self._lock:
+            return self._load_all().get(sheet_name, {}).get('last_row', 1)
+
+    def save(self, sheet_name, last_row):
+        """체크포인트를 원자적으로 저장"""
+        with self._lock:
+            data = self._load_all()
+            data[sheet_name] = {
+                'last_row': last_row,
+                'updated_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+
+def group_acquisitions(rows):
+    """
+    획득 로그 행을 유저/아이템별로 묶음
+
+    Returns:
+        {username: {item: {'count': 개수, 'timestamp': 마지막 획득 시간}}}
+    """
+    plan = {}
+    for row in rows:
+        if len(row) < 3:
+            continue
+        timestamp, username, item = row[0], row[1], row[2]
+
+        # 유효한 유저명인지 확인 (빈 문자열이 아닌 경우)
+        if not username or not username.strip():
+            continue
+
+        entry = plan.setdefault(username, {}).setdefault(item, {'count': 0, 'timestamp': timestamp})
+        entry['count'] += 1
+        entry['timestamp'] = timestamp
+    return plan
+
+
+def sync_acquisitions(storage, sheets, acquisition_sheet, checkpoint, dry_run=False):
+    """
+    체크포인트 이후의 획득 로그만 읽어 유저 소지품에 반영
+
+    Args:
+        storage: begin_transaction을 제공하는 저장소 (시트 또는 SQLite)
+        sheets: 획득 로그 시트를 읽을 GoogleSheetsManager
+        acquisition_sheet: 획득 로그 시트 이름
+        checkpoint: SyncCheckpoint
+        dry_run: True면 반영하지 않고 계획만 반환
+
+    Returns:
+        dry_run이면 계획 dict, 아니면 성공 여부
+    """
+    with background_priority():
+        return _sync_acquisitions(storage, sheets, acquisition_sheet, checkpoint, dry_run)
+
+
+def _sync_acquisitions(storage, sheets, acquisition_sheet, checkpoint, dry_run):
+    last_row = checkpoint.get_last_row(acquisition_sheet)
+    rows = sheets.read_range(f'{acquisition_sheet}!A{last_row + 1}:C')
+    plan = group_acquisitions(rows)
+    next_row = last_row + len(rows)
+
+    if dry_run:
+        print(f"[dry-run] {last_row + 1}행부터 {len(rows)}개 행, {len(plan)}명 반영 예정")
+        for username, items in plan.items():
+            summary = ", ".join(f"{item} x{entry['count']}" for item, entry in items.items())
+            print(f"[dry-run]   {username}: {summary}")
+        return {'from_row': last_row + 1, 'next_row': next_row, 'rows': len(rows), 'users': plan}
+
+    if not rows:
+        print("동기화할 획득 로그가 없습니다.")
+        return True
+
+    with storage.begin_transaction(*plan) as txn:
+        sync_count = 0
+        for username, items in plan.items():
+            for item, entry in items.items():
+                txn.add_item(username, item, entry['count'], entry['timestamp'])
+                sync_count += entry['count']
+
+        if not txn.commit():
+            return False
+
+    checkpoint.save(acquisition_sheet, next_row)
+    print(f"총 {sync_count}개 항목 동기화 완료 ({len(plan)}명, 다음 시작 행: {next_row + 1})")
+    return True
@@ -0,0 +1,76 @@
+import logging
+import threading
+
+from state_store import JSONStateStore
+
+
+class AttendanceIndex:
+    """
+    날짜별 출석 유저 인덱스
+
+    오늘 출석한 유저는 메모리 set으로 O(1) 확인하고, 변경은 상태 파일에
+    원자적으로 기록해 재시작 후에도 중복 출석을 막습니다. 날짜가 바뀌면
+    이전 날짜의 유저 목록은 버리고 날짜별 출석 수만 history_days일 동안 남깁니다.
+    """
+
+    def __init__(self, path, history_days=30):
+        self.store = JSONStateStore(path)
+        self.history_days = history_days
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        self._day = self.store.get('day')
+        self._users = set(self.store.get('users', []))
+        self._counts = self.store.get('counts', {})
+
+    def _rotate(self, day):
+        """기록 중인 날짜가 바뀌면 유저 목록 초기화 (잠금 안에서 호출)"""
+        if self._day == day:
+            return
+        if self._day is not None:
+            self.logger.info(f"{self._day} 출석 {len(self._users)}명")
+
+        self._day = day
+        self._users = set()
+        self._counts.setdefault(day, 0)
+        for old_day in sorted(self._counts)[:-self.history_days]:
+            del self._counts[old_day]
+
+    def _save(self):
+        self.store.update(day=self._day, users=sorted(self._users), counts=self._counts)
+
+    def has_attended(self, username, day):
+        """해당 날짜에 이미 출석했는지 확인"""
+        with self._lock:
+            return self._day == day and username in self._users
+
+    def claim(self, username, day):
+        """출석 등록 (이미 출석했으면 False, 상태 파일 기록까지 마친 뒤 True)"""
+        with self._lock:
+            self._rotate(day)
+            if username in self._users:
+                return False
+            self._users.add(username)
+            self._counts[day] = self._counts.get(day, 0) + 1
+            try:
+                self._save()
+            except Exception:
+                # 기록하지 못한 출석은 등록하지 않은 것으로 되돌려 다시 시도할 수 있게 함
+                self._users.discard(username)
+                self._counts[day] -= 1
+                raise
+            return True
+
+    def release(self, username, day):
+        """지급 실패 등으로 출석 등록 취소"""
+        with self._lock:
+            if self._day != day or username not in self._users:
+                return
+            self._users.discard(username)
+            self._counts[day] = max(0, self._counts.get(day, 0) - 1)
+            self._save()
+
+    def daily_counts(self):
+        """날짜별 출석 수 (운영 확인용)"""
+        with self._lock:
+            return dict(sorted(self._counts.items()))
@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Pattern
+
+
+class CommandContext:
+    """멘션 한 건을 토큰화한 결과 (소문자 변환과 분리는 한 번만 수행)"""
+
+    def __init__(self, user, status_id, text, clean_content='', status=None):
+        self.user = user
+        self.status_id = status_id
+        self.text = text
+        self.clean_content = clean_content
+        self.status = status
+        self.lowered = text.lower()
+        self.tokens = self.lowered.split()
+        self.verb = self.tokens[0] if self.tokens else ''
+
+
+class Command:
+    """등록된 명령어와 실행 통계"""
+
+    MATCH_CONTAINS = 'contains'
+    MATCH_PREFIX = 'prefix'
+
+    def __init__(self, name, handler, keywords, match=MATCH_CONTAINS, timing_hook=None, pattern=None):
+        self.name = name
+        self.handler = handler
+        self.keywords = tuple(keyword.lower() for keyword in keywords)
+        self.match = match
+        self.timing_hook = timing_hook
+        self.pattern = pattern
+
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def matches(self, lowered):
+        """보조 매칭 (기존 동작: 포함 또는 접두사, pattern이 있으면 본문 맨 앞에서 정규식 일치도 시도)"""
+        if self.match == self.MATCH_PREFIX:
+            if any(lowered.startswith(keyword) for keyword in self.keywords):
+                return True
+        elif any(keyword in lowered for keyword in self.keywords):
+            return True
+        return self.pattern is not None and self.pattern.match(lowered) is not None
+
+    def stats(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_time': self.total_time,
+            'avg_time': self.total_time / self.calls if self.calls else 0.0,
+            'max_time': self.max_time,
+        }
+
+
+class CommandRouter:
+    """
+    멘션 명령어 라우터
+
+    첫 단어(동사)로 해시 조회해 바로 처리하고, 일치하는 동사가 없으면
+    등록 순서대로 포함/접두사 매칭을 시도해 기존 동작을 유지합니다.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._commands: List[Command] = []
+        self._verbs = {}
+        self._timing_hooks = []
+        self._lock = threading.Lock()
+
+    def register(self, name: str, handler: Callable[[CommandContext], None], keywords: Iterable[str],
+                 match: str = Command.MATCH_CONTAINS, timing_hook: Optional[Callable] = None,
+                 pattern: Optional[Pattern] = None) -> Command:
+        """
+        명령어 등록
+
+        Args:
+            name: 명령어 이름 (통계 키)
+            handler: CommandContext를 받는 처리 함수
+            keywords: 명령어 키워드 목록 (첫 단어 일치 시 O(1) 처리)
+            match: 보조 매칭 방식 ('contains' 또는 'prefix')
+            timing_hook: 이 명령어 실행 후 (name, elapsed, ctx)로 호출되는 함수
+            pattern: 키워드 외에 본문 맨 앞에서 일치하면 이 명령어로 처리할 정규식 (예: 주사위 식)
+        """
+        command = Command(name, handler, keywords, match, timing_hook, pattern)
+        with self._lock:
+            if any(existing.name == name for existing in self._commands):
+                raise ValueError(f"이미 등록된 명령어입니다: {name}")
+            for keyword in command.keywords:
+                if keyword in self._verbs:
+                    raise ValueError(f"키워드 '{keyword}'는 이미 '{self._verbs[keyword].name}' 명령어에 등록되어 있습니다.")
+
+            self._commands.append(command)
+            for keyword in command.keywords:
+                self._verbs[keyword] = command
+        return command
+
+    def unregister(self, name: str):
+        """명령어 등록 해제"""
+        with self._lock:
+            self._commands = [command for command in self._commands if command.name != name]
+            self._verbs = {keyword: command for keyword, command in self._verbs.items() if command.name != name}
+
+    def add_timing_hook(self, hook: Callable):
+        """모든 명령어 실행 후 (name, elapsed, ctx)로 호출되는 함수 등록"""
+        self._timing_hooks.append(hook)
+
+    def resolve(self, ctx: CommandContext) -> Optional[Command]:
+        """멘션에 해당하는 명령어 찾기"""
+        command = self._verbs.get(ctx.verb)
+        if command is not None:
+            return command
+
+        for command in self._commands:
+            if command.matches(ctx.lowered):
+                return command
+        return None
+
+    def dispatch(self, ctx: CommandContext) -> bool:
+        """명령어 실행 (처리한 경우 True)"""
+        command = self.resolve(ctx)
+        if command is None:
+            return False
+
+        start = time.perf_counter()
+        try:
+            command.handler(ctx)
+        except Exception:
+            command.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            command.calls += 1
+            command.total_time += elapsed
+            command.max_time = max(command.max_time, elapsed)
+            self._run_timing_hooks(command, elapsed, ctx)
+        return True
+
+    def _run_timing_hooks(self, command, elapsed, ctx):
+        hooks = list(self._timing_hooks)
+        if command.timing_hook:
+            hooks.append(command.timing_hook)
+        for hook in hooks:
+            try:
+                hook(command.name, elapsed, ctx)
+            except Exception as e:
+                self.logger.error(f"명령어 타이밍 훅 오류 ({command.name}): {e}")
+
+    def stats(self):
+        """명령어별 실행 통계 반환"""
+        return {command.name: command.stats() for command in self._commands}
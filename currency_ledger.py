@@ -0,0 +1,187 @@
+import re
+import threading
+import time
+from datetime import datetime
+
+CURRENCY_ITEM = '갈레온'
+LEDGER_HEADER = ['유저', '잔액', '갱신 시각']
+
+_UPDATED_ROW_PATTERN = re.compile(r'![A-Z]+(\d+)')
+
+
+def _parse_balance(row):
+    if len(row) > 1 and str(row[1]).lstrip('-').isdigit():
+        return int(row[1])
+    return 0
+
+
+class CurrencyLedger:
+    """
+    유저별 갈레온 잔액을 시트 하나(A: 유저, B: 잔액, C: 갱신 시각)에 모아 둔 장부
+
+    장부 전체를 한 번의 values.get으로 읽어 메모리에 두므로 한 명의 잔액 조회도,
+    전체 잔액 조회도 시트 요청 한 번(캐시가 유효하면 0번)입니다. 잔액 변경은
+    이미 있는 행에 덮어쓰기만 하고 행을 지우지 않으므로 행 번호가 바뀌지 않습니다.
+    처음 보는 유저의 행은 values.append로 서버에서 자리를 받아 동시에 추가되어도
+    겹치지 않습니다.
+    """
+
+    def __init__(self, manager, sheet_name, ttl=60):
+        self.manager = manager
+        self.sheet_name = sheet_name
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._rows = None  # username -> [행 번호, 잔액, 갱신 시각]
+        self._row_count = 0
+        self._loaded_at = None
+
+    @property
+    def _range(self):
+        return f'{self.sheet_name}!A:C'
+
+    def _is_fresh(self):
+        if self._rows is None:
+            return False
+        return self.ttl is None or time.monotonic() - self._loaded_at < self.ttl
+
+    def _load(self, refresh=False):
+        """장부 전체 읽기 (잠금 안에서 호출)"""
+        if not refresh and self._is_fresh():
+            return
+        if self.manager._lookup_sheet_id(self.sheet_name) is None:
+            self.ensure_sheet()
+
+        result = self.manager._execute(self.manager.service.spreadsheets().values().get(
+            spreadsheetId=self.manager.spreadsheet_id,
+            range=self._range
+        ))
+        values = result.get('values', [])
+
+        rows = {}
+        for row_number, row in enumerate(values[1:], start=2):  # 헤더 제외
+            if row and row[0] and row[0] not in rows:
+                rows[row[0]] = [row_number, _parse_balance(row), row[2] if len(row) > 2 else '']
+        self._rows = rows
+        self._row_count = max(len(values), 1)
+        self._loaded_at = time.monotonic()
+
+    def ensure_sheet(self):
+        """장부 시트가 없으면 만들고 헤더 기록"""
+        if self.manager._lookup_sheet_id(self.sheet_name) is not None:
+            return
+        sheet = self.manager.service.spreadsheets()
+        result = self.manager._execute(sheet.batchUpdate(
+            spreadsheetId=self.manager.spreadsheet_id,
+            body={'requests': [{'addSheet': {'properties': {'title': self.sheet_name}}}]}
+        ))
+        properties = result['replies'][0]['addSheet']['properties']
+        self.manager._register_sheet(properties['title'], properties['sheetId'])
+
+        self.manager._execute(sheet.values().update(
+            spreadsheetId=self.manager.spreadsheet_id,
+            range=f'{self.sheet_name}!A1:C1',
+            valueInputOption='RAW',
+            body={'values': [LEDGER_HEADER]}
+        ))
+        print(f"{self.sheet_name} 장부 시트 생성 완료")
+
+    def invalidate(self):
+        """다음 조회 때 장부를 다시 읽도록 표시"""
+        with self._lock:
+            self._loaded_at = None
+            self._rows = None
+
+    def get_balance(self, username):
+        """유저 잔액 (장부에 없으면 0)"""
+        with self._lock:
+            self._load()
+            row = self._rows.get(username)
+            return row[1] if row else 0
+
+    def get_all_balances(self):
+        """전체 유저 잔액 {유저: 잔액}"""
+        with self._lock:
+            self._load()
+            return {username: row[1] for username, row in self._rows.items()}
+
+    def row_for(self, username):
+        """
+        유저의 장부 행 번호 (없으면 잔액 0인 행을 values.append로 추가)
+
+        트랜잭션은 이 행 번호로 잔액을 덮어쓰므로, 추가한 행은 커밋이 실패해도 그대로 둡니다.
+        """
+        with self._lock:
+            self._load()
+            row = self._rows.get(username)
+            if row is not None:
+                return row[0]
+
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            result = self.manager._execute(self.manager.service.spreadsheets().values().append(
+                spreadsheetId=self.manager.spreadsheet_id,
+                range=self._range,
+                valueInputOption='RAW',
+                insertDataOption='INSERT_ROWS',
+                body={'values': [[username, 0, timestamp]]}
+            ))
+            updated_range = result.get('updates', {}).get('updatedRange', '')
+            match = _UPDATED_ROW_PATTERN.search(updated_range)
+            if match is None:
+                # 추가된 위치를 알 수 없으면 장부를 다시 읽어 확인
+                self._load(refresh=True)
+                return self._rows[username][0]
+
+            row_number = int(match.group(1))
+            self._rows[username] = [row_number, 0, timestamp]
+            self._row_count = max(self._row_count, row_number)
+            return row_number
+
+    def apply(self, balances, timestamp):
+        """시트에 기록한 잔액을 메모리 장부에도 반영 ({유저: (행 번호, 잔액)})"""
+        with self._lock:
+            if self._rows is None:
+                return
+            for username, (row_number, balance) in balances.items():
+                self._rows[username] = [row_number, balance, timestamp]
+                self._row_count = max(self._row_count, row_number)
+
+    def set_balances(self, balances):
+        """
+        여러 유저 잔액을 한 번의 values.batchUpdate로 설정 ({유저: 잔액})
+
+        장부에 없는 유저는 마지막 행 아래에 이어서 씁니다.
+        """
+        if not balances:
+            return True
+
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            self._load()
+            next_row = self._row_count + 1
+            planned = {}
+            for username, balance in balances.items():
+                row = self._rows.get(username)
+                if row is None:
+                    planned[username] = (next_row, balance)
+                    next_row += 1
+                else:
+                    planned[username] = (row[0], balance)
+
+            try:
+                self.manager._execute(self.manager.service.spreadsheets().values().batchUpdate(
+                    spreadsheetId=self.manager.spreadsheet_id,
+                    body={
+                        'valueInputOption': 'RAW',
+                        'data': [{
+                            'range': f'{self.sheet_name}!A{row_number}:C{row_number}',
+                            'values': [[username, balance, timestamp]]
+                        } for username, (row_number, balance) in planned.items()]
+                    }
+                ))
+            except Exception as e:
+                print(f"장부 잔액 일괄 기록 중 오류 발생: {e}")
+                self.invalidate()
+                return False
+
+            self.apply(planned, timestamp)
+            return True
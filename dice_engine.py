@@ -0,0 +1,228 @@
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# 한 번에 굴릴 수 있는 한도 (큰 식으로 프로세스가 느려지지 않도록)
+MAX_DICE_PER_TERM = 10000
+MAX_DICE_PER_EXPRESSION = 20000
+MAX_FACES = 1000000
+MAX_TERMS = 20
+MAX_EXPRESSIONS = 10
+
+# 개별 눈을 보여주는 최대 주사위 수 (넘으면 합계만 표시)
+MAX_SHOWN_ROLLS = 20
+
+# 답글 본문 최대 길이 (마스토돈 기본 글자 수 제한)
+MAX_REPLY_LENGTH = 500
+
+# 주사위 명령으로 볼 동사 (뒤에 식이 있어야 함)
+DICE_VERBS = ('주사위', 'dice', 'roll')
+
+_DICE_TERM = r'\d*d\d+(?:k[hl]?\d+)?'
+_TERM = rf'(?:{_DICE_TERM}|\d+)'
+
+# 멘션 본문에서 주사위 식 찾기 (영문/숫자에 붙어 있는 경우는 제외)
+DICE_EXPRESSION_PATTERN = re.compile(
+    rf'(?<![a-z0-9])[+-]?\s*{_DICE_TERM}(?:\s*[+-]\s*{_TERM})*(?![a-z0-9])',
+    re.IGNORECASE
+)
+
+# 명령어 라우터용: 본문이 주사위 식이나 '주사위 식'으로 시작할 때만 주사위 명령으로 처리
+# (본문 중간의 d2, 10d10 등은 키워드 매칭으로 넘김)
+DICE_COMMAND_PATTERN = re.compile(
+    rf'(?:(?:{"|".join(DICE_VERBS)})\s*)?{DICE_EXPRESSION_PATTERN.pattern}',
+    re.IGNORECASE
+)
+
+_TOKEN_PATTERN = re.compile(r'([+-])?(?:(\d*)d(\d+)(?:k([hl]?)(\d+))?|(\d+))')
+
+
+class DiceError(ValueError):
+    """주사위 식 오류 (사용자에게 그대로 보여줄 메시지)"""
+
+
+class DiceTerm:
+    """NdM[khK|klK] 항 하나"""
+
+    def __init__(self, sign: int, count: int, faces: int, keep: Optional[str] = None, keep_count: int = 0):
+        self.sign = sign
+        self.count = count
+        self.faces = faces
+        self.keep = keep
+        self.keep_count = keep_count
+
+    def roll(self, generator: np.random.Generator):
+        """(합계, 눈 목록, 버린 눈 위치 목록)"""
+        rolls = generator.integers(1, self.faces + 1, size=self.count)
+        if self.keep is None:
+            return self.sign * int(rolls.sum()), rolls, None
+
+        order = np.argsort(rolls, kind='stable')
+        if self.keep == 'h':
+            kept = order[self.count - self.keep_count:]
+            dropped = order[:self.count - self.keep_count]
+        else:
+            kept = order[:self.keep_count]
+            dropped = order[self.keep_count:]
+        return self.sign * int(rolls[kept].sum()), rolls, dropped
+
+    def __str__(self):
+        text = f"{self.count}d{self.faces}"
+        if self.keep:
+            text += f"k{self.keep}{self.keep_count}"
+        return text
+
+
+class DiceExpression:
+    """파싱이 끝난 주사위 식 (주사위 항 + 상수)"""
+
+    def __init__(self, source: str, terms: List[DiceTerm], modifier: int):
+        self.source = source
+        self.terms = terms
+        self.modifier = modifier
+
+    def roll(self, generator: np.random.Generator) -> Tuple[int, str]:
+        """
+        식을 굴려 (합계, 설명 문자열) 반환
+
+        설명 예: "4d6kh3: [6, 5, 3, (1)] = 14"
+        """
+        total = self.modifier
+        parts = []
+        for term in self.terms:
+            subtotal, rolls, dropped = term.roll(generator)
+            total += subtotal
+
+            sign = '-' if term.sign < 0 else '+'
+            if term.count <= MAX_SHOWN_ROLLS:
+                values = [str(value) for value in rolls.tolist()]
+                if dropped is not None:
+                    for position in dropped.tolist():
+                        values[position] = f"({values[position]})"
+                parts.append((sign, f"[{', '.join(values)}]"))
+            else:
+                parts.append((sign, f"{term}({abs(subtotal)})"))
+
+        if self.modifier:
+            parts.append(('-' if self.modifier < 0 else '+', str(abs(self.modifier))))
+
+        detail = ''
+        for index, (sign, text) in enumerate(parts):
+            if index == 0:
+                detail = text if sign == '+' else f"-{text}"
+            else:
+                detail += f" {sign} {text}"
+        return total, f"{self.source}: {detail} = {total}"
+
+    def __str__(self):
+        return self.source
+
+
+def normalize(expression: str) -> str:
+    return re.sub(r'\s+', '', expression.lower())
+
+
+@lru_cache(maxsize=1024)
+def _parse_normalized(source: str) -> DiceExpression:
+    terms = []
+    modifier = 0
+    total_dice = 0
+    position = 0
+
+    while position < len(source):
+        match = _TOKEN_PATTERN.match(source, position)
+        if match is None or match.end() == position:
+            raise DiceError(f"주사위 식을 이해할 수 없습니다: {source}")
+        if position > 0 and match.group(1) is None:
+            raise DiceError(f"주사위 식을 이해할 수 없습니다: {source}")
+        position = match.end()
+
+        sign = -1 if match.group(1) == '-' else 1
+        if match.group(6) is not None:
+            modifier += sign * int(match.group(6))
+            continue
+
+        count = int(match.group(2)) if match.group(2) else 1
+        faces = int(match.group(3))
+        if count < 1 or faces < 1:
+            raise DiceError("주사위 개수와 면 수는 1 이상이어야 합니다.")
+        if count > MAX_DICE_PER_TERM:
+            raise DiceError(f"한 번에 굴릴 수 있는 주사위는 최대 {MAX_DICE_PER_TERM}개입니다.")
+        if faces > MAX_FACES:
+            raise DiceError(f"주사위 면 수는 최대 {MAX_FACES}입니다.")
+
+        keep = None
+        keep_count = 0
+        if match.group(5) is not None:
+            keep = match.group(4) or 'h'
+            keep_count = int(match.group(5))
+            if keep_count < 1 or keep_count > count:
+                raise DiceError(f"남길 주사위 수는 1~{count} 사이여야 합니다.")
+
+        total_dice += count
+        if total_dice > MAX_DICE_PER_EXPRESSION:
+            raise DiceError(f"식 하나에 굴릴 수 있는 주사위는 최대 {MAX_DICE_PER_EXPRESSION}개입니다.")
+
+        terms.append(DiceTerm(sign, count, faces, keep, keep_count))
+        if len(terms) > MAX_TERMS:
+            raise DiceError(f"식 하나에는 주사위 항을 최대 {MAX_TERMS}개까지 쓸 수 있습니다.")
+
+    if not terms:
+        raise DiceError(f"주사위 식에 주사위가 없습니다: {source}")
+    return DiceExpression(source, terms, modifier)
+
+
+def parse(expression: str) -> DiceExpression:
+    """주사위 식 파싱 (같은 식은 캐시된 결과 재사용)"""
+    return _parse_normalized(normalize(expression))
+
+
+def find_expressions(text: str, limit: int = MAX_EXPRESSIONS) -> List[str]:
+    """멘션 본문에서 주사위 식 문자열 찾기 (최대 limit개)"""
+    found = []
+    for match in DICE_EXPRESSION_PATTERN.finditer(text):
+        found.append(match.group(0).strip())
+        if len(found) >= limit:
+            break
+    return found
+
+
+def roll_text(text: str, generator: np.random.Generator, default: Optional[str] = None):
+    """
+    본문의 모든 주사위 식을 굴림
+
+    Returns:
+        [(식, 합계, 설명)] 목록. 식이 없으면 default 식을 굴리고, default도 없으면 빈 목록.
+    """
+    expressions = find_expressions(text)
+    if not expressions and default:
+        expressions = [default]
+
+    results = []
+    for source in expressions:
+        expression = parse(source)
+        total, detail = expression.roll(generator)
+        results.append((expression, total, detail))
+    return results
+
+
+def format_results(results, max_length: int = MAX_REPLY_LENGTH) -> str:
+    """
+    roll_text 결과를 답글 본문으로 변환 (max_length 글자 이내)
+
+    눈을 모두 보여주면 넘치는 경우 식별 합계만 보여주고, 그래도 넘치면 DiceError를 던집니다.
+    1d100 한 번은 기존 형식("42이 나왔습니다!")을 유지합니다.
+    """
+    if len(results) == 1 and results[0][0].source == '1d100':
+        return f"{results[0][1]}이 나왔습니다!"
+
+    text = "\n".join(detail for _, _, detail in results)
+    if len(text) <= max_length:
+        return text
+
+    text = "\n".join(f"{expression} = {total}" for expression, total, _ in results)
+    if len(text) <= max_length:
+        return text
+    raise DiceError("결과가 너무 길어 답글로 보낼 수 없습니다. 식 수를 줄여주세요.")
@@ -1,103 +1,501 @@
+import hashlib
+import json
+import logging
+import os
 import random
-from typing import Dict, List, Tuple
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from sheets_executor import background_priority
+
+# 기본 등급 정의 (등급명, 확률, 시작 줄, 끝 줄) - 가챠 시트에 등급표가 없을 때 사용
+DEFAULT_RARITY_TIERS = [
+    ("SSR", 1.0, 1, 5),     # 1% - SSR (1-5줄)
+    ("SR", 5.0, 6, 15),     # 5% - SR (6-15줄)
+    ("R", 15.0, 16, 30),    # 15% - R (16-30줄)
+    ("N", 79.0, 31, 50),    # 79% - N (31-50줄)
+]
+
+# 가챠 1회 이용료 (갈레온)
+GACHA_COST = 3
+
+# 연차 명령어 한 번에 뽑는 횟수
+MULTI_PULL_COUNT = 10
+
+RARITY_EMOJIS = {
+    "SSR": "✨🌟",
+    "SR": "⭐",
+    "R": "💫",
+    "N": "⚪"
+}
+
+
+class AliasTable:
+    """
+    Vose 별칭(alias) 방식 이산 분포 샘플러
+
+    가중치 목록을 한 번 O(n)으로 컴파일해 두면 이후 한 번의 추첨은
+    난수 두 개로 O(1)에 끝납니다.
+    """
+
+    def __init__(self, weights: List[float]):
+        n = len(weights)
+        if n == 0:
+            raise ValueError("가중치가 비어 있습니다")
+        total = float(sum(weights))
+        if total <= 0:
+            raise ValueError("가중치 합이 0 이하입니다")
+
+        self.size = n
+        self.probabilities = [w / total for w in weights]
+        self.prob = [0.0] * n
+        self.alias = [0] * n
+
+        scaled = [p * n for p in self.probabilities]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+
+        # 부동소수점 오차로 남은 칸은 자기 자신으로 확정
+        for i in large + small:
+            self.prob[i] = 1.0
+            self.alias[i] = i
+
+        # 여러 번 추첨할 때 쓰는 벡터 버전
+        self._prob_array = np.asarray(self.prob)
+        self._alias_array = np.asarray(self.alias, dtype=np.int64)
+
+    def sample(self, rng=random) -> int:
+        column = int(rng.random() * self.size)
+        if column >= self.size:
+            column = self.size - 1
+        if rng.random() < self.prob[column]:
+            return column
+        return self.alias[column]
+
+    def sample_many(self, count: int, generator: np.random.Generator) -> np.ndarray:
+        """count번 추첨한 인덱스 배열 (NumPy로 한 번에 계산)"""
+        columns = generator.integers(0, self.size, size=count)
+        coins = generator.random(count)
+        return np.where(coins < self._prob_array[columns], columns, self._alias_array[columns])
+
+
+class GachaTier:
+    """가챠 등급 한 개 (확률은 %, pity는 이 등급이 보장되는 연속 뽑기 횟수, 0이면 없음)"""
+
+    def __init__(self, name: str, probability: float, pity: int = 0):
+        self.name = name
+        self.probability = probability
+        self.pity = pity
+        self.items: List[str] = []
+        self.weights: List[float] = []
+        self.table: Optional[AliasTable] = None
+
+    def compile(self):
+        self.table = AliasTable(self.weights) if self.items else None
+
+
+class GachaPool:
+    """
+    등급표와 아이템 가중치를 컴파일한 가챠 풀
+
+    등급 추첨과 등급 안 아이템 추첨 모두 별칭 테이블을 사용합니다.
+    아이템이 하나도 없는 등급은 추첨 대상에서 빼고 나머지 등급의 확률을
+    비율대로 다시 나눕니다. 등급 목록은 희귀한 순서(시트 순서)로 둡니다.
+    """
+
+    def __init__(self, tiers: List[GachaTier]):
+        self.tiers = tiers
+        self.active = [tier for tier in tiers if tier.items and tier.probability > 0]
+        for tier in self.tiers:
+            tier.compile()
+        self.tier_table = AliasTable([tier.probability for tier in self.active]) if self.active else None
+
+    def __bool__(self):
+        return self.tier_table is not None
+
+    def _draw_from(self, tier: GachaTier, rng) -> Tuple[str, str]:
+        return tier.items[tier.table.sample(rng)], tier.name
+
+    def draw(self, rng=random, pity: Optional[Dict[str, int]] = None) -> Tuple[str, str]:
+        """
+        한 번 추첨
+
+        Args:
+            pity: {등급명: 해당 등급(또는 더 희귀한 등급) 없이 지난 뽑기 수}.
+                주어지면 천장에 도달한 가장 희귀한 등급을 보장하고 카운터를 갱신합니다.
+        """
+        tier = None
+        if pity is not None:
+            for candidate in self.active:
+                if candidate.pity and pity.get(candidate.name, 0) + 1 >= candidate.pity:
+                    tier = candidate
+                    break
+
+        if tier is None:
+            tier = self.active[self.tier_table.sample(rng)]
+
+        if pity is not None:
+            self._advance_pity(pity, tier)
+        return self._draw_from(tier, rng)
+
+    def _advance_pity(self, pity: Dict[str, int], hit: GachaTier):
+        """뽑힌 등급보다 희귀한 등급의 카운터는 +1, 뽑힌 등급과 그보다 흔한 등급은 0으로"""
+        rank = self.tiers.index(hit)
+        for index, tier in enumerate(self.tiers):
+            if not tier.pity:
+                continue
+            if index >= rank:
+                pity[tier.name] = 0
+            else:
+                pity[tier.name] = pity.get(tier.name, 0) + 1
+
+    def draw_many(self, count: int, generator: Optional[np.random.Generator] = None,
+                  pity: Optional[Dict[str, int]] = None) -> List[Tuple[str, str]]:
+        """
+        count번 연속 추첨
+
+        등급과 아이템 추첨은 NumPy로 한 번에 계산하고, 천장 카운터만
+        뽑힌 순서대로 훑으며 반영합니다.
+        """
+        if count <= 0:
+            return []
+        if generator is None:
+            generator = np.random.default_rng()
+
+        tier_indices = self.tier_table.sample_many(count, generator)
+
+        if pity is not None:
+            for position in range(count):
+                for rank, candidate in enumerate(self.active):
+                    if candidate.pity and pity.get(candidate.name, 0) + 1 >= candidate.pity:
+                        tier_indices[position] = rank
+                        break
+                self._advance_pity(pity, self.active[tier_indices[position]])
+
+        results = [None] * count
+        for rank, tier in enumerate(self.active):
+            positions = np.flatnonzero(tier_indices == rank)
+            if positions.size == 0:
+                continue
+            item_indices = tier.table.sample_many(positions.size, generator)
+            for position, item_index in zip(positions.tolist(), item_indices.tolist()):
+                results[position] = (tier.items[item_index], tier.name)
+        return results
+
+    def expected_distribution(self) -> Dict[str, float]:
+        """천장을 제외한 등급별 실제 확률 (빈 등급 제외 후 재분배)"""
+        total = sum(tier.probability for tier in self.active)
+        return {tier.name: tier.probability / total for tier in self.active}
+
+
+def build_legacy_pool(gacha_items: List[str], rarity_tiers=DEFAULT_RARITY_TIERS) -> GachaPool:
+    """A열 줄 번호 범위로 등급을 나누는 기존 시트 형식"""
+    tiers = []
+    for name, probability, start_line, end_line in rarity_tiers:
+        tier = GachaTier(name, probability)
+        for item in gacha_items[start_line - 1:end_line]:
+            tier.items.append(item)
+            tier.weights.append(1.0)
+        tiers.append(tier)
+    return GachaPool(tiers)
+
+
+def _parse_number(value, default):
+    try:
+        return float(str(value).replace('%', '').strip())
+    except (TypeError, ValueError):
+        return default
+
+
+def build_sheet_pool(rows: List[List[str]]) -> Optional[GachaPool]:
+    """
+    등급표가 있는 가챠 시트 형식 (첫 행은 헤더)
+
+    A: 아이템, B: 등급, C: 가중치(기본 1)
+    E: 등급, F: 확률(%), G: 천장(연속 뽑기 수, 비우면 없음)
+
+    등급표(E열)가 비어 있으면 None을 반환합니다.
+    """
+    tiers = []
+    by_name = {}
+    for row in rows[1:]:
+        if len(row) < 6 or not str(row[4]).strip():
+            continue
+        name = str(row[4]).strip()
+        if name in by_name:
+            continue
+        probability = _parse_number(row[5], 0.0)
+        pity = int(_parse_number(row[6], 0)) if len(row) > 6 else 0
+        tier = GachaTier(name, probability, max(0, pity))
+        tiers.append(tier)
+        by_name[name] = tier
+
+    if not tiers:
+        return None
+
+    for row in rows[1:]:
+        if len(row) < 2:
+            continue
+        item = str(row[0]).strip()
+        tier = by_name.get(str(row[1]).strip())
+        if not item or tier is None:
+            continue
+        weight = _parse_number(row[2], 1.0) if len(row) > 2 and str(row[2]).strip() else 1.0
+        if weight > 0:
+            tier.items.append(item)
+            tier.weights.append(weight)
+
+    return GachaPool(tiers)
+
+
+def build_pool(rows: List[List[str]], rarity_tiers=DEFAULT_RARITY_TIERS) -> GachaPool:
+    """가챠 시트 원본 행으로 풀 생성 (E열 등급표가 있으면 등급/가중치 형식, 없으면 A열 줄 번호 형식)"""
+    pool = build_sheet_pool(rows)
+    if pool is None:
+        items = [row[0].strip() for row in rows if row and str(row[0]).strip()]
+        pool = build_legacy_pool(items, rarity_tiers)
+    return pool
+
+
+class GachaPityStore:
+    """유저별 천장 카운터를 JSON 파일에 보관"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+            else:
+                self._data = {}
+        return self._data
+
+    def get(self, username) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._load().get(username, {}))
+
+    def save(self, username, counters: Dict[str, int]):
+        with self._lock:
+            data = self._load()
+            data[username] = dict(counters)
+
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
 
 class GachaSystem:
-    def __init__(self):
-        # 확률 등급 정의 (확률, 시작 줄, 끝 줄)
-        self.rarity_tiers = [
-            (1.0, 1, 5),    # 1% - SSR (1-5줄)
-            (5.0, 6, 15),   # 5% - SR (6-15줄)  
-            (15.0, 16, 30), # 15% - R (16-30줄)
-            (79.0, 31, 50)  # 79% - N (31-50줄)
-        ]
-        
-    def get_random_item(self, gacha_items: List[str]) -> Tuple[str, str]:
-        """
-        확률에 따라 랜덤 아이템 선택
-        
+    """
+    가챠 풀과 천장 카운터 관리
+
+    loader를 주면 백그라운드 스레드가 refresh_interval 초마다 가챠 시트를 다시 읽어
+    내용이 바뀐 경우에만 풀을 다시 만듭니다. 가챠 명령은 메모리의 풀로 추첨만 하므로
+    뽑기마다 시트를 읽지 않습니다.
+    """
+
+    def __init__(self, pity_path=None, loader: Optional[Callable[[], List[List[str]]]] = None,
+                 refresh_interval=60):
+        # 기본 확률 등급 정의 (등급명, 확률, 시작 줄, 끝 줄)
+        self.rarity_tiers = list(DEFAULT_RARITY_TIERS)
+
+        # 컴파일된 가챠 풀 (시트 내용이 바뀔 때만 다시 만듦)
+        self._pool = None
+        self._signature = None
+        self._lock = threading.Lock()
+
+        # 가챠 시트 주기 갱신
+        self.loader = loader
+        self.refresh_interval = refresh_interval
+        self.logger = logging.getLogger(__name__)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        if pity_path is None:
+            pity_path = os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), 'data', 'gacha_pity.json'
+            )
+        self.pity_store = GachaPityStore(pity_path)
+
+    @staticmethod
+    def _compute_signature(rows):
+        payload = json.dumps(rows, ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def load(self, rows: List[List[str]]) -> GachaPool:
+        """
+        가챠 시트 원본 행으로 풀 교체 (내용이 같으면 기존 풀 유지)
+
+        E열 등급표가 있으면 등급/가중치 형식, 없으면 A열 줄 번호 형식으로 해석합니다.
+        """
+        signature = self._compute_signature(rows)
+        with self._lock:
+            if self._pool is not None and signature == self._signature:
+                return self._pool
+
+        pool = build_pool(rows, self.rarity_tiers)
+
+        with self._lock:
+            self._pool = pool
+            self._signature = signature
+        return pool
+
+    def refresh(self) -> Optional[GachaPool]:
+        """loader로 가챠 시트를 다시 읽어 변경된 경우에만 풀 재생성"""
+        rows = self.loader()
+
+        # 조회 실패 시 빈 결과가 오므로 기존 풀을 유지
+        if not rows:
+            return self._pool
+
+        return self.load(rows)
+
+    def current_pool(self) -> Optional[GachaPool]:
+        """현재 풀 (아직 로드되지 않았다면 loader로 한 번 로드)"""
+        pool = self._pool
+        if pool is None and self.loader is not None:
+            pool = self.refresh()
+        return pool
+
+    def start(self):
+        """백그라운드 갱신 스레드 시작 (loader가 있을 때만)"""
+        if self.loader is None:
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """백그라운드 갱신 스레드 중지"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop_event.wait(self.refresh_interval):
+            try:
+                with background_priority():
+                    self.refresh()
+            except Exception as e:
+                self.logger.error(f"가챠 풀 갱신 오류: {e}")
+
+    @property
+    def pool(self) -> Optional[GachaPool]:
+        return self._pool
+
+    def draw(self, count: int = 1, username: Optional[str] = None, generator=None):
+        """
+        현재 풀에서 count번 추첨하고 (결과 목록, 갱신된 천장 카운터)를 반환
+
+        천장 카운터는 재화 차감이 성공한 뒤 commit_pity로 저장합니다.
+        """
+        pool = self._pool
+        if not pool:
+            return [], None
+        pity = self.pity_store.get(username) if username else None
+        return pool.draw_many(count, generator, pity), pity
+
+    def commit_pity(self, username, pity):
+        """추첨 후 갱신된 천장 카운터 저장"""
+        if username and pity is not None:
+            self.pity_store.save(username, pity)
+
+    def get_random_item(self, gacha_items: List[str], rng=random) -> Tuple[str, str]:
+        """
+        확률에 따라 랜덤 아이템 선택 (A열 줄 번호 형식)
+
+        넘겨받은 아이템으로 이번 추첨에만 쓸 풀을 만들며, 시트에서 읽은 현재 풀은 바꾸지 않습니다.
+
         Args:
             gacha_items: 가챠 시트의 아이템 리스트 (인덱스 0부터 시작)
-            
+            rng: random() 메서드를 가진 난수 생성기 (RNGService의 EventRNG.random 등)
+
         Returns:
             (선택된_아이템, 등급명) 튜플
         """
-        # 랜덤 확률 생성 (0-100)
-        roll = random.uniform(0, 100)
-        
-        # 확률에 따른 등급 결정
-        cumulative_prob = 0
-        selected_tier = None
-        rarity_name = ""
-        
-        for prob, start_line, end_line in self.rarity_tiers:
-            cumulative_prob += prob
-            if roll <= cumulative_prob:
-                selected_tier = (start_line, end_line)
-                if prob == 1.0:
-                    rarity_name = "SSR"
-                elif prob == 5.0:
-                    rarity_name = "SR" 
-                elif prob == 15.0:
-                    rarity_name = "R"
-                else:
-                    rarity_name = "N"
-                break
-        
-        if not selected_tier:
-            # 기본값 (최하위 등급)
-            selected_tier = (31, 50)
-            rarity_name = "N"
-        
-        start_idx, end_idx = selected_tier
-        # 1-based line number를 0-based index로 변환
-        start_idx -= 1
-        end_idx -= 1
-        
-        # 해당 등급 범위에서 랜덤 선택
-        available_items = gacha_items[start_idx:end_idx + 1]
-        
-        if not available_items:
-            # 범위에 아이템이 없으면 전체에서 랜덤 선택
-            if gacha_items:
-                selected_item = random.choice(gacha_items)
-            else:
-                selected_item = "기본 아이템"
-        else:
-            selected_item = random.choice(available_items)
-        
-        return selected_item, rarity_name
-    
+        items = [item.strip() for item in gacha_items if str(item).strip()]
+        pool = build_legacy_pool(items, self.rarity_tiers)
+        if not pool:
+            return "기본 아이템", self.rarity_tiers[-1][0]
+        return pool.draw(rng)
+
     def format_gacha_result(self, item: str, rarity: str) -> str:
         """
         가챠 결과를 포맷팅
-        
+
         Args:
             item: 선택된 아이템
             rarity: 등급
-            
+
         Returns:
             포맷된 결과 문자열
         """
-        # 등급별 이모지
-        rarity_emojis = {
-            "SSR": "✨🌟",
-            "SR": "⭐",
-            "R": "💫",
-            "N": "⚪"
-        }
-        
-        emoji = rarity_emojis.get(rarity, "⚪")
-        
+        emoji = RARITY_EMOJIS.get(rarity, "⚪")
+
         return f"{emoji} [{rarity}] {item}를 획득했습니다!"
-    
+
+    def format_multi_result(self, results: List[Tuple[str, str]]) -> str:
+        """
+        연차 결과를 등급별로 묶어 한 번에 보여줄 요약 문자열
+
+        예: "10연차 결과\n⭐ [SR] 은의 검\n⚪ [N] 나무 막대 x5, 돌멩이 x4"
+        """
+        grouped = {}
+        for item, rarity in results:
+            items = grouped.setdefault(rarity, {})
+            items[item] = items.get(item, 0) + 1
+
+        # 희귀한 등급부터 표시
+        pool = self._pool
+        order = [tier.name for tier in pool.tiers] if pool else [tier[0] for tier in self.rarity_tiers]
+        rarities = [name for name in order if name in grouped]
+        rarities += [name for name in grouped if name not in rarities]
+
+        lines = [f"{len(results)}연차 결과"]
+        for rarity in rarities:
+            summary = ", ".join(
+                f"{item} x{count}" if count > 1 else item
+                for item, count in grouped[rarity].items()
+            )
+            lines.append(f"{RARITY_EMOJIS.get(rarity, '⚪')} [{rarity}] {summary}")
+        return "\n".join(lines)
+
     def get_rarity_info(self) -> str:
         """
         확률 정보를 문자열로 반환
         """
-        return (
-            "📊 가챠 확률 정보:\n"
-            "✨ SSR (1%): 1-5번 아이템\n"
-            "⭐ SR (5%): 6-15번 아이템\n"
-            "💫 R (15%): 16-30번 아이템\n"
-            "⚪ N (79%): 31-50번 아이템"
-        )
\ No newline at end of file
+        pool = self._pool
+        if pool is None:
+            lines = ["📊 가챠 확률 정보:"]
+            for name, probability, start_line, end_line in self.rarity_tiers:
+                lines.append(f"{RARITY_EMOJIS.get(name, '⚪')} {name} ({probability:g}%): {start_line}-{end_line}번 아이템")
+            return "\n".join(lines)
+
+        lines = ["📊 가챠 확률 정보:"]
+        for tier in pool.tiers:
+            line = f"{RARITY_EMOJIS.get(tier.name, '⚪')} {tier.name} ({tier.probability:g}%): {len(tier.items)}종"
+            if tier.pity:
+                line += f" / {tier.pity}회 천장"
+            lines.append(line)
+        return "\n".join(lines)
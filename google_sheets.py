@@ -1,32 +1,234 @@
 import os
+import threading
+import time
 from datetime import datetime
-from google.auth.transport.requests import Request
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
 import pandas as pd
+from acquisition_sync import SyncCheckpoint, sync_acquisitions
+from currency_ledger import CurrencyLedger
+from inventory_cache import InventoryCache
+from sheets_executor import SheetsRequestExecutor
+from sheets_transaction import InventoryTransaction, UserLocks, parse_quantity
+from sheets_transport import SheetsClientFactory
+
+INVENTORY_HEADER = ['아이템', '획득 날짜', '수량']
+
+
+def non_inventory_sheet_names():
+    """환경 변수에 설정된, 유저 소지품 시트가 아닌 시트 이름 (키워드/획득 로그/가챠/상점/갈레온 장부)"""
+    names = (
+        os.getenv('KEYWORDS_SHEET_NAME', 'keywords'),
+        os.getenv('ACQUISITION_LOG_SHEET_NAME', 'acquisition_log'),
+        os.getenv('GACHA_SHEET_NAME', '가챠'),
+        os.getenv('STORE_SHEET_NAME', '상점'),
+        os.getenv('CURRENCY_LEDGER_SHEET'),
+    )
+    return {name for name in names if name}
+
 
 class GoogleSheetsManager:
-    def __init__(self, service_account_file, spreadsheet_id):
+    def __init__(self, service_account_file, spreadsheet_id, cache_ttl=60, sheet_index_ttl=600,
+                 sync_checkpoint_path=None, read_quota_per_minute=60, write_quota_per_minute=60,
+                 max_retries=5, discovery_cache_path=None, http_pool_size=4, http_timeout=30,
+                 currency_ledger_sheet=None, non_inventory_sheets=None):
         self.service_account_file = service_account_file
         self.spreadsheet_id = spreadsheet_id
-        self.service = self._authenticate()
+        
+        # 구글 API 클라이언트는 스레드 안전하지 않으므로 스레드마다 따로 생성
+        # (인증 정보와 디스커버리 문서는 공유, 연결 풀은 스레드별 requests 세션)
+        self._local = threading.local()
+        if discovery_cache_path is None:
+            discovery_cache_path = os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), 'data', 'sheets_v4_discovery.json'
+            )
+        self.discovery_cache_path = discovery_cache_path
+        self.http_pool_size = http_pool_size
+        self.http_timeout = http_timeout
+        self._client_factory = None
+        self._client_factory_lock = threading.Lock()
+        
+        # 모든 API 요청은 할당량 토큰 버킷과 429/5xx 재시도를 거쳐 실행
+        self.executor = SheetsRequestExecutor(
+            read_per_minute=read_quota_per_minute,
+            write_per_minute=write_quota_per_minute,
+            max_retries=max_retries
+        )
+        
+        # 유저 소지품 캐시 (읽기는 메모리에서, 쓰기는 시트와 캐시에 동시 반영)
+        self.inventory_cache = InventoryCache(ttl=cache_ttl)
+        
+        # 유저별 트랜잭션 잠금 (같은 유저를 건드리는 트랜잭션의 읽기~커밋 구간 직렬화)
+        self.user_locks = UserLocks()
+        
+        # 시트 이름 -> 시트 ID 인덱스 (시작 시 한 번 로드, 누락/만료 시에만 갱신)
+        self.sheet_index_ttl = sheet_index_ttl
+        self._sheet_ids = {}
+        self._sheet_index_loaded_at = None
+        self._sheet_index_lock = threading.Lock()
+        self._load_sheet_index()
+        
+        # 획득 로그 동기화 체크포인트 (마지막으로 반영한 행 번호)
+        if sync_checkpoint_path is None:
+            sync_checkpoint_path = os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), 'data', 'sync_checkpoint.json'
+            )
+        self.sync_checkpoint = SyncCheckpoint(sync_checkpoint_path)
+        
+        # 갈레온 장부 (설정하면 갈레온은 유저 소지품 시트 대신 장부 시트 한 곳에 기록)
+        self.currency_ledger = None
+        if currency_ledger_sheet:
+            self.currency_ledger = CurrencyLedger(self, currency_ledger_sheet, ttl=cache_ttl)
+        
+        # 유저 소지품 시트로 보지 않을 시트 (전체 유저 조회 시 제외)
+        self.non_inventory_sheets = set(non_inventory_sheets or ())
+        if currency_ledger_sheet:
+            self.non_inventory_sheets.add(currency_ledger_sheet)
+    
+    @property
+    def service(self):
+        """현재 스레드 전용 시트 API 클라이언트"""
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            service = self._authenticate()
+            self._local.service = service
+        return service
     
     def _authenticate(self):
-        """구글 시트 API 인증"""
-        scopes = ['https://www.googleapis.com/auth/spreadsheets']
-        creds = Credentials.from_service_account_file(
-            self.service_account_file, scopes=scopes
-        )
-        return build('sheets', 'v4', credentials=creds)
+        """구글 시트 API 인증 (현재 스레드용 클라이언트 생성)"""
+        with self._client_factory_lock:
+            if self._client_factory is None:
+                scopes = ['https://www.googleapis.com/auth/spreadsheets']
+                self._client_factory = SheetsClientFactory(
+                    self.service_account_file,
+                    scopes,
+                    self.discovery_cache_path,
+                    pool_maxsize=self.http_pool_size,
+                    read_timeout=self.http_timeout
+                )
+        return self._client_factory.build()
+    
+    def _execute(self, request):
+        """API 요청을 공용 실행기로 실행 (할당량 대기 및 재시도 포함)"""
+        return self.executor.execute(request)
+    
+    def api_metrics(self):
+        """읽기/쓰기 할당량 사용량과 재시도 카운터"""
+        return self.executor.metrics()
+    
+    def _get_inventory_values(self, username, refresh=False):
+        """유저 소지품 시트의 A:C 값을 캐시 우선으로 가져옴"""
+        if not refresh:
+            cached = self.inventory_cache.get(username)
+            if cached is not None:
+                return cached
+        
+        result = self._execute(self.service.spreadsheets().values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=f'{username}!A:C'
+        ))
+        
+        values = result.get('values', [])
+        self.inventory_cache.put(username, values)
+        return values
+    
+    def _inventory_row_count(self, username):
+        """유저 소지품 시트의 행 수 (헤더 포함, 시트가 없으면 None)"""
+        if self._lookup_sheet_id(username, strict=True) is None:
+            return None
+        count = self.inventory_cache.row_count(username)
+        if count is None:
+            count = len(self._get_inventory_values(username, refresh=True))
+        return count
+    
+    def _lookup_inventory_row(self, username, item):
+        """아이템이 있는 (행 번호, 행 값) 조회 (캐시 인덱스 사용, 캐시가 없을 때만 시트를 읽음)"""
+        found = self.inventory_cache.lookup(username, item)
+        if found is None:
+            self._get_inventory_values(username, refresh=True)
+            found = self.inventory_cache.lookup(username, item) or (None, None)
+        return found
+    
+    def _load_sheet_index(self):
+        """스프레드시트의 시트 이름/ID 목록만 가져와 인덱스 갱신"""
+        try:
+            spreadsheet = self._execute(self.service.spreadsheets().get(
+                spreadsheetId=self.spreadsheet_id,
+                fields='sheets.properties(sheetId,title)'
+            ))
+            
+            sheet_ids = {}
+            for s in spreadsheet.get('sheets', []):
+                properties = s['properties']
+                sheet_ids[properties['title']] = properties['sheetId']
+            
+            with self._sheet_index_lock:
+                self._sheet_ids = sheet_ids
+                self._sheet_index_loaded_at = time.monotonic()
+            return True
+            
+        except Exception as e:
+            print(f"시트 목록 조회 중 오류 발생: {e}")
+            return False
+    
+    def _sheet_index_is_stale(self):
+        loaded_at = self._sheet_index_loaded_at
+        if loaded_at is None:
+            return True
+        return self.sheet_index_ttl is not None and time.monotonic() - loaded_at >= self.sheet_index_ttl
+    
+    def _lookup_sheet_id(self, sheet_name, strict=False):
+        """
+        인덱스에서 시트 ID 조회 (없거나 만료된 경우에만 다시 로드)
+        
+        strict이면 시트 목록을 다시 불러오지 못해 시트가 없는지 확인할 수 없을 때
+        None 대신 RuntimeError를 던집니다. (None은 시트가 없다고 확인된 경우에만)
+        """
+        if not self._sheet_index_is_stale():
+            sheet_id = self._sheet_ids.get(sheet_name)
+            if sheet_id is not None:
+                return sheet_id
+        
+        loaded = self._load_sheet_index()
+        sheet_id = self._sheet_ids.get(sheet_name)
+        if sheet_id is None and strict and not loaded:
+            raise RuntimeError(f"시트 목록을 불러오지 못해 {sheet_name} 시트가 있는지 확인할 수 없습니다.")
+        return sheet_id
+    
+    def _register_sheet(self, sheet_name, sheet_id):
+        """addSheet 성공 후 인덱스에 새 시트 추가"""
+        with self._sheet_index_lock:
+            self._sheet_ids[sheet_name] = sheet_id
+    
+    def close(self):
+        """스레드별 HTTP 연결 풀 정리"""
+        if self._client_factory is not None:
+            self._client_factory.close()
+    
+    def begin_transaction(self, *usernames):
+        """
+        여러 소지품/갈레온 변경을 한 번의 batchUpdate로 반영하는 트랜잭션 생성
+
+        건드릴 유저를 넘기면 이름순으로 미리 잠급니다 (with 블록으로 사용).
+        """
+        return InventoryTransaction(self, usernames)
+    
+    def inventory_sheet_names(self):
+        """유저 소지품 시트로 볼 시트 이름 목록 (non_inventory_sheets 제외)"""
+        with self._sheet_index_lock:
+            sheet_names = list(self._sheet_ids)
+        return [name for name in sheet_names if name not in self.non_inventory_sheets]
+    
+    def invalidate_user_cache(self, username=None):
+        """유저 소지품 캐시 무효화 (username이 없으면 전체)"""
+        self.inventory_cache.invalidate(username)
     
     def get_keywords_data(self, sheet_name):
         """키워드 데이터를 가져옴"""
         try:
             sheet = self.service.spreadsheets()
-            result = sheet.values().get(
+            result = self._execute(sheet.values().get(
                 spreadsheetId=self.spreadsheet_id,
                 range=f'{sheet_name}!A:B'
-            ).execute()
+            ))
             
             values = result.get('values', [])
             if not values:
@@ -58,12 +260,12 @@ class GoogleSheetsManager:
             values = [[timestamp, username, item]]
             body = {'values': values}
             
-            result = sheet.values().append(
+            result = self._execute(sheet.values().append(
                 spreadsheetId=self.spreadsheet_id,
                 range=f'{sheet_name}!A:C',
                 valueInputOption='RAW',
                 body=body
-            ).execute()
+            ))
             
             print(f"획득 로그 기록 완료: {username} - {item}")
             return True
@@ -72,14 +274,34 @@ class GoogleSheetsManager:
             print(f"획득 로그 기록 중 오류 발생: {e}")
             return False
     
+    def append_acquisition_rows(self, sheet_name, rows):
+        """획득 로그 여러 행을 한 번의 append로 기록 (rows: [시간, 사용자, 아이템] 목록)"""
+        if not rows:
+            return True
+        
+        try:
+            self._execute(self.service.spreadsheets().values().append(
+                spreadsheetId=self.spreadsheet_id,
+                range=f'{sheet_name}!A:C',
+                valueInputOption='RAW',
+                body={'values': [list(row) for row in rows]}
+            ))
+            
+            print(f"획득 로그 {len(rows)}건 기록 완료")
+            return True
+            
+        except Exception as e:
+            print(f"획득 로그 일괄 기록 중 오류 발생: {e}")
+            return False
+    
     def get_gacha_items(self, sheet_name):
         """가챠 시트에서 아이템 목록을 가져옴"""
         try:
             sheet = self.service.spreadsheets()
-            result = sheet.values().get(
+            result = self._execute(sheet.values().get(
                 spreadsheetId=self.spreadsheet_id,
                 range=f'{sheet_name}!A:A'
-            ).execute()
+            ))
             
             values = result.get('values', [])
             if not values:
@@ -97,16 +319,25 @@ class GoogleSheetsManager:
             print(f"가챠 아이템 데이터를 가져오는 중 오류 발생: {e}")
             return []
     
+    def get_gacha_config(self, sheet_name):
+        """가챠 시트의 아이템(A:C)과 등급표(E:G) 원본 행을 가져옴"""
+        try:
+            return self.read_range(f'{sheet_name}!A:G')
+            
+        except Exception as e:
+            print(f"가챠 설정을 가져오는 중 오류 발생: {e}")
+            return []
+    
     def setup_acquisition_log_sheet(self, sheet_name):
         """획득 로그 시트에 헤더 설정"""
         try:
             sheet = self.service.spreadsheets()
             
             # 헤더 확인
-            result = sheet.values().get(
+            result = self._execute(sheet.values().get(
                 spreadsheetId=self.spreadsheet_id,
                 range=f'{sheet_name}!A1:C1'
-            ).execute()
+            ))
             
             values = result.get('values', [])
             if not values or len(values[0]) < 3:
@@ -114,12 +345,12 @@ class GoogleSheetsManager:
                 headers = [['시간', '사용자', '획득 아이템']]
                 body = {'values': headers}
                 
-                sheet.values().update(
+                self._execute(sheet.values().update(
                     spreadsheetId=self.spreadsheet_id,
                     range=f'{sheet_name}!A1:C1',
                     valueInputOption='RAW',
                     body=body
-                ).execute()
+                ))
                 
                 print("획득 로그 시트 헤더 설정 완료")
             
@@ -132,10 +363,7 @@ class GoogleSheetsManager:
             sheet = self.service.spreadsheets()
             
             # 시트 존재 확인
-            spreadsheet = sheet.get(spreadsheetId=self.spreadsheet_id).execute()
-            sheet_names = [s['properties']['title'] for s in spreadsheet['sheets']]
-            
-            if username not in sheet_names:
+            if self._lookup_sheet_id(username) is None:
                 # 새 시트 생성
                 request_body = {
                     'requests': [{
@@ -147,21 +375,26 @@ class GoogleSheetsManager:
                     }]
                 }
                 
-                sheet.batchUpdate(
+                result = self._execute(sheet.batchUpdate(
                     spreadsheetId=self.spreadsheet_id,
                     body=request_body
-                ).execute()
+                ))
+                
+                properties = result['replies'][0]['addSheet']['properties']
+                self._register_sheet(properties['title'], properties['sheetId'])
                 
                 # 헤더 설정
-                headers = [['아이템', '획득 날짜', '수량']]
+                headers = [INVENTORY_HEADER]
                 body = {'values': headers}
                 
-                sheet.values().update(
+                self._execute(sheet.values().update(
                     spreadsheetId=self.spreadsheet_id,
                     range=f'{username}!A1:C1',
                     valueInputOption='RAW',
                     body=body
-                ).execute()
+                ))
+                
+                self.inventory_cache.put(username, headers)
                 
                 print(f"{username} 소지품 시트 생성 완료")
                 return True
@@ -176,72 +409,114 @@ class GoogleSheetsManager:
     def add_item_to_user_inventory(self, username, item, timestamp=None, quantity=1):
         """유저 소지품 시트에 아이템 추가"""
         try:
-            if timestamp is None:
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            # 시트가 없으면 생성
-            self.create_user_inventory_sheet(username)
+            with self.begin_transaction(username) as txn:
+                txn.add_item(username, item, quantity, timestamp)
+                
+                if not txn.commit():
+                    return False
             
-            sheet = self.service.spreadsheets()
+            print(f"{username} 소지품에 {item} 추가 완료 (수량: {quantity})")
+            return True
             
-            # 기존 아이템 확인
-            result = sheet.values().get(
+        except Exception as e:
+            print(f"{username} 소지품 추가 중 오류 발생: {e}")
+            self.inventory_cache.invalidate(username)
+            return False
+    
+    def read_range(self, range_name):
+        """지정한 범위의 원본 값 조회"""
+        result = self._execute(self.service.spreadsheets().values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=range_name
+        ))
+        return result.get('values', [])
+    
+    def read_inventory_rows(self, username):
+        """
+        유저 소지품 시트의 원본 행 목록 조회 (헤더 포함, 시트가 없으면 None)
+        
+        시트 목록이나 시트 값을 읽지 못하면 예외를 그대로 던지므로 None은 시트가
+        없다고 확인된 경우뿐입니다.
+        """
+        if self._lookup_sheet_id(username, strict=True) is None:
+            return None
+        return self._get_inventory_values(username)
+    
+    def prefetch_inventories(self, usernames):
+        """
+        여러 유저의 소지품 시트를 한 번의 values.batchGet으로 읽어 캐시에 저장
+        
+        이미 캐시에 있거나 소지품 시트가 없는 유저는 건너뜁니다.
+        
+        Returns:
+            새로 읽어 온 유저 수
+        """
+        targets = [
+            username for username in sorted(set(usernames))
+            if not self.inventory_cache.contains(username) and self._lookup_sheet_id(username) is not None
+        ]
+        if not targets:
+            return 0
+        
+        try:
+            result = self._execute(self.service.spreadsheets().values().batchGet(
                 spreadsheetId=self.spreadsheet_id,
-                range=f'{username}!A:C'
-            ).execute()
+                ranges=[f'{username}!A:C' for username in targets]
+            ))
             
-            values = result.get('values', [])
-            updated = False
+            for username, value_range in zip(targets, result.get('valueRanges', [])):
+                self.inventory_cache.put(username, value_range.get('values', []))
+            return len(targets)
             
-            # 기존 아이템이 있는지 확인하고 수량 업데이트
-            for i, row in enumerate(values[1:], start=2):  # 헤더 제외
-                if len(row) > 0 and row[0] == item:
-                    current_quantity = int(row[2]) if len(row) > 2 and row[2].isdigit() else 1
-                    new_quantity = current_quantity + quantity
-                    
-                    # 수량 업데이트
-                    update_values = [[item, timestamp, new_quantity]]
-                    body = {'values': update_values}
-                    
-                    sheet.values().update(
-                        spreadsheetId=self.spreadsheet_id,
-                        range=f'{username}!A{i}:C{i}',
-                        valueInputOption='RAW',
-                        body=body
-                    ).execute()
-                    
-                    updated = True
-                    break
-            
-            # 새 아이템 추가
-            if not updated:
-                new_values = [[item, timestamp, quantity]]
-                body = {'values': new_values}
+        except Exception as e:
+            print(f"소지품 시트 일괄 조회 중 오류 발생: {e}")
+            return 0
+    
+    def write_inventory_rows(self, rows_by_user):
+        """
+        여러 유저 소지품 시트를 한 번의 values.batchUpdate로 덮어씀
+        
+        Args:
+            rows_by_user: {username: (아이템 행 목록, 지울 기존 행 수)}
+                아이템 행은 헤더를 제외한 [아이템, 획득 날짜, 수량] 목록
+        """
+        if not rows_by_user:
+            return True
+        
+        try:
+            data = []
+            for username, (rows, previous_length) in rows_by_user.items():
+                self.create_user_inventory_sheet(username)
                 
-                sheet.values().append(
-                    spreadsheetId=self.spreadsheet_id,
-                    range=f'{username}!A:C',
-                    valueInputOption='RAW',
-                    body=body
-                ).execute()
+                values = [INVENTORY_HEADER] + [list(row) for row in rows]
+                # 이전보다 행이 줄었으면 남은 행을 빈 값으로 덮어씀
+                blank_rows = max(0, previous_length - len(values))
+                padded = values + [['', '', ''] for _ in range(blank_rows)]
+                
+                data.append({
+                    'range': f'{username}!A1:C{len(padded)}',
+                    'values': padded
+                })
             
-            print(f"{username} 소지품에 {item} 추가 완료 (수량: {quantity})")
+            self._execute(self.service.spreadsheets().values().batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={'valueInputOption': 'RAW', 'data': data}
+            ))
+            
+            for username, (rows, _) in rows_by_user.items():
+                self.inventory_cache.put(username, [INVENTORY_HEADER] + [[str(v) for v in row] for row in rows])
             return True
             
         except Exception as e:
-            print(f"{username} 소지품 추가 중 오류 발생: {e}")
+            print(f"소지품 시트 일괄 기록 중 오류 발생: {e}")
+            for username in rows_by_user:
+                self.inventory_cache.invalidate(username)
             return False
     
     def get_user_inventory(self, username):
         """유저 소지품 조회"""
         try:
-            sheet = self.service.spreadsheets()
-            result = sheet.values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range=f'{username}!A:C'
-            ).execute()
-            
-            values = result.get('values', [])
+            values = self._get_inventory_values(username)
             if not values or len(values) <= 1:  # 헤더만 있거나 비어있음
                 return []
             
@@ -250,7 +525,7 @@ class GoogleSheetsManager:
                 if len(row) >= 3:
                     item = row[0]
                     date = row[1]
-                    quantity = int(row[2]) if row[2].isdigit() else 1
+                    quantity = parse_quantity(row)
                     inventory.append({'item': item, 'date': date, 'quantity': quantity})
                 elif len(row) >= 1:  # 최소한 아이템명만 있는 경우
                     inventory.append({'item': row[0], 'date': '', 'quantity': 1})
@@ -261,35 +536,16 @@ class GoogleSheetsManager:
             print(f"{username} 소지품 조회 중 오류 발생: {e}")
             return []
     
-    def sync_acquisitions_to_inventories(self, acquisition_sheet):
-        """획득 로그에서 각 유저 소지품으로 동기화"""
+    def sync_acquisitions_to_inventories(self, acquisition_sheet, dry_run=False):
+        """
+        획득 로그에서 각 유저 소지품으로 동기화
+        
+        마지막으로 동기화한 행 이후만 읽어 유저별로 묶은 뒤 한 번에 반영하므로
+        여러 번 실행해도 같은 행이 중복으로 더해지지 않습니다.
+        dry_run이면 반영하지 않고 계획만 반환합니다.
+        """
         try:
-            sheet = self.service.spreadsheets()
-            result = sheet.values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range=f'{acquisition_sheet}!A:C'
-            ).execute()
-            
-            values = result.get('values', [])
-            if not values or len(values) <= 1:
-                print("동기화할 획득 로그가 없습니다.")
-                return
-            
-            sync_count = 0
-            for row in values[1:]:  # 헤더 제외
-                if len(row) >= 3:
-                    timestamp = row[0]
-                    username = row[1]
-                    item = row[2]
-                    
-                    # 유효한 유저명인지 확인 (빈 문자열이 아닌 경우)
-                    if username and username.strip():
-                        if self.add_item_to_user_inventory(username, item, timestamp):
-                            sync_count += 1
-            
-            print(f"총 {sync_count}개 항목 동기화 완료")
-            return True
-            
+            return sync_acquisitions(self, self, acquisition_sheet, self.sync_checkpoint, dry_run)
         except Exception as e:
             print(f"획득 로그 동기화 중 오류 발생: {e}")
             return False
@@ -298,10 +554,10 @@ class GoogleSheetsManager:
         """상점 시트에서 아이템과 가격 정보를 가져옴"""
         try:
             sheet = self.service.spreadsheets()
-            result = sheet.values().get(
+            result = self._execute(sheet.values().get(
                 spreadsheetId=self.spreadsheet_id,
                 range=f'{sheet_name}!A:C'
-            ).execute()
+            ))
             
             values = result.get('values', [])
             if not values:
@@ -332,104 +588,101 @@ class GoogleSheetsManager:
     def get_user_currency(self, username):
         """유저의 갈레온 보유량 조회"""
         try:
-            inventory = self.get_user_inventory(username)
+            if self.currency_ledger is not None:
+                return self.currency_ledger.get_balance(username)
             
-            for item_data in inventory:
-                if item_data['item'] == '갈레온':
-                    return item_data['quantity']
+            if self._lookup_sheet_id(username) is None:
+                return 0
             
-            return 0  # 갈레온이 없으면 0
+            row_number, row = self._lookup_inventory_row(username, '갈레온')
+            if row_number is None:
+                return 0  # 갈레온이 없으면 0
+            return parse_quantity(row)
             
         except Exception as e:
             print(f"{username} 갈레온 조회 중 오류 발생: {e}")
             return 0
     
+    def get_all_balances(self):
+        """전체 유저 갈레온 잔액 {유저: 잔액} (장부 사용 시 values.get 한 번, 아니면 유저 시트 batchGet 한 번)"""
+        if self.currency_ledger is not None:
+            return self.currency_ledger.get_all_balances()
+        
+        # 키워드/획득 로그 등 다른 시트를 소지품으로 읽어 캐시에 넣지 않도록 미리 제외
+        sheet_names = self.inventory_sheet_names()
+        self.prefetch_inventories(sheet_names)
+        
+        balances = {}
+        for username in sheet_names:
+            rows = self.inventory_cache.get(username)
+            if not rows or rows[0][:3] != INVENTORY_HEADER:
+                continue  # 유저 소지품 시트가 아님
+            found = self.inventory_cache.lookup(username, '갈레온')
+            balances[username] = parse_quantity(found[1]) if found and found[0] else 0
+        return balances
+    
+    def credit_balances(self, amounts):
+        """
+        여러 유저에게 갈레온 일괄 지급/차감 ({유저: 증감량}, 장부 사용 시 batchUpdate 한 번)
+        
+        장부를 쓰더라도 트랜잭션으로 처리해, 같은 유저의 구매/양도와 잔액을 덮어쓰지 않도록
+        유저 잠금을 잡은 채 읽고 씁니다.
+        """
+        try:
+            with self.begin_transaction(*amounts) as txn:
+                for username, amount in amounts.items():
+                    current = txn.get_quantity(username, '갈레온', default=0)
+                    txn.set_quantity(username, '갈레온', max(0, current + amount))
+                return txn.commit()
+            
+        except Exception as e:
+            print(f"갈레온 일괄 지급 중 오류 발생: {e}")
+            return False
+    
     def update_user_currency(self, username, amount, operation='set'):
         """유저의 갈레온 업데이트 (set: 설정, add: 추가, subtract: 차감)"""
         try:
-            # 시트가 없으면 생성
-            self.create_user_inventory_sheet(username)
-            
-            sheet = self.service.spreadsheets()
-            
-            # 기존 갈레온 찾기
-            result = sheet.values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range=f'{username}!A:C'
-            ).execute()
-            
-            values = result.get('values', [])
-            galleon_row = None
-            current_amount = 0
-            
-            # 갈레온 행 찾기
-            for i, row in enumerate(values[1:], start=2):  # 헤더 제외
-                if len(row) > 0 and row[0] == '갈레온':
-                    galleon_row = i
-                    current_amount = int(row[2]) if len(row) > 2 and row[2].isdigit() else 0
-                    break
-            
-            # 새로운 금액 계산
-            if operation == 'set':
-                new_amount = amount
-            elif operation == 'add':
-                new_amount = current_amount + amount
-            elif operation == 'subtract':
-                new_amount = max(0, current_amount - amount)  # 음수 방지
-            else:
-                return False
-            
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            if galleon_row:
-                # 기존 갈레온 업데이트
-                update_values = [['갈레온', timestamp, new_amount]]
-                body = {'values': update_values}
+            with self.begin_transaction(username) as txn:
+                current_amount = txn.get_quantity(username, '갈레온', default=0)
                 
-                sheet.values().update(
-                    spreadsheetId=self.spreadsheet_id,
-                    range=f'{username}!A{galleon_row}:C{galleon_row}',
-                    valueInputOption='RAW',
-                    body=body
-                ).execute()
-            else:
-                # 새 갈레온 행 추가
-                new_values = [['갈레온', timestamp, new_amount]]
-                body = {'values': new_values}
+                # 새로운 금액 계산
+                if operation == 'set':
+                    new_amount = amount
+                elif operation == 'add':
+                    new_amount = current_amount + amount
+                elif operation == 'subtract':
+                    new_amount = max(0, current_amount - amount)  # 음수 방지
+                else:
+                    return False
                 
-                sheet.values().append(
-                    spreadsheetId=self.spreadsheet_id,
-                    range=f'{username}!A:C',
-                    valueInputOption='RAW',
-                    body=body
-                ).execute()
+                txn.set_quantity(username, '갈레온', new_amount)
+                if not txn.commit():
+                    return False
             
             print(f"{username} 갈레온 업데이트: {current_amount} -> {new_amount}")
             return True
             
         except Exception as e:
             print(f"{username} 갈레온 업데이트 중 오류 발생: {e}")
+            self.inventory_cache.invalidate(username)
             return False
     
     def purchase_item(self, username, item_name, price):
-        """아이템 구매 처리 (갈레온 차감 및 아이템 추가)"""
+        """아이템 구매 처리 (갈레온 차감과 아이템 추가를 한 번에 반영)"""
         try:
-            current_currency = self.get_user_currency(username)
-            
-            if current_currency < price:
-                return False, f"갈레온이 부족합니다. (보유: {current_currency}, 필요: {price})"
-            
-            # 갈레온 차감
-            if not self.update_user_currency(username, price, 'subtract'):
-                return False, "갈레온 차감 중 오류가 발생했습니다."
-            
-            # 아이템 추가
-            if not self.add_item_to_user_inventory(username, item_name):
-                # 갈레온 차감을 롤백
-                self.update_user_currency(username, price, 'add')
-                return False, "아이템 추가 중 오류가 발생했습니다."
+            with self.begin_transaction(username) as txn:
+                current_currency = txn.get_quantity(username, '갈레온', default=0)
+                
+                if current_currency < price:
+                    return False, f"갈레온이 부족합니다. (보유: {current_currency}, 필요: {price})"
+                
+                new_currency = current_currency - price
+                txn.set_quantity(username, '갈레온', new_currency)
+                txn.add_item(username, item_name)
+                
+                if not txn.commit():
+                    return False, "구매 처리 중 오류가 발생했습니다."
             
-            new_currency = current_currency - price
             return True, f"{item_name}을(를) 구매했습니다! (잔액: {new_currency} 갈레온)"
             
         except Exception as e:
@@ -439,100 +692,48 @@ class GoogleSheetsManager:
     def remove_item_from_inventory(self, username, item_name, quantity=1):
         """유저 소지품에서 아이템 제거/차감"""
         try:
-            sheet = self.service.spreadsheets()
-            
-            # 기존 아이템 확인
-            result = sheet.values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range=f'{username}!A:C'
-            ).execute()
-            
-            values = result.get('values', [])
-            
-            # 아이템 찾기
-            for i, row in enumerate(values[1:], start=2):  # 헤더 제외
-                if len(row) > 0 and row[0] == item_name:
-                    current_quantity = int(row[2]) if len(row) > 2 and row[2].isdigit() else 1
-                    
-                    if current_quantity < quantity:
-                        return False, f"{item_name}이(가) 부족합니다. (보유: {current_quantity}, 필요: {quantity})"
-                    
-                    new_quantity = current_quantity - quantity
-                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    
-                    if new_quantity <= 0:
-                        # 아이템 완전 제거
-                        delete_request = {
-                            'requests': [{
-                                'deleteDimension': {
-                                    'range': {
-                                        'sheetId': self._get_sheet_id(username),
-                                        'dimension': 'ROWS',
-                                        'startIndex': i - 1,
-                                        'endIndex': i
-                                    }
-                                }
-                            }]
-                        }
-                        
-                        sheet.batchUpdate(
-                            spreadsheetId=self.spreadsheet_id,
-                            body=delete_request
-                        ).execute()
-                    else:
-                        # 수량만 업데이트
-                        update_values = [[item_name, timestamp, new_quantity]]
-                        body = {'values': update_values}
-                        
-                        sheet.values().update(
-                            spreadsheetId=self.spreadsheet_id,
-                            range=f'{username}!A{i}:C{i}',
-                            valueInputOption='RAW',
-                            body=body
-                        ).execute()
-                    
-                    print(f"{username}에서 {item_name} {quantity}개 제거 완료")
-                    return True, f"{item_name} {quantity}개를 제거했습니다."
+            with self.begin_transaction(username) as txn:
+                success, message = txn.remove_item(username, item_name, quantity)
+                if not success:
+                    return False, message
+                
+                if not txn.commit():
+                    return False, "아이템 제거 중 오류가 발생했습니다."
             
-            return False, f"{item_name}을(를) 소지품에서 찾을 수 없습니다."
+            print(f"{username}에서 {item_name} {quantity}개 제거 완료")
+            return True, message
             
         except Exception as e:
             print(f"{username} 아이템 제거 중 오류 발생: {e}")
+            self.inventory_cache.invalidate(username)
             return False, "아이템 제거 중 오류가 발생했습니다."
     
     def _get_sheet_id(self, sheet_name):
         """시트 이름으로 시트 ID 가져오기"""
         try:
-            spreadsheet = self.service.spreadsheets().get(
-                spreadsheetId=self.spreadsheet_id
-            ).execute()
-            
-            for sheet in spreadsheet['sheets']:
-                if sheet['properties']['title'] == sheet_name:
-                    return sheet['properties']['sheetId']
-            
-            return None
+            return self._lookup_sheet_id(sheet_name)
         except Exception as e:
             print(f"시트 ID 조회 중 오류: {e}")
             return None
     
     def transfer_item(self, from_user, to_user, item_name, quantity=1):
-        """유저간 아이템 양도"""
+        """유저간 아이템 양도 (보내는 사람 차감과 받는 사람 추가를 한 번에 반영)"""
         try:
-            # 보내는 사람의 아이템 확인 및 제거
-            success, message = self.remove_item_from_inventory(from_user, item_name, quantity)
-            if not success:
-                return False, message
-            
-            # 받는 사람에게 아이템 추가
-            if not self.add_item_to_user_inventory(to_user, item_name, quantity=quantity):
-                # 실패시 롤백 - 보내는 사람에게 다시 추가
-                self.add_item_to_user_inventory(from_user, item_name, quantity=quantity)
-                return False, "받는 사람에게 아이템 추가 중 오류가 발생했습니다."
+            with self.begin_transaction(from_user, to_user) as txn:
+                # 보내는 사람의 아이템 확인 및 차감
+                success, message = txn.remove_item(from_user, item_name, quantity)
+                if not success:
+                    return False, message
+                
+                # 받는 사람에게 아이템 추가
+                txn.add_item(to_user, item_name, quantity)
+                
+                if not txn.commit():
+                    return False, "아이템 양도 중 오류가 발생했습니다."
             
             print(f"아이템 양도 완료: {from_user} -> {to_user}, {item_name} x{quantity}")
             return True, f"{item_name} {quantity}개를 {to_user}에게 양도했습니다."
             
         except Exception as e:
             print(f"아이템 양도 중 오류 발생: {e}")
-            return False, "아이템 양도 중 오류가 발생했습니다."
\ No newline at end of file
+            return False, "아이템 양도 중 오류가 발생했습니다."
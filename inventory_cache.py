@@ -0,0 +1,179 @@
+import threading
+import time
+
+
+class InventoryCache:
+    """
+    유저별 소지품 시트(A:C) 값을 메모리에 보관하는 캐시
+
+    시트에서 읽어온 행 목록(헤더 포함)을 그대로 저장하며, 쓰기는
+    GoogleSheetsManager가 시트에 반영한 뒤 같은 내용을 캐시에도 적용합니다.
+    관리자가 시트를 직접 수정할 수 있으므로 TTL이 지나면 다시 읽어옵니다.
+
+    유저별로 아이템 이름 -> 행 번호 인덱스도 함께 유지해, 변경할 행을 전체 행을
+    훑지 않고 바로 찾을 수 있습니다. 행이 삭제되면 아래 행 번호를 당겨 맞춥니다.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._entries = {}  # username -> (로드 시각, 행 목록)
+        self._indexes = {}  # username -> {아이템: 행 번호 (같은 이름이 여러 행이면 첫 행)}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def _is_fresh(self, loaded_at):
+        return self.ttl is None or time.monotonic() - loaded_at < self.ttl
+
+    def _fresh_rows(self, username):
+        """만료되지 않은 행 목록 (잠금 안에서 호출, 만료되면 제거하고 None)"""
+        entry = self._entries.get(username)
+        if entry is None or not self._is_fresh(entry[0]):
+            self._drop(username)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def _drop(self, username):
+        self._entries.pop(username, None)
+        self._indexes.pop(username, None)
+
+    def _build_index(self, username, rows):
+        index = {}
+        for row_number, row in enumerate(rows[1:], start=2):  # 헤더 제외
+            if row and row[0]:
+                index.setdefault(row[0], row_number)
+        self._indexes[username] = index
+
+    def get(self, username):
+        """캐시된 행 목록의 복사본 반환 (없거나 만료되면 None)"""
+        with self._lock:
+            rows = self._fresh_rows(username)
+            if rows is None:
+                return None
+            return [list(row) for row in rows]
+
+    def contains(self, username):
+        """만료되지 않은 캐시가 있는지 확인 (행 목록은 복사하지 않음)"""
+        with self._lock:
+            entry = self._entries.get(username)
+            return entry is not None and self._is_fresh(entry[0])
+
+    def lookup(self, username, item):
+        """
+        아이템이 있는 행 조회 (인덱스 사용)
+
+        Returns:
+            캐시가 없거나 만료되면 None, 아니면 (행 번호, 행 값 복사본).
+            아이템이 없으면 (None, None)
+        """
+        with self._lock:
+            rows = self._fresh_rows(username)
+            if rows is None:
+                return None
+            row_number = self._indexes[username].get(item)
+            if row_number is None:
+                return None, None
+            return row_number, list(rows[row_number - 1])
+
+    def row_count(self, username):
+        """캐시된 행 수 (헤더 포함, 없거나 만료되면 None)"""
+        with self._lock:
+            rows = self._fresh_rows(username)
+            return None if rows is None else len(rows)
+
+    def put(self, username, rows):
+        """시트에서 읽어온 행 목록 저장"""
+        with self._lock:
+            rows = [list(row) for row in rows]
+            self._entries[username] = (time.monotonic(), rows)
+            self._build_index(username, rows)
+
+    def update_row(self, username, row_number, values):
+        """캐시된 행 갱신 (row_number는 시트 기준 1부터 시작)"""
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return
+            rows = entry[1]
+            if row_number > len(rows):
+                self._drop(username)
+                return
+            previous = rows[row_number - 1]
+            rows[row_number - 1] = list(values)
+
+            if row_number == 1:
+                return
+            old_item = previous[0] if previous else None
+            new_item = values[0] if values else None
+            if old_item == new_item:
+                return
+            index = self._indexes[username]
+            if old_item and index.get(old_item) == row_number:
+                # 같은 이름의 다른 행이 있을 수 있어 드문 경우에만 다시 만듦
+                self._build_index(username, rows)
+            elif new_item and (new_item not in index or index[new_item] > row_number):
+                index[new_item] = row_number
+
+    def append_row(self, username, values, row_number=None):
+        """캐시 끝에 행 추가 (row_number를 알면 해당 위치에 맞춤)"""
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return
+            rows = entry[1]
+            if row_number is None:
+                row_number = len(rows) + 1
+            if row_number <= len(rows):
+                # 캐시와 시트가 어긋난 경우 다음 조회에서 다시 읽음
+                self._drop(username)
+                return
+            while len(rows) < row_number - 1:
+                rows.append([])
+            rows.append(list(values))
+            if row_number > 1 and values and values[0]:
+                self._indexes[username].setdefault(values[0], row_number)
+
+    def delete_row(self, username, row_number):
+        """캐시된 행 삭제 (아래 행들은 한 칸씩 당겨짐)"""
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return
+            rows = entry[1]
+            if row_number > len(rows):
+                self._drop(username)
+                return
+            removed = rows.pop(row_number - 1)
+
+            index = self._indexes[username]
+            removed_item = removed[0] if removed else None
+            if removed_item and index.get(removed_item) == row_number:
+                del index[removed_item]
+                # 같은 이름의 아래 행이 있으면 그 행을 가리키도록 다시 만듦
+                if any(row and row[0] == removed_item for row in rows[row_number - 1:]):
+                    self._build_index(username, rows)
+                    return
+            for item, indexed_row in index.items():
+                if indexed_row > row_number:
+                    index[item] = indexed_row - 1
+
+    def invalidate(self, username=None):
+        """특정 유저 또는 전체 캐시 무효화"""
+        with self._lock:
+            if username is None:
+                self._entries.clear()
+                self._indexes.clear()
+            else:
+                self._drop(username)
+
+    def stats(self):
+        """캐시 통계 반환"""
+        with self._lock:
+            return {
+                'users': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'ttl': self.ttl,
+            }
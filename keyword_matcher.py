@@ -0,0 +1,181 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from sheets_executor import background_priority
+
+
+class KeywordIndex:
+    """
+    키워드 시트 한 버전을 컴파일한 매칭 인덱스
+
+    - 완전 일치: 소문자 키워드 -> 응답 해시맵
+    - 부분 일치: Aho–Corasick 오토마톤 (시트 순서상 가장 앞선 키워드 우선)
+    """
+
+    def __init__(self, keywords_data: Dict[str, str]):
+        self.keywords_data = dict(keywords_data)
+        self._responses = []
+        self._exact = {}
+        self._empty_order = None
+
+        # 오토마톤 상태: 전이, 실패 링크, 상태에서 끝나는 키워드 중 가장 앞선 순번
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [None]
+
+        for order, (keyword, response) in enumerate(self.keywords_data.items()):
+            keyword_lower = keyword.lower()
+            self._responses.append(response)
+            self._exact.setdefault(keyword_lower, response)
+
+            if not keyword_lower:
+                # 빈 키워드는 어떤 텍스트에도 부분 일치 (기존 `in` 동작과 동일)
+                if self._empty_order is None:
+                    self._empty_order = order
+                continue
+            self._insert(keyword_lower, order)
+
+        self._build_failure_links()
+
+    def __len__(self):
+        return len(self._responses)
+
+    def _insert(self, keyword, order):
+        node = 0
+        for ch in keyword:
+            next_node = self._goto[node].get(ch)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][ch] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(None)
+            node = next_node
+        if self._best[node] is None or order < self._best[node]:
+            self._best[node] = order
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+
+                # 실패 링크를 따라 도달하는 출력까지 미리 합쳐 둠
+                inherited = self._best[self._fail[child]]
+                if inherited is not None and (self._best[child] is None or inherited < self._best[child]):
+                    self._best[child] = inherited
+
+    def find(self, text: str) -> Optional[str]:
+        """텍스트에 매칭되는 응답 반환 (완전 일치 우선, 그다음 시트 순서상 첫 부분 일치)"""
+        text_lower = text.lower()
+
+        response = self._exact.get(text_lower)
+        if response is not None:
+            return response
+
+        best = self._empty_order
+        node = 0
+        goto = self._goto
+        fail = self._fail
+        for ch in text_lower:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+
+            found = self._best[node]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break
+
+        if best is None:
+            return None
+        return self._responses[best]
+
+
+class KeywordMatcher:
+    """
+    키워드 시트 스냅샷을 보관하고 시트가 바뀌었을 때만 인덱스를 다시 만드는 매처
+
+    멘션 처리 시에는 메모리에 있는 인덱스로 매칭만 하며, 시트 조회는
+    백그라운드 스레드가 refresh_interval 초마다 수행합니다.
+    """
+
+    def __init__(self, loader: Callable[[], Dict[str, str]], refresh_interval=60):
+        self.loader = loader
+        self.refresh_interval = refresh_interval
+        self.logger = logging.getLogger(__name__)
+
+        self._index = None
+        self._signature = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _compute_signature(keywords_data):
+        payload = json.dumps(list(keywords_data.items()), ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def load(self, keywords_data: Dict[str, str]) -> KeywordIndex:
+        """키워드 데이터로 인덱스 교체 (내용이 같으면 기존 인덱스 유지)"""
+        signature = self._compute_signature(keywords_data)
+        with self._lock:
+            if self._index is not None and signature == self._signature:
+                return self._index
+
+            index = KeywordIndex(keywords_data)
+            self._index = index
+            self._signature = signature
+
+        self.logger.info(f"키워드 인덱스 갱신: {len(index)}개 키워드")
+        return index
+
+    def refresh(self) -> Optional[KeywordIndex]:
+        """시트에서 키워드를 다시 읽어 변경된 경우에만 인덱스 재생성"""
+        keywords_data = self.loader()
+
+        # 조회 실패 시 빈 결과가 오므로 기존 인덱스를 유지
+        if not keywords_data and self._index is not None:
+            return self._index
+
+        return self.load(keywords_data)
+
+    def find(self, text: str) -> Optional[str]:
+        """현재 인덱스로 응답 찾기 (아직 로드되지 않았다면 한 번 로드)"""
+        index = self._index
+        if index is None:
+            index = self.refresh()
+        return index.find(text)
+
+    def start(self):
+        """백그라운드 갱신 스레드 시작"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """백그라운드 갱신 스레드 중지"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop_event.wait(self.refresh_interval):
+            try:
+                with background_priority():
+                    self.refresh()
+            except Exception as e:
+                self.logger.error(f"키워드 인덱스 갱신 오류: {e}")
@@ -4,7 +4,8 @@ import logging
 import signal
 from datetime import datetime
 from dotenv import load_dotenv
-from google_sheets import GoogleSheetsManager
+from google_sheets import GoogleSheetsManager, non_inventory_sheet_names
+from sqlite_store import SQLiteInventoryManager
 from mastodon_bot import MastodonBot
 
 # 전역 변수
@@ -17,12 +18,11 @@ def signal_handler(signum, frame):
     logging.info(f"시그널 {signum} 수신. 봇을 안전하게 종료합니다...")
     running = False
     if bot_instance:
-        # 봇이 실행 중이라면 스트리밍 중지
+        # 대기 중인 멘션을 모두 처리한 뒤 종료 (스트리밍 중지는 sys.exit로 처리됨)
         try:
-            # 마스토돈 스트리밍 중지는 KeyboardInterrupt로 처리됨
-            pass
-        except:
-            pass
+            bot_instance.shutdown(timeout=int(os.getenv('SHUTDOWN_DRAIN_TIMEOUT', '30')))
+        except Exception as e:
+            logging.error(f"봇 종료 처리 중 오류: {e}")
     sys.exit(0)
 
 def setup_logging():
@@ -104,32 +104,102 @@ def main():
         acquisition_sheet = os.getenv('ACQUISITION_LOG_SHEET_NAME')
         gacha_sheet = os.getenv('GACHA_SHEET_NAME', '가챠')
         store_sheet = os.getenv('STORE_SHEET_NAME', '상점')
+        keywords_refresh_interval = int(os.getenv('KEYWORDS_REFRESH_INTERVAL', '60'))
+        gacha_refresh_interval = int(os.getenv('GACHA_REFRESH_INTERVAL', '60'))
+        mention_workers = int(os.getenv('MENTION_WORKERS', '4'))
+        mention_queue_size = int(os.getenv('MENTION_QUEUE_SIZE', '200'))
+        log_buffer_size = int(os.getenv('ACQUISITION_LOG_BUFFER_SIZE', '50'))
+        log_flush_interval = int(os.getenv('ACQUISITION_LOG_FLUSH_INTERVAL', '10'))
+        log_spool_path = os.getenv('ACQUISITION_LOG_SPOOL_PATH')
+        inventory_cache_ttl = int(os.getenv('INVENTORY_CACHE_TTL', '60'))
+        sheet_index_ttl = int(os.getenv('SHEET_INDEX_TTL', '600'))
+        storage_backend = os.getenv('STORAGE_BACKEND', 'sheets').lower()
+        ingest_mode = os.getenv('NOTIFICATION_INGEST_MODE', 'stream').lower()
+        currency_ledger_sheet = os.getenv('CURRENCY_LEDGER_SHEET') or None
+        if currency_ledger_sheet and storage_backend != 'sheets':
+            # sqlite 저장소는 갈레온을 소지품과 함께 로컬 DB에 보관하고 유저 시트로 복제
+            logger.warning("CURRENCY_LEDGER_SHEET는 STORAGE_BACKEND=sheets에서만 사용됩니다. 무시합니다.")
+            currency_ledger_sheet = None
+        read_quota = int(os.getenv('SHEETS_READ_QUOTA_PER_MINUTE', '60'))
+        write_quota = int(os.getenv('SHEETS_WRITE_QUOTA_PER_MINUTE', '60'))
+        sheets_max_retries = int(os.getenv('SHEETS_MAX_RETRIES', '5'))
+        sheets_http_timeout = int(os.getenv('SHEETS_HTTP_TIMEOUT', '30'))
+        discovery_cache_path = os.getenv('SHEETS_DISCOVERY_CACHE_PATH')
         
         logger.info("환경 변수 확인 완료")
         
         # 구글 시트 매니저 초기화
         logger.info("구글 스프레드시트 연결 중...")
-        google_sheets = GoogleSheetsManager(service_account_file, spreadsheet_id)
+        google_sheets = GoogleSheetsManager(
+            service_account_file,
+            spreadsheet_id,
+            cache_ttl=inventory_cache_ttl,
+            sheet_index_ttl=sheet_index_ttl,
+            read_quota_per_minute=read_quota,
+            write_quota_per_minute=write_quota,
+            max_retries=sheets_max_retries,
+            discovery_cache_path=discovery_cache_path,
+            http_timeout=sheets_http_timeout,
+            currency_ledger_sheet=currency_ledger_sheet,
+            non_inventory_sheets=non_inventory_sheet_names()
+        )
         
         # 획득 로그 시트 설정
         google_sheets.setup_acquisition_log_sheet(acquisition_sheet)
         logger.info("구글 스프레드시트 연결 완료")
         
+        # 소지품/갈레온 저장소 선택 (sheets: 구글 시트 직접 사용, sqlite: 로컬 DB + 시트 복제)
+        storage = google_sheets
+        if storage_backend == 'sqlite':
+            db_path = os.getenv('SQLITE_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'bot.db'))
+            storage = SQLiteInventoryManager(
+                google_sheets,
+                db_path,
+                replicate_interval=int(os.getenv('SQLITE_REPLICATE_INTERVAL', '5'))
+            )
+            storage.start()
+            logger.info(f"로컬 SQLite 저장소 사용: {db_path}")
+        elif storage_backend != 'sheets':
+            logger.error(f"알 수 없는 STORAGE_BACKEND 값입니다: {storage_backend} (sheets 또는 sqlite)")
+            return 1
+        
+        if ingest_mode not in ('stream', 'poll'):
+            logger.error(f"알 수 없는 NOTIFICATION_INGEST_MODE 값입니다: {ingest_mode} (stream 또는 poll)")
+            return 1
+        
         # 마스토돈 봇 초기화
         logger.info("마스토돈 봇 초기화 중...")
         bot_instance = MastodonBot(
             mastodon_token,
             mastodon_url,
-            google_sheets,
+            storage,
             keywords_sheet,
             acquisition_sheet,
             gacha_sheet,
-            store_sheet
+            store_sheet,
+            keywords_refresh_interval=keywords_refresh_interval,
+            gacha_refresh_interval=gacha_refresh_interval,
+            mention_workers=mention_workers,
+            mention_queue_size=mention_queue_size,
+            log_buffer_size=log_buffer_size,
+            log_flush_interval=log_flush_interval,
+            log_spool_path=log_spool_path,
+            rng_secret=os.getenv('RNG_SECRET'),
+            schedule_config_path=os.getenv('SCHEDULE_CONFIG_PATH'),
+            scheduler_state_path=os.getenv('SCHEDULER_STATE_PATH'),
+            attendance_index_path=os.getenv('ATTENDANCE_INDEX_PATH'),
+            processed_notifications_path=os.getenv('PROCESSED_NOTIFICATIONS_DB_PATH'),
+            processed_notifications_size=int(os.getenv('PROCESSED_NOTIFICATIONS_SIZE', '1000')),
+            outbox_path=os.getenv('OUTBOX_PATH'),
+            ingest_mode=ingest_mode,
+            poll_min_interval=float(os.getenv('NOTIFICATION_POLL_MIN_INTERVAL', '2')),
+            poll_max_interval=float(os.getenv('NOTIFICATION_POLL_MAX_INTERVAL', '60'))
         )
         
         # 초기 키워드 데이터 로드 테스트
         logger.info("키워드 데이터 로드 테스트...")
         keywords_data = google_sheets.get_keywords_data(keywords_sheet)
+        bot_instance.keyword_matcher.load(keywords_data)
         logger.info(f"로드된 키워드 수: {len(keywords_data)}")
         
         if keywords_data:
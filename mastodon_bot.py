@@ -1,30 +1,54 @@
 import os
+import queue
+import threading
 import time
 from mastodon import Mastodon, StreamListener
 import re
-import random
-from gacha_system import GachaSystem
+from datetime import datetime
+from acquisition_buffer import AcquisitionLogBuffer
+from attendance_index import AttendanceIndex
+from command_router import Command, CommandContext, CommandRouter
+import dice_engine
+from gacha_system import GACHA_COST, MULTI_PULL_COUNT, GachaSystem
+from keyword_matcher import KeywordIndex, KeywordMatcher
+from notification_dedup import ProcessedNotificationStore, id_sort_key
+from notification_poller import NotificationPoller, fetch_mentions_since
+from outbox import ReplyOutbox
+from rng_service import RNGService
 from scheduler import BotScheduler
+from worker_pool import KeyedWorkerPool
+
+# 스트림 재접속 대기 시간 (실패할 때마다 두 배, 일정 시간 이상 연결되면 초기화)
+STREAM_RECONNECT_MIN_DELAY = 5
+STREAM_RECONNECT_MAX_DELAY = 300
+STREAM_STABLE_SECONDS = 60
 
 class MastodonBotListener(StreamListener):
     def __init__(self, bot_instance):
         self.bot = bot_instance
-        # 처리된 상태 ID를 저장하는 세트 (중복 방지)
-        self.processed_status_ids = set()
+        # 처리된 상태 ID 저장소 (최근 N개 LRU, 재시작 후에도 유지)
+        self.processed_status_ids = bot_instance.processed_notifications
+        # 접속 후 첫 하트비트에서 놓친 알림 조회
+        self.catch_up_pending = True
+        # 놓친 알림 조회 기준 (접속 직전의 마지막 알림 ID)
+        self.catch_up_min_id = None
+        
+    def handle_heartbeat(self):
+        """스트림 하트비트 수신 시 호출 (접속 직후 한 번 놓친 알림 조회 시작)"""
+        if self.catch_up_pending:
+            self.catch_up_pending = False
+            self.bot.request_catch_up(self, self.catch_up_min_id)
         
     def on_notification(self, notification):
-        """알림 수신 시 호출"""
+        """알림 수신 시 호출 (유저 스트림의 홈 타임라인 업데이트는 on_update로 오며 무시)"""
         if notification['type'] == 'mention':
-            status_id = notification['status']['id']
-            # 이미 처리된 상태인지 확인
-            if status_id not in self.processed_status_ids:
-                self.processed_status_ids.add(status_id)
-                self.bot.handle_mention(notification['status'])
-                
-                # 메모리 관리: 1000개 이상이면 오래된 것 제거
-                if len(self.processed_status_ids) > 1000:
-                    # 세트를 리스트로 변환하여 최근 500개만 유지
-                    self.processed_status_ids = set(list(self.processed_status_ids)[-500:])
+            # 이미 처리했거나 처리 중인 상태는 건너뜀 (처리 완료는 핸들러가 끝난 뒤 기록)
+            if self.processed_status_ids.begin(notification['status']['id'], notification.get('id')):
+                self.bot.submit_mention(notification['status'])
+            return
+        
+        # 재접속 시 놓친 알림을 조회할 기준
+        self.processed_status_ids.mark_seen(notification.get('id'))
     
     # on_update 메서드 제거 - 중복 처리 방지
     # def on_update(self, status):
@@ -35,7 +59,12 @@ class MastodonBotListener(StreamListener):
 
 class MastodonBot:
     def __init__(self, access_token, api_base_url, google_sheets_manager, 
-                 keywords_sheet, acquisition_sheet, gacha_sheet=None, store_sheet=None):
+                 keywords_sheet, acquisition_sheet, gacha_sheet=None, store_sheet=None,
+                 keywords_refresh_interval=60, gacha_refresh_interval=60, mention_workers=4, mention_queue_size=200,
+                 log_buffer_size=50, log_flush_interval=10, log_spool_path=None, rng_secret=None,
+                 schedule_config_path=None, scheduler_state_path=None, attendance_index_path=None,
+                 processed_notifications_path=None, processed_notifications_size=1000, outbox_path=None,
+                 ingest_mode='stream', poll_min_interval=2, poll_max_interval=60):
         self.access_token = access_token
         self.api_base_url = api_base_url
         self.google_sheets = google_sheets_manager
@@ -44,18 +73,101 @@ class MastodonBot:
         self.gacha_sheet = gacha_sheet or "가챠"
         self.store_sheet = store_sheet or "상점"
         
-        # 가챠 시스템 초기화
-        self.gacha_system = GachaSystem()
+        # 획득 로그 버퍼 (N행 또는 T초마다 한 번에 기록, 미기록분은 스풀 파일에 보관)
+        if log_spool_path is None:
+            log_spool_path = os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), 'data', 'acquisition_spool.jsonl'
+            )
+        self.acquisition_buffer = AcquisitionLogBuffer(
+            self.google_sheets,
+            self.acquisition_sheet,
+            log_spool_path,
+            max_rows=log_buffer_size,
+            flush_interval=log_flush_interval
+        )
+        
+        # 가챠 시스템 초기화 (시트는 백그라운드에서 주기적으로 확인, 바뀐 경우에만 풀 재생성)
+        self.gacha_system = GachaSystem(
+            loader=lambda: self.google_sheets.get_gacha_config(self.gacha_sheet),
+            refresh_interval=gacha_refresh_interval
+        )
+        
+        # 주사위/가챠 난수 서비스 (비밀키가 있으면 상태 ID별로 재현 가능한 시드 사용)
+        self.rng_service = RNGService(rng_secret)
         
-        # 스케줄러 초기화
-        self.scheduler = BotScheduler(self)
+        # 키워드 매처 초기화 (시트가 바뀔 때만 인덱스 재생성)
+        self.keyword_matcher = KeywordMatcher(
+            lambda: self.google_sheets.get_keywords_data(self.keywords_sheet),
+            refresh_interval=keywords_refresh_interval
+        )
+        
+        # 명령어 라우터 초기화 (외부에서 command_router.register로 명령어 추가 가능)
+        self.command_router = CommandRouter()
+        self._register_default_commands()
+        
+        # 멘션 처리 작업 풀 (유저별 직렬 처리, 유저 간 병렬 처리)
+        self.mention_pool = KeyedWorkerPool(
+            self._process_mention,
+            workers=mention_workers,
+            max_pending=mention_queue_size,
+            name='mention-worker'
+        )
+        
+        # 스케줄러 초기화 (작업 목록은 schedule_config.json)
+        self.scheduler = BotScheduler(self, schedule_config_path, scheduler_state_path)
         
-        # 마스토돈 API 클라이언트 초기화
+        # 날짜별 출석 인덱스 (하루 한 번만 지급, 재시작 후에도 유지)
+        if attendance_index_path is None:
+            attendance_index_path = os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), 'data', 'attendance_index.json'
+            )
+        self.attendance_index = AttendanceIndex(attendance_index_path)
+        
+        # 처리한 멘션 ID 저장소 (스트림 재접속/재시작 후 중복 처리 방지)
+        if processed_notifications_path is None:
+            processed_notifications_path = os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), 'data', 'processed_notifications.db'
+            )
+        self.processed_notifications = ProcessedNotificationStore(
+            processed_notifications_path,
+            capacity=processed_notifications_size
+        )
+        self._stream_stop = threading.Event()
+        
+        # 재접속 후 놓친 알림 조회 요청 (스레드 하나가 차례로 처리, 시트 클라이언트도 하나만 생성)
+        self._catch_up_requests = queue.Queue()
+        self._catch_up_thread = None
+        
+        # 알림 수신 방식 (stream: 알림 스트리밍, poll: notifications API 주기 조회)
+        self.ingest_mode = ingest_mode
+        self.notification_poller = NotificationPoller(
+            self,
+            min_interval=poll_min_interval,
+            max_interval=poll_max_interval
+        )
+        
+        # 마스토돈 API 클라이언트 초기화 (레이트 리밋 초과 시 초기화 시각까지 대기)
         self.mastodon = Mastodon(
             access_token=access_token,
             api_base_url=api_base_url
         )
         
+        # 게시 대기열 전용 클라이언트
+        # (레이트 리밋 초과 시 잠들지 않고 예외를 던지도록 throw 모드 사용, 게시 대기열이
+        #  예외를 받아 초기화 시각까지 게시를 미룸. 레이트 리밋 헤더도 게시 요청 것만 남음)
+        self.outbox_mastodon = Mastodon(
+            access_token=access_token,
+            api_base_url=api_base_url,
+            ratelimit_method='throw'
+        )
+        
+        # 게시 대기열 (답글 우선, 레이트 리밋에 맞춰 게시, 미게시분은 재시작 후 이어서 게시)
+        if outbox_path is None:
+            outbox_path = os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), 'data', 'outbox.json'
+            )
+        self.outbox = ReplyOutbox(self.outbox_mastodon, outbox_path)
+        
         # 봇 계정 정보 가져오기
         self.bot_account = self.mastodon.me()
         self.bot_username = self.bot_account['username']
@@ -70,12 +182,85 @@ class MastodonBot:
                 return True
         return False
     
+    def _register_default_commands(self):
+        """기본 명령어 등록 (등록 순서가 보조 매칭 우선순위)"""
+        router = self.command_router
+        router.register(
+            'inventory',
+            lambda ctx: self.handle_inventory(ctx.user, ctx.status_id),
+            ('소지품', '인벤토리')
+        )
+        router.register(
+            'dice',
+            lambda ctx: self.handle_dice(ctx.user, ctx.status_id, ctx.lowered),
+            ('1d100',),
+            pattern=dice_engine.DICE_COMMAND_PATTERN
+        )
+        router.register(
+            'gacha_multi',
+            lambda ctx: self.handle_gacha(ctx.user, ctx.status_id, count=MULTI_PULL_COUNT),
+            (f'{MULTI_PULL_COUNT}연차',)
+        )
+        router.register(
+            'gacha',
+            lambda ctx: self.handle_gacha(
+                ctx.user, ctx.status_id,
+                count=MULTI_PULL_COUNT if f'{MULTI_PULL_COUNT}연차' in ctx.lowered else 1
+            ),
+            ('가챠',)
+        )
+        router.register(
+            'store',
+            lambda ctx: self.handle_store(ctx.user, ctx.status_id),
+            ('상점',)
+        )
+        router.register(
+            'purchase',
+            lambda ctx: self.handle_purchase(ctx.user, ctx.status_id, ctx.text),
+            ('구매',),
+            match=Command.MATCH_PREFIX
+        )
+        router.register(
+            'attendance',
+            lambda ctx: self.handle_attendance(ctx.user, ctx.status_id),
+            ('출석',)
+        )
+        router.register(
+            'transfer',
+            lambda ctx: self.handle_transfer(ctx.user, ctx.status_id, ctx.text, ctx.clean_content),
+            ('양도',),
+            match=Command.MATCH_PREFIX
+        )
+    
     def extract_keywords(self, text):
         """텍스트에서 키워드 추출"""
         # 멘션 제거
         cleaned_text = re.sub(r'@\w+', '', text).strip()
         return cleaned_text
     
+    def submit_mention(self, status):
+        """
+        멘션을 작업 풀에 등록 (워커가 없으면 바로 처리)
+        
+        processed_notifications.begin으로 처리 중 표시한 멘션을 넘겨야 합니다.
+        """
+        if self.mention_pool.workers <= 0:
+            self._process_mention(status)
+            return
+        
+        username = status['account']['username']
+        if not self.mention_pool.submit(username, status):
+            # 처리한 것으로 기록하지 않으므로 다음 재접속/조회 때 다시 받아 처리
+            self.processed_notifications.release(status['id'])
+            print(f"멘션 대기열 등록 실패 (종료 중이거나 대기열 초과) - @{username} (ID: {status['id']})")
+    
+    def _process_mention(self, status):
+        """멘션을 처리한 뒤 처리 완료 기록 (놓친 알림 조회 기준 ID도 여기서 앞당김)"""
+        try:
+            self.handle_mention(status)
+        finally:
+            self.processed_notifications.finish(status['id'])
+    
     def handle_mention(self, status):
         """멘션 처리"""
         try:
@@ -95,55 +280,18 @@ class MastodonBot:
             if not keywords_text:
                 return
             
-            # 소지품 키워드 확인
-            if '소지품' in keywords_text.lower() or '인벤토리' in keywords_text.lower():
-                self.handle_inventory(user, status_id)
-                return
-            
-            # 1d100 주사위 키워드 확인
-            if '1d100' in keywords_text.lower():
-                self.handle_dice(user, status_id)
-                return
-            
-            # 가챠 키워드 확인
-            if '가챠' in keywords_text.lower():
-                self.handle_gacha(user, status_id)
-                return
-            
-            # 상점 키워드 확인
-            if '상점' in keywords_text.lower():
-                self.handle_store(user, status_id)
-                return
-            
-            # 구매 키워드 확인
-            if keywords_text.lower().startswith('구매'):
-                self.handle_purchase(user, status_id, keywords_text)
-                return
-            
-            # 출석 키워드 확인
-            if '출석' in keywords_text.lower():
-                self.handle_attendance(user, status_id)
+            # 명령어 처리 (첫 단어 우선, 없으면 포함/접두사 매칭)
+            ctx = CommandContext(user, status_id, keywords_text, clean_content, status)
+            if self.command_router.dispatch(ctx):
                 return
             
-            # 양도 키워드 확인
-            if keywords_text.lower().startswith('양도'):
-                self.handle_transfer(user, status_id, keywords_text, clean_content)
-                return
-            
-            # 구글 시트에서 키워드 데이터 가져오기
-            keywords_data = self.google_sheets.get_keywords_data(self.keywords_sheet)
-            
-            # 키워드 매칭
-            response = self.find_matching_response(keywords_text, keywords_data)
+            # 키워드 매칭 (미리 컴파일된 인덱스 사용)
+            response = self.keyword_matcher.find(keywords_text)
             
             if response:
                 # 응답 전송
                 reply = f"@{user} {response}"
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
+                self._reply(reply, status_id)
                 
                 print(f"응답 전송: {reply}")
                 
@@ -155,20 +303,8 @@ class MastodonBot:
             print(f"멘션 처리 중 오류 발생: {e}")
     
     def find_matching_response(self, text, keywords_data):
-        """텍스트에서 매칭되는 키워드 찾기"""
-        text_lower = text.lower()
-        
-        # 완전 일치 우선
-        for keyword, response in keywords_data.items():
-            if keyword.lower() == text_lower:
-                return response
-        
-        # 부분 일치
-        for keyword, response in keywords_data.items():
-            if keyword.lower() in text_lower:
-                return response
-        
-        return None
+        """텍스트에서 매칭되는 키워드 찾기 (완전 일치 우선, 그다음 부분 일치)"""
+        return KeywordIndex(keywords_data).find(text)
     
     def handle_inventory(self, username, status_id):
         """소지품 조회 처리"""
@@ -202,11 +338,7 @@ class MastodonBot:
             
             # 응답 전송
             reply = f"@{username} {response}"
-            self.mastodon.status_post(
-                reply, 
-                in_reply_to_id=status_id,
-                visibility='public'
-            )
+            self._reply(reply, status_id)
             
             print(f"소지품 조회 - {username} ({sheet_username}): {len(inventory)}개 아이템")
             
@@ -215,116 +347,103 @@ class MastodonBot:
             # 오류 발생 시 사용자에게 알림
             reply = f"@{username} 소지품 조회 중 오류가 발생했습니다. 다시 시도해주세요."
             try:
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
+                self._reply(reply, status_id)
             except:
                 pass
     
-    def handle_dice(self, username, status_id):
-        """1d100 주사위 처리"""
+    def handle_dice(self, username, status_id, text=''):
+        """주사위 처리 (본문의 NdM+K, NdMkhK 등 모든 식, 식이 없으면 1d100)"""
         try:
-            # 1~100 사이의 랜덤 숫자 생성
-            result = random.randint(1, 100)
-            
-            # 응답 메시지 생성
-            response = f"{result}이 나왔습니다!"
+            rng = self.rng_service.for_event(status_id, 'dice')
+            try:
+                rolls = dice_engine.roll_text(text, rng.generator, default='1d100')
+                # 응답 메시지 생성 (멘션을 붙여도 글자 수 제한을 넘지 않도록)
+                response = dice_engine.format_results(
+                    rolls, dice_engine.MAX_REPLY_LENGTH - len(f"@{username} ")
+                )
+            except dice_engine.DiceError as e:
+                reply = f"@{username} {e}"
+                self._reply(reply, status_id)
+                return
             
             # 응답 전송
             reply = f"@{username} {response}"
-            self.mastodon.status_post(
-                reply, 
-                in_reply_to_id=status_id,
-                visibility='public'
-            )
+            self._reply(reply, status_id)
             
-            print(f"주사위 결과 - {username}: {result}")
+            results = ", ".join(f"{expression}={total}" for expression, total, _ in rolls)
+            print(f"주사위 결과 - {username}: {results} (status: {status_id}, seed: {rng.fingerprint})")
             
         except Exception as e:
             print(f"주사위 처리 중 오류 발생: {e}")
             # 오류 발생 시 사용자에게 알림
             reply = f"@{username} 주사위 처리 중 오류가 발생했습니다. 다시 시도해주세요."
             try:
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
+                self._reply(reply, status_id)
             except:
                 pass
 
-    def handle_gacha(self, username, status_id):
-        """가챠 처리"""
+    def handle_gacha(self, username, status_id, count=1):
+        """가챠 처리 (count회 추첨을 한 번의 갈레온 차감과 소지품 반영으로 처리)"""
         try:
             # 유저명을 그대로 사용
             sheet_username = username if username else 'Unknown'
+            cost = GACHA_COST * count
             
-            # 갈레온 체크 (가챠 비용: 3갈레온)
-            current_currency = self.google_sheets.get_user_currency(sheet_username)
-            if current_currency < 3:
-                reply = f"@{username} 갈레온이 부족합니다! 가챠 이용료는 3갈레온입니다. (보유: {current_currency} 갈레온)"
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
-                return
-            
-            # 가챠 아이템 데이터 가져오기
-            gacha_items = self.google_sheets.get_gacha_items(self.gacha_sheet)
-            
-            if not gacha_items:
+            # 가챠 풀 확인 (백그라운드 갱신된 풀 사용, 처음 한 번만 시트를 읽음)
+            if not self.gacha_system.current_pool():
                 reply = f"@{username} 가챠 아이템이 설정되지 않았습니다. 관리자에게 문의하세요."
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
+                self._reply(reply, status_id)
                 return
             
-            # 갈레온 차감
-            if not self.google_sheets.update_user_currency(sheet_username, 3, 'subtract'):
-                reply = f"@{username} 갈레온 차감 중 오류가 발생했습니다. 다시 시도해주세요."
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
-                return
-            
-            # 가챠 실행
-            selected_item, rarity = self.gacha_system.get_random_item(gacha_items)
-            response = self.gacha_system.format_gacha_result(selected_item, rarity)
+            # 갈레온 체크 (가챠 비용: 회당 3갈레온)
+            with self.google_sheets.begin_transaction(sheet_username) as txn:
+                current_currency = txn.get_quantity(sheet_username, '갈레온', default=0)
+                if current_currency < cost:
+                    reply = f"@{username} 갈레온이 부족합니다! 가챠 이용료는 {cost}갈레온입니다. (보유: {current_currency} 갈레온)"
+                    self._reply(reply, status_id)
+                    return
+                
+                # 가챠 실행 (천장 카운터 포함)
+                rng = self.rng_service.for_event(status_id, 'gacha')
+                results, pity = self.gacha_system.draw(count, sheet_username, rng.generator)
+                
+                # 갈레온 차감과 획득 아이템을 한 번에 반영
+                new_balance = current_currency - cost
+                txn.set_quantity(sheet_username, '갈레온', new_balance)
+                for selected_item, rarity in results:
+                    txn.add_item(sheet_username, f"{selected_item} ({rarity})")
+                
+                if not txn.commit():
+                    reply = f"@{username} 갈레온 차감 중 오류가 발생했습니다. 다시 시도해주세요."
+                    self._reply(reply, status_id)
+                    return
             
-            # 잔액 정보 추가
-            new_balance = current_currency - 3
-            response += f" (잔액: {new_balance} 갈레온)"
+            self.gacha_system.commit_pity(sheet_username, pity)
             
-            # 응답 전송
-            reply = f"@{username} {response}"
-            self.mastodon.status_post(
-                reply, 
-                in_reply_to_id=status_id,
-                visibility='public'
+            # 획득 로그 기록 (소지품은 위에서 이미 반영, N행을 한 번에 버퍼에 추가)
+            self.acquisition_buffer.extend(
+                username, [f"{selected_item} ({rarity})" for selected_item, rarity in results]
             )
             
-            print(f"가챠 결과 - {username}: {selected_item} ({rarity}) - 갈레온 3개 차감")
+            # 응답 전송 (연차는 등급별 요약 한 건으로)
+            if count == 1:
+                selected_item, rarity = results[0]
+                response = self.gacha_system.format_gacha_result(selected_item, rarity)
+                response += f" (잔액: {new_balance} 갈레온)"
+            else:
+                response = self.gacha_system.format_multi_result(results)
+                response += f"\n(갈레온 {cost}개 차감, 잔액: {new_balance} 갈레온)"
+            reply = f"@{username} {response}"
+            self._reply(reply, status_id)
             
-            # 획득 로그 기록 (모든 가챠 결과는 '획득' 포함)
-            self.log_acquisition(username, f"{selected_item} ({rarity})")
+            print(f"가챠 결과 - {username}: {results} - 갈레온 {cost}개 차감 (status: {status_id}, seed: {rng.fingerprint})")
             
         except Exception as e:
             print(f"가챠 처리 중 오류 발생: {e}")
             # 오류 발생 시 사용자에게 알림
             reply = f"@{username} 가챠 처리 중 오류가 발생했습니다. 다시 시도해주세요."
             try:
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
+                self._reply(reply, status_id)
             except:
                 pass
 
@@ -361,11 +480,7 @@ class MastodonBot:
             
             # 응답 전송
             reply = f"@{username} {response}"
-            self.mastodon.status_post(
-                reply, 
-                in_reply_to_id=status_id,
-                visibility='public'
-            )
+            self._reply(reply, status_id)
             
             print(f"상점 조회 - {username}: {len(store_items)}개 아이템")
             
@@ -373,11 +488,7 @@ class MastodonBot:
             print(f"상점 조회 중 오류 발생: {e}")
             reply = f"@{username} 상점 조회 중 오류가 발생했습니다. 다시 시도해주세요."
             try:
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
+                self._reply(reply, status_id)
             except:
                 pass
 
@@ -389,11 +500,7 @@ class MastodonBot:
             
             if not item_name:
                 reply = f"@{username} 구매할 아이템명을 입력해주세요. (예: 구매 검)"
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
+                self._reply(reply, status_id)
                 return
             
             # 유저명을 그대로 사용
@@ -410,11 +517,7 @@ class MastodonBot:
             
             if not target_item:
                 reply = f"@{username} '{item_name}' 아이템을 상점에서 찾을 수 없습니다."
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
+                self._reply(reply, status_id)
                 return
             
             # 구매 처리
@@ -430,11 +533,7 @@ class MastodonBot:
             
             # 응답 전송
             reply = f"@{username} {message}"
-            self.mastodon.status_post(
-                reply, 
-                in_reply_to_id=status_id,
-                visibility='public'
-            )
+            self._reply(reply, status_id)
             
             print(f"구매 시도 - {username} ({sheet_username}): {item_name} - {'성공' if success else '실패'}")
             
@@ -442,11 +541,7 @@ class MastodonBot:
             print(f"구매 처리 중 오류 발생: {e}")
             reply = f"@{username} 구매 처리 중 오류가 발생했습니다. 다시 시도해주세요."
             try:
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
+                self._reply(reply, status_id)
             except:
                 pass
 
@@ -456,47 +551,60 @@ class MastodonBot:
             # 출석 체크 활성화 상태 확인
             if not self.scheduler.is_attendance_active():
                 reply = f"@{username} 현재 출석 체크 시간이 아닙니다. 출석 체크는 매일 오전 7시부터 자정까지입니다."
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
+                self._reply(reply, status_id)
                 return
             
             # 유저명을 그대로 사용
             sheet_username = username if username else 'Unknown'
             
-            # 갈레온 6개 지급
-            if self.google_sheets.update_user_currency(sheet_username, 6, 'add'):
-                current_currency = self.google_sheets.get_user_currency(sheet_username)
+            # 오늘 이미 출석했으면 시트 조회 없이 바로 응답
+            day = self._attendance_day()
+            if not self.attendance_index.claim(sheet_username, day):
+                reply = f"@{username} 오늘은 이미 출석 체크를 했습니다. 내일 다시 출석해주세요!"
+                self._reply(reply, status_id)
+                return
+            
+            # 갈레온 6개 지급과 출석 기록을 한 번에 반영
+            try:
+                with self.google_sheets.begin_transaction(sheet_username) as txn:
+                    current_currency = txn.get_quantity(sheet_username, '갈레온', default=0) + 6
+                    txn.set_quantity(sheet_username, '갈레온', current_currency)
+                    txn.add_item(sheet_username, "출석 체크 (갈레온 6개)")
+                    granted = txn.commit()
+            except Exception:
+                self.attendance_index.release(sheet_username, day)
+                raise
+            
+            if granted:
                 reply = f"@{username} 출석 체크 완료! 갈레온 6개를 지급했습니다. (보유: {current_currency} 갈레온)"
                 
-                # 출석 로그 기록
-                self.log_acquisition(username, "출석 체크 (갈레온 6개)")
+                # 출석 로그 기록 (소지품은 위에서 이미 반영)
+                self.acquisition_buffer.append(username, "출석 체크 (갈레온 6개)")
                 
                 print(f"출석 체크 - {username} ({sheet_username}): 갈레온 6개 지급")
             else:
+                # 지급에 실패했으면 다시 출석할 수 있도록 등록 취소
+                self.attendance_index.release(sheet_username, day)
                 reply = f"@{username} 출석 체크 처리 중 오류가 발생했습니다. 다시 시도해주세요."
             
             # 응답 전송
-            self.mastodon.status_post(
-                reply, 
-                in_reply_to_id=status_id,
-                visibility='public'
-            )
+            self._reply(reply, status_id)
             
         except Exception as e:
             print(f"출석 체크 처리 중 오류 발생: {e}")
             reply = f"@{username} 출석 체크 처리 중 오류가 발생했습니다. 다시 시도해주세요."
             try:
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
+                self._reply(reply, status_id)
             except:
                 pass
 
+    def _attendance_day(self):
+        """출석 인덱스의 날짜 키 (출석 창이 열린 날짜 기준, 자정을 넘겨도 같은 날로 취급)"""
+        start_time = self.scheduler.get_attendance_start_time()
+        if start_time is None:
+            start_time = datetime.now(self.scheduler.korea_tz)
+        return start_time.strftime('%Y-%m-%d')
+
     def handle_transfer(self, username, status_id, keywords_text, original_content):
         """아이템 양도 처리"""
         try:
@@ -532,11 +640,7 @@ class MastodonBot:
             
             if not recipient_mention:
                 reply = f"@{username} 받는 사람을 @멘션으로 지정해주세요."
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
+                self._reply(reply, status_id)
                 return
             
             # 아이템명과 수량 추출
@@ -553,11 +657,7 @@ class MastodonBot:
             
             if not item_part:
                 reply = f"@{username} 양도할 아이템명을 입력해주세요."
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
+                self._reply(reply, status_id)
                 return
             
             # 수량 추출 (마지막 숫자가 수량)
@@ -576,11 +676,7 @@ class MastodonBot:
             
             if not item_name:
                 reply = f"@{username} 양도할 아이템명을 정확히 입력해주세요."
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
+                self._reply(reply, status_id)
                 return
             
             # 유저명을 그대로 사용
@@ -590,21 +686,13 @@ class MastodonBot:
             # 본인에게 양도 금지
             if sender_sheet == recipient_sheet:
                 reply = f"@{username} 본인에게는 아이템을 양도할 수 없습니다."
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
+                self._reply(reply, status_id)
                 return
             
             # 갈레온 양도 금지
             if item_name.lower() == '갈레온':
                 reply = f"@{username} 갈레온은 양도할 수 없습니다."
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
+                self._reply(reply, status_id)
                 return
             
             # 양도 실행
@@ -627,21 +715,13 @@ class MastodonBot:
                 reply = f"@{username} ❌ {message}"
             
             # 응답 전송
-            self.mastodon.status_post(
-                reply, 
-                in_reply_to_id=status_id,
-                visibility='public'
-            )
+            self._reply(reply, status_id)
             
         except Exception as e:
             print(f"아이템 양도 처리 중 오류 발생: {e}")
             reply = f"@{username} 아이템 양도 처리 중 오류가 발생했습니다. 다시 시도해주세요."
             try:
-                self.mastodon.status_post(
-                    reply, 
-                    in_reply_to_id=status_id,
-                    visibility='public'
-                )
+                self._reply(reply, status_id)
             except:
                 pass
 
@@ -653,12 +733,8 @@ class MastodonBot:
             if item.endswith('!'):
                 item = item[:-1].strip()
             
-            # acquisition_log 시트에 기록
-            self.google_sheets.log_acquisition(
-                self.acquisition_sheet, 
-                username, 
-                item
-            )
+            # acquisition_log 시트에 기록 (버퍼에 모았다가 한 번에 기록)
+            self.acquisition_buffer.append(username, item)
             
             # 유저 소지품 시트에도 직접 추가
             sheet_username = username if username else 'Unknown'
@@ -669,31 +745,151 @@ class MastodonBot:
             print(f"획득 로그 기록 중 오류: {e}")
     
     def start_streaming(self):
-        """스트리밍 시작"""
+        """스트리밍 시작 (유저 스트림의 알림만 처리, 끊기면 대기 후 재접속하고 놓친 알림 조회)"""
+        print("마스토돈 스트리밍 시작...")
+        
+        # 스케줄러 시작
+        self.scheduler.start()
+        
+        # 키워드 인덱스 백그라운드 갱신 시작
+        self.keyword_matcher.start()
+        
+        # 가챠 풀 백그라운드 갱신 시작
+        self.gacha_system.start()
+        
+        # 획득 로그 버퍼 기록 스레드 시작
+        self.acquisition_buffer.start()
+        
+        # 게시 대기열 스레드 시작
+        self.outbox.start()
+        
+        # 멘션 처리 워커 시작
+        if self.mention_pool.workers > 0:
+            self.mention_pool.start()
+        
+        if self.ingest_mode == 'poll':
+            # 스트리밍이 막힌 인스턴스용: notifications API 주기 조회
+            try:
+                self.notification_poller.run(self._stream_stop)
+            finally:
+                self.scheduler.stop()
+                self.keyword_matcher.stop()
+                self.gacha_system.stop()
+            return
+        
+        listener = MastodonBotListener(self)
+        self._catch_up_thread = threading.Thread(
+            target=self._run_catch_up,
+            name='notification-catch-up',
+            daemon=True
+        )
+        self._catch_up_thread.start()
+        delay = STREAM_RECONNECT_MIN_DELAY
+        
         try:
-            print("마스토돈 스트리밍 시작...")
-            
-            # 스케줄러 시작
-            self.scheduler.start()
-            
-            listener = MastodonBotListener(self)
-            
-            # 사용자 스트림 시작 (멘션 및 알림 수신)
-            self.mastodon.stream_user(listener, run_async=False)
-            
-        except Exception as e:
-            print(f"스트리밍 중 오류 발생: {e}")
-            time.sleep(5)
-            self.start_streaming()  # 재시작
+            while not self._stream_stop.is_set():
+                connected_at = time.monotonic()
+                # 첫 하트비트 전에 도착한 실시간 알림이 기준 ID를 앞당기지 않도록 접속 전에 기록
+                listener.catch_up_min_id = self.processed_notifications.last_notification_id
+                listener.catch_up_pending = True
+                try:
+                    # 유저 스트림 구독 (알림은 on_notification으로 처리, 끊기면 예외로 빠져나옴)
+                    self.mastodon.stream_user(listener, run_async=False)
+                except Exception as e:
+                    print(f"스트리밍 중 오류 발생: {e}")
+                
+                if self._stream_stop.is_set():
+                    break
+                
+                # 충분히 오래 연결되어 있었으면 대기 시간 초기화
+                if time.monotonic() - connected_at >= STREAM_STABLE_SECONDS:
+                    delay = STREAM_RECONNECT_MIN_DELAY
+                print(f"{delay}초 후 스트림 재접속...")
+                self._stream_stop.wait(delay)
+                delay = min(delay * 2, STREAM_RECONNECT_MAX_DELAY)
         finally:
             # 스케줄러 중지
             if hasattr(self, 'scheduler'):
                 self.scheduler.stop()
+            self.keyword_matcher.stop()
+            self.gacha_system.stop()
+    
+    def request_catch_up(self, listener, min_id=None):
+        """놓친 알림 조회를 조회 스레드에 요청 (스트림 수신 스레드를 막지 않음)"""
+        self._catch_up_requests.put((listener, min_id))
+    
+    def _run_catch_up(self):
+        """놓친 알림 조회 스레드 (밀린 요청은 가장 이른 기준 ID로 한 번만 조회)"""
+        while not self._stream_stop.is_set():
+            try:
+                listener, min_id = self._catch_up_requests.get(timeout=1)
+            except queue.Empty:
+                continue
+            
+            while True:
+                try:
+                    _, other_min_id = self._catch_up_requests.get_nowait()
+                except queue.Empty:
+                    break
+                if min_id is None or other_min_id is None:
+                    min_id = None
+                else:
+                    min_id = min(min_id, other_min_id, key=id_sort_key)
+            
+            self.catch_up_notifications(listener, min_id)
+    
+    def catch_up_notifications(self, listener, min_id=None):
+        """
+        min_id(없으면 마지막으로 받은 알림) 이후의 멘션을 오래된 순으로 조회해 처리
+        
+        스트림과 겹치는 알림은 처리한 상태 ID 저장소에서 걸러집니다.
+        """
+        if min_id is None:
+            min_id = self.processed_notifications.last_notification_id
+        if min_id is None:
+            return 0
+        
+        caught_up = 0
+        try:
+            for notification in fetch_mentions_since(self.mastodon, min_id):
+                listener.on_notification(notification)
+                caught_up += 1
+        except Exception as e:
+            print(f"놓친 알림 조회 중 오류: {e}")
+        
+        if caught_up:
+            print(f"놓친 알림 {caught_up}건 조회 완료")
+        return caught_up
+    
+    def shutdown(self, timeout=30):
+        """남은 멘션을 처리한 뒤 백그라운드 작업 중지"""
+        print("봇 종료 중: 남은 멘션 처리 대기...")
+        self._stream_stop.set()
+        self.mention_pool.shutdown(drain=True, timeout=timeout)
+        print(f"멘션 작업 풀 지표: {self.mention_pool.metrics()}")
+        self.scheduler.stop()
+        self.keyword_matcher.stop()
+        self.gacha_system.stop()
+        self.outbox.close(timeout=timeout)
+        print(f"게시 대기열 지표: {self.outbox.metrics()}")
+        if self.ingest_mode == 'poll':
+            print(f"알림 조회 지표: {self.notification_poller.metrics()}")
+        self.acquisition_buffer.close()
+        self.processed_notifications.close()
+        self.google_sheets.close()
+        print(f"시트 API 요청 지표: {self.google_sheets.api_metrics()}")
+        print(f"날짜별 출석 수: {self.attendance_index.daily_counts()}")
     
     def post_status(self, message, visibility='public'):
-        """상태 게시"""
+        """상태 게시 (게시 대기열에 공지 우선순위로 등록, 등록 성공 여부 반환)"""
         try:
-            self.mastodon.status_post(message, visibility=visibility)
-            print(f"상태 게시: {message}")
+            self.outbox.post(message, visibility=visibility)
+            print(f"상태 게시 등록: {message}")
+            return True
         except Exception as e:
-            print(f"상태 게시 중 오류: {e}")
\ No newline at end of file
+            print(f"상태 게시 중 오류: {e}")
+            return False
+    
+    def _reply(self, reply, status_id, visibility='public'):
+        """멘션에 대한 답글을 게시 대기열에 등록 (같은 멘션에는 한 번만 답글)"""
+        self.outbox.post(reply, in_reply_to_id=status_id, visibility=visibility, dedupe_key=f"reply-{status_id}")
@@ -0,0 +1,237 @@
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS processed_statuses (
+    status_id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_processed_seq ON processed_statuses(seq);
+
+CREATE TABLE IF NOT EXISTS stream_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def id_sort_key(value):
+    """마스토돈 ID 비교용 키 (숫자 문자열은 숫자로 비교)"""
+    value = str(value)
+    return (0, int(value), value) if value.isdigit() else (1, 0, value)
+
+
+class ProcessedNotificationStore:
+    """
+    처리한 멘션 상태 ID를 최근 capacity개까지 기억하는 LRU 중복 방지 저장소
+
+    메모리에서는 OrderedDict로 삽입/확인/가장 오래된 항목 제거를 모두 O(1)로 처리하고,
+    db_path가 있으면 같은 내용을 SQLite에 기록해 재시작 후에도 이어서 사용합니다.
+    마지막 알림 ID도 함께 저장해 재접속/재시작 시 놓친 알림을 다시 조회할 기준으로 씁니다.
+
+    멘션은 begin으로 처리 중 표시만 해 두고 핸들러가 끝난 뒤 finish로 처리 완료를
+    기록합니다. 마지막 알림 ID는 아직 끝나지 않은 멘션보다 앞선 알림까지만 앞당기므로,
+    처리 도중 종료되거나 대기열에서 버려진 멘션은 다음 조회 때 다시 받아 처리합니다.
+    """
+
+    def __init__(self, db_path=None, capacity=1000):
+        self.db_path = db_path
+        self.capacity = capacity
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._ids = OrderedDict()  # status_id -> seq (오래된 순)
+        self._seq = 0
+        self._last_notification_id = None
+        self._in_flight = {}  # 처리 중인 status_id -> 알림 ID
+        self._blocked = {}  # 작업 풀에 넣지 못한 status_id -> 알림 ID (다시 받을 때까지 기준 ID 고정)
+        self._finished = []  # 끝났지만 아직 마지막 알림 ID에 반영하지 못한 알림 ID
+        self._conn = None
+
+        if db_path:
+            self._open()
+
+    def _open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        self._conn = conn
+
+        rows = conn.execute(
+            'SELECT status_id, seq FROM processed_statuses ORDER BY seq DESC LIMIT ?',
+            (self.capacity,)
+        ).fetchall()
+        for status_id, seq in reversed(rows):
+            self._ids[status_id] = seq
+        if rows:
+            self._seq = rows[0][1]
+            # 용량을 줄여 재시작한 경우 남은 오래된 행 정리
+            conn.execute('DELETE FROM processed_statuses WHERE seq < ?', (rows[-1][1],))
+
+        row = conn.execute(
+            "SELECT value FROM stream_state WHERE key = 'last_notification_id'"
+        ).fetchone()
+        if row:
+            self._last_notification_id = row[0]
+
+    def __contains__(self, status_id):
+        with self._lock:
+            return str(status_id) in self._ids
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ids)
+
+    def add(self, status_id):
+        """
+        처리한 상태 ID 등록
+
+        Returns:
+            처음 보는 ID면 True, 이미 처리한 ID면 False (최근 사용으로 갱신)
+        """
+        with self._lock:
+            return self._add(str(status_id))
+
+    def _add(self, status_id):
+        """처리한 상태 ID 등록 (잠금 안에서 호출)"""
+        self._seq += 1
+        is_new = status_id not in self._ids
+        if not is_new:
+            self._ids.move_to_end(status_id)
+        self._ids[status_id] = self._seq
+
+        evicted = []
+        while len(self._ids) > self.capacity:
+            evicted.append(self._ids.popitem(last=False)[0])
+
+        if self._conn is not None:
+            self._persist_add(status_id, evicted)
+        return is_new
+
+    def _persist_add(self, status_id, evicted):
+        try:
+            with self._conn:
+                self._conn.execute('BEGIN')
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO processed_statuses (status_id, seq) VALUES (?, ?)',
+                    (status_id, self._seq)
+                )
+                if evicted:
+                    self._conn.executemany(
+                        'DELETE FROM processed_statuses WHERE status_id = ?',
+                        [(evicted_id,) for evicted_id in evicted]
+                    )
+        except sqlite3.Error as e:
+            # 기록에 실패해도 메모리 중복 방지는 계속 동작
+            self.logger.error(f"처리한 알림 ID 기록 실패: {e}")
+
+    def begin(self, status_id, notification_id=None):
+        """
+        멘션 처리 시작 표시
+
+        Returns:
+            처리해야 하면 True, 이미 처리했거나 처리 중이면 False
+        """
+        status_id = str(status_id)
+        notification_id = None if notification_id is None else str(notification_id)
+        with self._lock:
+            if status_id in self._ids or status_id in self._in_flight:
+                if notification_id is not None:
+                    self._finished.append(notification_id)
+                    self._advance()
+                return False
+            self._blocked.pop(status_id, None)
+            self._in_flight[status_id] = notification_id
+            return True
+
+    def finish(self, status_id):
+        """멘션 처리 완료 기록 (처리한 ID로 등록하고 마지막 알림 ID를 앞당김)"""
+        status_id = str(status_id)
+        with self._lock:
+            notification_id = self._in_flight.pop(status_id, None)
+            self._add(status_id)
+            if notification_id is not None:
+                self._finished.append(notification_id)
+            self._advance()
+
+    def release(self, status_id):
+        """
+        처리하지 못한 멘션 표시 (작업 풀에 넣지 못한 경우)
+
+        처리한 ID로 등록하지 않고, 다시 받아 처리할 때까지 마지막 알림 ID를 그 앞에 둡니다.
+        """
+        status_id = str(status_id)
+        with self._lock:
+            if status_id in self._in_flight:
+                self._blocked[status_id] = self._in_flight.pop(status_id)
+            self._advance()
+
+    def mark_seen(self, notification_id):
+        """멘션이 아닌 알림 등 처리할 것이 없는 알림 기록"""
+        if notification_id is None:
+            return
+        with self._lock:
+            self._finished.append(str(notification_id))
+            self._advance()
+
+    def _advance(self):
+        """처리 중인 멘션보다 앞선, 끝난 알림 중 가장 최근 ID로 마지막 알림 ID 갱신 (잠금 안에서 호출)"""
+        waiting = [
+            notification_id for notification_id in list(self._in_flight.values()) + list(self._blocked.values())
+            if notification_id is not None
+        ]
+        limit = min((id_sort_key(notification_id) for notification_id in waiting), default=None)
+
+        ready = []
+        remaining = []
+        for notification_id in self._finished:
+            if limit is None or id_sort_key(notification_id) < limit:
+                ready.append(notification_id)
+            else:
+                remaining.append(notification_id)
+        self._finished = remaining
+        if ready:
+            self._update_last_notification_id(max(ready, key=id_sort_key))
+
+    def pending_count(self):
+        """처리 중이거나 작업 풀에 넣지 못한 멘션 수"""
+        with self._lock:
+            return len(self._in_flight) + len(self._blocked)
+
+    @property
+    def last_notification_id(self):
+        """마지막으로 받은 알림 ID (없으면 None)"""
+        with self._lock:
+            return self._last_notification_id
+
+    def update_last_notification_id(self, notification_id):
+        """마지막 알림 ID 갱신 (기존 값보다 새로운 ID일 때만)"""
+        if notification_id is None:
+            return
+        with self._lock:
+            self._update_last_notification_id(str(notification_id))
+
+    def _update_last_notification_id(self, notification_id):
+        current = self._last_notification_id
+        if current is not None and id_sort_key(notification_id) <= id_sort_key(current):
+            return
+        self._last_notification_id = notification_id
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stream_state (key, value) VALUES ('last_notification_id', ?)",
+                (notification_id,)
+            )
+        except sqlite3.Error as e:
+            self.logger.error(f"마지막 알림 ID 기록 실패: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
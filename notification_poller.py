@@ -0,0 +1,144 @@
+import logging
+
+from notification_dedup import id_sort_key
+
+# notifications 조회 한 페이지 크기 (마스토돈 최대 80)와 한 번에 따라갈 최대 페이지 수
+PAGE_LIMIT = 40
+MAX_PAGES = 50
+
+
+def fetch_mentions_since(mastodon, min_id, page_limit=PAGE_LIMIT, max_pages=MAX_PAGES):
+    """
+    min_id 이후의 멘션 알림을 오래된 순으로 모두 조회
+
+    since_id는 가장 최근 페이지를 돌려주므로 밀린 알림이 한 페이지를 넘으면 중간이 빠집니다.
+    min_id로 바로 다음 페이지부터 앞으로 넘겨 가며 읽습니다. 서버에서 멘션만 골라 받으므로
+    다른 종류의 알림은 오지 않고, 마지막 알림 ID도 멘션을 기준으로만 앞당겨집니다.
+    """
+    notifications = []
+    for _ in range(max_pages):
+        page = mastodon.notifications(min_id=min_id, limit=page_limit, types=['mention'])
+        if not page:
+            break
+        page = sorted(page, key=lambda notification: id_sort_key(notification['id']))
+        notifications.extend(page)
+        min_id = page[-1]['id']
+        if len(page) < page_limit:
+            break
+    return notifications
+
+
+class NotificationPoller:
+    """
+    스트리밍 대신 notifications API를 주기적으로 조회하는 수신기
+
+    스트리밍 엔드포인트가 막힌 인스턴스용입니다. 새 멘션이 있으면 min_interval로
+    바로 다시 조회하고, 없으면 조회 간격을 두 배씩 늘려 max_interval까지 쉽니다.
+    조회한 멘션은 한 묶음으로 처리해, 관련 유저 소지품을 한 번에 미리 읽은 뒤
+    작업 풀에 넘기고 마스토돈의 알림 읽음 위치도 한 번만 갱신합니다.
+    """
+
+    def __init__(self, mastodon_bot, min_interval=2, max_interval=60):
+        self.bot = mastodon_bot
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.logger = logging.getLogger(__name__)
+
+        self.polls = 0
+        self.mentions = 0
+        self.errors = 0
+
+    @property
+    def mastodon(self):
+        return self.bot.mastodon
+
+    @property
+    def store(self):
+        return self.bot.processed_notifications
+
+    def _initial_min_id(self):
+        """처음 실행할 때 시작 위치 (서버의 알림 읽음 위치, 없으면 현재 가장 최근 알림)"""
+        try:
+            markers = self.mastodon.markers_get(['notifications'])
+            marker = markers.get('notifications') if markers else None
+            if marker and marker.get('last_read_id'):
+                return str(marker['last_read_id'])
+        except Exception as e:
+            self.logger.warning(f"알림 읽음 위치 조회 실패: {e}")
+
+        latest = self.mastodon.notifications(limit=1)
+        return str(latest[0]['id']) if latest else None
+
+    def poll_once(self):
+        """한 번 조회해 새 멘션을 처리하고 처리한 개수 반환"""
+        self.polls += 1
+        min_id = self.store.last_notification_id
+        if min_id is None:
+            min_id = self._initial_min_id()
+            if min_id is None:
+                return 0
+            self.store.update_last_notification_id(min_id)
+
+        notifications = fetch_mentions_since(self.mastodon, min_id)
+        if not notifications:
+            return 0
+        return self.process_batch(notifications)
+
+    def process_batch(self, notifications):
+        """조회한 멘션 묶음 처리 (오래된 순으로 정렬되어 있어야 함)"""
+        statuses = []
+        for notification in notifications:
+            if not notification.get('status'):
+                # 원본 게시물이 삭제된 멘션은 처리할 것이 없으므로 기준 ID만 앞당김
+                self.store.mark_seen(notification.get('id'))
+                continue
+            # 처리 완료와 다음 조회 기준 ID는 핸들러가 끝난 뒤 기록됨
+            if self.store.begin(notification['status']['id'], notification.get('id')):
+                statuses.append(notification['status'])
+
+        if statuses:
+            # 핸들러가 시트를 유저마다 따로 읽지 않도록 한 번에 미리 읽어 캐시에 둠
+            usernames = {status['account']['username'] for status in statuses}
+            try:
+                self.bot.google_sheets.prefetch_inventories(usernames)
+            except Exception as e:
+                self.logger.warning(f"소지품 미리 읽기 실패 (핸들러에서 개별 조회): {e}")
+
+            for status in statuses:
+                self.bot.submit_mention(status)
+
+        last_id = notifications[-1]['id']
+        try:
+            # 처리한 알림까지 읽음 위치를 한 번에 갱신
+            self.mastodon.markers_set(['notifications'], [last_id])
+        except Exception as e:
+            self.logger.warning(f"알림 읽음 위치 갱신 실패: {e}")
+
+        self.mentions += len(statuses)
+        return len(statuses)
+
+    def run(self, stop_event):
+        """stop_event가 설정될 때까지 조회 반복"""
+        self.logger.info(f"알림 조회 모드 시작 (간격 {self.min_interval}~{self.max_interval}초)")
+        while not stop_event.is_set():
+            try:
+                processed = self.poll_once()
+            except Exception as e:
+                self.errors += 1
+                self.logger.error(f"알림 조회 중 오류: {e}")
+                processed = 0
+
+            if processed:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * 2, self.max_interval)
+            stop_event.wait(self.interval)
+
+    def metrics(self):
+        return {
+            'polls': self.polls,
+            'mentions': self.mentions,
+            'errors': self.errors,
+            'interval': self.interval,
+        }
@@ -0,0 +1,305 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from mastodon.errors import MastodonAPIError, MastodonRatelimitError, MastodonServerError
+
+from state_store import JSONStateStore
+
+# 숫자가 작을수록 먼저 게시
+PRIORITY_REPLY = 0
+PRIORITY_ANNOUNCEMENT = 10
+
+
+def _status_code(error):
+    """Mastodon.py API 오류의 HTTP 상태 코드 (args: 메시지, 상태 코드, 사유, 본문)"""
+    if len(error.args) > 1 and isinstance(error.args[1], int):
+        return error.args[1]
+    return None
+
+
+class ReplyOutbox:
+    """
+    마스토돈 게시 대기열
+
+    핸들러는 post로 게시물을 등록만 하고, 전용 스레드가 우선순위(답글 먼저,
+    정기 공지 나중) 순으로 게시합니다. 응답의 레이트 리밋 헤더를 보고 남은 횟수가
+    적으면 초기화 시각까지 간격을 벌려 게시하며, 실패하면 항목 ID를 idempotency
+    키로 다시 시도하므로 서버에 중복 게시되지 않습니다. 아직 게시하지 못한 항목은
+    상태 파일에 보관되어 재시작 후 이어서 게시합니다.
+
+    mastodon에는 게시 대기열 전용 클라이언트(ratelimit_method='throw')를 넘겨야
+    합니다. 레이트 리밋 헤더를 클라이언트 속성에서 읽으므로 다른 스레드의 요청이
+    같은 클라이언트를 쓰면 다른 엔드포인트의 헤더로 간격을 계산하게 됩니다.
+    """
+
+    def __init__(self, mastodon, spool_path, reserve=5, pace_threshold=0.5,
+                 max_attempts=5, base_delay=2.0, max_delay=300.0):
+        self.mastodon = mastodon
+        self.store = JSONStateStore(spool_path)
+        self.reserve = reserve
+        self.pace_threshold = pace_threshold
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.logger = logging.getLogger(__name__)
+
+        self._condition = threading.Condition()
+        self._heap = []  # 게시 가능: (우선순위, 등록 시각, 순번, 항목 ID)
+        self._delayed = []  # 재시도 대기: (재시도 시각, 순번, 항목 ID)
+        self._entries = {}  # 항목 ID -> 항목
+        self._keys = {}  # 중복 방지 키 -> 항목 ID (대기 중인 것만)
+        self._seq = itertools.count()
+        self._not_before = 0.0  # 다음 게시 가능 시각 (time.time 기준)
+        self._rate_limit_streak = 0  # 연속 레이트 리밋 초과 횟수
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.posted = 0
+        self.duplicates = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.dropped = 0
+
+        self._load()
+
+    def _load(self):
+        """이전 실행에서 게시하지 못한 항목 복구"""
+        for entry in self.store.get('pending', []):
+            self._push(entry)
+        if self._entries:
+            self.logger.info(f"게시하지 못한 게시물 {len(self._entries)}건 복구")
+
+    def _push(self, entry):
+        self._entries[entry['id']] = entry
+        self._keys[entry['key']] = entry['id']
+        if entry['not_before'] > time.time():
+            heapq.heappush(self._delayed, (entry['not_before'], next(self._seq), entry['id']))
+        else:
+            self._push_ready(entry)
+
+    def _push_ready(self, entry):
+        # 재시도하는 항목도 등록 순서를 유지하도록 등록 시각으로 정렬
+        heapq.heappush(self._heap, (entry['priority'], entry['queued_at'], next(self._seq), entry['id']))
+
+    def _save(self):
+        """대기 중인 항목을 상태 파일에 기록 (잠금 안에서 호출)"""
+        self.store.update(pending=list(self._entries.values()))
+
+    def post(self, message, in_reply_to_id=None, visibility='public', priority=None, dedupe_key=None):
+        """
+        게시물 등록
+
+        서버에 보내는 idempotency 키는 항목마다 새로 만든 ID(상태 파일에 함께 보관)이므로
+        같은 게시물의 재시도만 서버에서 중복으로 걸러집니다. dedupe_key를 주면 같은
+        키의 게시물이 대기 중일 때 이 게시물을 버립니다 (게시된 뒤에는 다시 등록 가능).
+
+        Returns:
+            등록했으면 True, 같은 dedupe_key의 게시물이 이미 대기 중이면 False
+        """
+        if priority is None:
+            priority = PRIORITY_REPLY if in_reply_to_id is not None else PRIORITY_ANNOUNCEMENT
+
+        with self._condition:
+            if dedupe_key is not None and dedupe_key in self._keys:
+                self.duplicates += 1
+                return False
+            entry_id = uuid.uuid4().hex
+            entry = {
+                'id': entry_id,
+                'key': dedupe_key or entry_id,
+                'message': message,
+                'in_reply_to_id': in_reply_to_id,
+                'visibility': visibility,
+                'priority': priority,
+                'attempts': 0,
+                'not_before': 0.0,
+                'queued_at': time.time(),
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+            }
+            self._push(entry)
+            self._save()
+            self._condition.notify()
+        return True
+
+    def pending_count(self):
+        with self._condition:
+            return len(self._entries)
+
+    def metrics(self):
+        with self._condition:
+            return {
+                'pending': len(self._entries),
+                'posted': self.posted,
+                'duplicates': self.duplicates,
+                'retries': self.retries,
+                'rate_limited': self.rate_limited,
+                'dropped': self.dropped,
+            }
+
+    def start(self):
+        """게시 스레드 시작"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='outbox', daemon=True)
+            self._thread.start()
+
+    def close(self, timeout=30):
+        """대기 중인 게시물을 timeout초 동안 게시한 뒤 스레드 중지 (남은 항목은 상태 파일에 보관)"""
+        deadline = time.monotonic() + timeout
+        while self.pending_count() and time.monotonic() < deadline:
+            if self._thread is None or not self._thread.is_alive():
+                break
+            time.sleep(0.2)
+
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+        remaining = self.pending_count()
+        if remaining:
+            self.logger.warning(f"게시물 {remaining}건은 상태 파일에 남겨 두고 다음 실행 시 게시합니다.")
+
+    def _next_entry(self):
+        """게시할 차례가 된 항목 (없으면 중지될 때까지 대기, 중지되면 None)"""
+        with self._condition:
+            while not self._stop_event.is_set():
+                now = time.time()
+                while self._delayed and self._delayed[0][0] <= now:
+                    self._push_ready(self._entries[heapq.heappop(self._delayed)[2]])
+
+                wait = None
+                if self._heap:
+                    if self._not_before <= now:
+                        return self._entries[heapq.heappop(self._heap)[3]]
+                    wait = self._not_before - now
+                if self._delayed:
+                    delayed_wait = self._delayed[0][0] - now
+                    wait = delayed_wait if wait is None else min(wait, delayed_wait)
+                self._condition.wait(wait)
+        return None
+
+    def _finish(self, entry, delivered):
+        with self._condition:
+            self._entries.pop(entry['id'], None)
+            self._keys.pop(entry['key'], None)
+            if delivered:
+                self.posted += 1
+            else:
+                self.dropped += 1
+            self._save()
+
+    def _requeue(self, entry, delay):
+        with self._condition:
+            entry['not_before'] = time.time() + delay
+            self._push(entry)
+            self._save()
+            self._condition.notify()
+
+    def _ratelimit_headers(self):
+        """방금 보낸 게시 요청의 레이트 리밋 헤더 (남은 횟수, 초기화 시각, 한도)"""
+        return (
+            getattr(self.mastodon, 'ratelimit_remaining', None),
+            getattr(self.mastodon, 'ratelimit_reset', None),
+            getattr(self.mastodon, 'ratelimit_limit', None),
+        )
+
+    def _update_pacing(self, headers):
+        """게시 응답의 레이트 리밋 헤더로 다음 게시 가능 시각 계산"""
+        remaining, reset, limit = headers
+        if remaining is None or reset is None or not limit:
+            return
+
+        window = max(0.0, reset - time.time())
+        if remaining <= self.reserve:
+            delay = window
+        elif remaining < limit * self.pace_threshold:
+            # 남은 횟수를 초기화 시각까지 고르게 나눠 사용
+            delay = window / (remaining - self.reserve)
+        else:
+            delay = 0.0
+        with self._condition:
+            self._not_before = time.time() + delay
+
+    def _backoff(self, attempts):
+        return min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+
+    def _deliver(self, entry):
+        entry['attempts'] += 1
+        try:
+            self.mastodon.status_post(
+                entry['message'],
+                in_reply_to_id=entry['in_reply_to_id'],
+                visibility=entry['visibility'],
+                idempotency_key=entry['id']
+            )
+        except MastodonRatelimitError:
+            self._rate_limited(entry, self._ratelimit_headers())
+            return
+        except MastodonServerError as e:
+            self._retry_or_drop(entry, e)
+            return
+        except MastodonAPIError as e:
+            if _status_code(e) == 429:
+                # 클라이언트가 throw 모드가 아니거나 초기화 시각이 이미 지난 경우
+                self._rate_limited(entry, self._ratelimit_headers())
+                return
+            # 4xx 응답 (답글 대상 삭제, 본문 길이 초과 등)은 다시 시도해도 실패
+            self.logger.error(f"게시 요청 거부로 버림 ({entry['key']}): {e}")
+            self._finish(entry, delivered=False)
+            return
+        except Exception as e:
+            # 네트워크 오류 등
+            self._retry_or_drop(entry, e)
+            return
+
+        # 다른 요청이 끼어들기 전에 이 게시 응답의 헤더를 읽어 둠
+        headers = self._ratelimit_headers()
+        self._rate_limit_streak = 0
+        self._finish(entry, delivered=True)
+        self._update_pacing(headers)
+
+    def _rate_limited(self, entry, headers):
+        """
+        레이트 리밋 초과 시 모든 게시 중지 후 다시 대기열에 넣음 (시도 횟수에는 포함하지 않음)
+
+        초기화 시각까지 멈추고, 초기화 시각을 이미 지났는데도 거부되면 연속 횟수에 따라
+        대기 시간을 늘립니다.
+        """
+        entry['attempts'] -= 1
+        self.rate_limited += 1
+        self._rate_limit_streak += 1
+        now = time.time()
+        reset = headers[1]
+        if not reset or reset <= now:
+            reset = now + self._backoff(self._rate_limit_streak)
+        self.logger.warning(f"레이트 리밋 초과, {reset - now:.0f}초 후 다시 게시 ({entry['key']})")
+        with self._condition:
+            self._not_before = max(self._not_before, reset)
+        self._requeue(entry, 0)
+
+    def _retry_or_drop(self, entry, error):
+        if entry['attempts'] >= self.max_attempts:
+            self.logger.error(f"게시 {entry['attempts']}회 실패로 버림 ({entry['key']}): {error}")
+            self._finish(entry, delivered=False)
+            return
+        self.retries += 1
+        delay = self._backoff(entry['attempts'])
+        self.logger.warning(f"게시 실패, {delay:.0f}초 후 재시도 ({entry['key']}): {error}")
+        self._requeue(entry, delay)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            entry = self._next_entry()
+            if entry is None:
+                break
+            try:
+                self._deliver(entry)
+            except Exception as e:
+                self.logger.error(f"게시 처리 오류: {e}")
@@ -0,0 +1,85 @@
+import hashlib
+import hmac
+import random
+import threading
+from typing import Optional
+
+import numpy as np
+
+
+class EventRNG:
+    """
+    이벤트(멘션) 한 건에 쓰는 난수 생성기 묶음
+
+    random: random.Random 호환 (randint, choice 등)
+    generator: NumPy Generator (일괄 추첨용)
+    seed: 감사/재현용 시드 (서버 비밀키가 없으면 None)
+    """
+
+    def __init__(self, rng: random.Random, generator: np.random.Generator, seed: Optional[str] = None):
+        self.random = rng
+        self.generator = generator
+        self.seed = seed
+
+    @property
+    def fingerprint(self):
+        """로그에 남길 시드 앞부분 (전체 시드는 비밀키로 다시 계산)"""
+        return self.seed[:12] if self.seed else None
+
+
+class RNGService:
+    """
+    주사위/가챠용 난수 서비스
+
+    - 서버 비밀키가 있으면 (용도, 상태 ID)를 HMAC-SHA256으로 해시해 이벤트별 시드를
+      만들므로, 같은 비밀키와 상태 ID로 결과를 그대로 재현할 수 있습니다.
+    - 비밀키가 없으면 스레드마다 따로 만든 생성기를 사용합니다.
+      어느 경우든 전역 random 모듈 상태는 공유하지 않습니다.
+    - 연차 같은 대량 추첨은 EventRNG.generator로 필요한 난수를 한 번에 만들어
+      씁니다 (GachaPool.draw_many).
+    """
+
+    def __init__(self, secret: Optional[str] = None):
+        if isinstance(secret, str):
+            secret = secret.encode('utf-8')
+        self.secret = secret or None
+        self._local = threading.local()
+
+    @property
+    def seeded(self):
+        return self.secret is not None
+
+    def _thread_state(self):
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            generator = np.random.default_rng()
+            state = EventRNG(random.Random(), generator)
+            self._local.state = state
+        return state
+
+    def derive_seed(self, event_id, purpose) -> str:
+        """비밀키와 (용도, 이벤트 ID)로 시드 계산 (16진 문자열)"""
+        if self.secret is None:
+            raise ValueError("RNG 비밀키가 설정되지 않았습니다")
+        message = f"{purpose}:{event_id}".encode('utf-8')
+        return hmac.new(self.secret, message, hashlib.sha256).hexdigest()
+
+    def for_event(self, event_id=None, purpose='default') -> EventRNG:
+        """
+        이벤트 한 건에 쓸 난수 생성기
+
+        비밀키와 event_id가 있으면 결정적 생성기를, 아니면 현재 스레드의 생성기를 반환합니다.
+        """
+        if self.secret is None or event_id is None:
+            return self._thread_state()
+        return self.replay(event_id, purpose)
+
+    def replay(self, event_id, purpose='default') -> EventRNG:
+        """같은 비밀키로 이벤트의 난수 생성기를 다시 만듦 (분쟁 확인용)"""
+        seed = self.derive_seed(event_id, purpose)
+        seed_int = int(seed, 16)
+        return EventRNG(
+            random.Random(seed_int),
+            np.random.default_rng(np.random.SeedSequence(seed_int)),
+            seed
+        )
@@ -1,19 +1,348 @@
+import heapq
+import itertools
+import json
+import os
 import threading
-import time
 from datetime import datetime, timedelta
 import pytz
 import logging
+from state_store import JSONStateStore
+
+BOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CONFIG_PATH = os.path.join(BOT_DIR, 'schedule_config.json')
+DEFAULT_STATE_PATH = os.path.join(BOT_DIR, 'data', 'scheduler_state.json')
+
+# 보관할 작업 실행 기록 수
+RUN_HISTORY_LIMIT = 100
+
+# 재시작 시 출석 체크 창을 계산할 때 거슬러 올라가는 기간
+ATTENDANCE_LOOKBACK = timedelta(days=8)
+
+# 설정 파일이 없을 때 사용하는 기본 작업 (자정 통금, 오전 7시 출석 체크)
+DEFAULT_SCHEDULE = {
+    "timezone": "Asia/Seoul",
+    "catch_up_minutes": 60,
+    "jobs": [
+        {
+            "name": "curfew",
+            "cron": "0 0 * * *",
+            "action": "curfew",
+            "message": "🌙 통금이 시작되었습니다. 학생들은 기숙사로 돌아가세요."
+        },
+        {
+            "name": "attendance",
+            "cron": "0 7 * * *",
+            "action": "attendance_start",
+            "message": "☀️ 아침이 밝았습니다. 출석 체크를 시작합니다.\n\n📢 출석하려면 이 툿에 '출석'을 포함해서 멘션해주세요!"
+        }
+    ]
+}
+
+# 설정 파일 변경 확인 주기(초) - 다음 작업까지 오래 남아도 이 간격으로는 깨어남
+CONFIG_CHECK_INTERVAL = 60
+
+
+class CronExpression:
+    """
+    크론 형식 시간 표현 (분 시 일 월 요일)
+
+    각 필드는 *, 숫자, 범위(1-5), 목록(1,15), 간격(*/10, 0-30/5)을 지원합니다.
+    요일은 0(일)~6(토)이며 7도 일요일로 취급합니다.
+    일과 요일이 모두 지정되면 둘 중 하나만 맞아도 실행합니다 (표준 크론 동작).
+    """
+
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"크론 표현식은 5개 필드여야 합니다: {expression}")
+
+        self.expression = expression
+        parsed = [self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.FIELD_RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {0 if day == 7 else day for day in weekdays}
+        self.day_restricted = fields[2] != '*'
+        self.weekday_restricted = fields[4] != '*'
+
+    @staticmethod
+    def _parse_field(field, low, high):
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step_text = part.split('/', 1)
+                step = int(step_text)
+                if step < 1:
+                    raise ValueError(f"잘못된 간격입니다: {field}")
+
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start_text, end_text = part.split('-', 1)
+                start, end = int(start_text), int(end_text)
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+
+            if start < low or end > high or start > end:
+                raise ValueError(f"범위를 벗어난 값입니다: {field} ({low}-{high})")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, day):
+        # 크론 요일: 0=일요일, datetime.weekday(): 0=월요일
+        weekday = (day.weekday() + 1) % 7
+        day_ok = day.day in self.days
+        weekday_ok = weekday in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, moment):
+        """moment(시간대 포함 datetime) 이후 처음으로 맞는 시각"""
+        tz = moment.tzinfo
+        candidate = moment.replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year = candidate.year + (candidate.month // 12)
+                month = candidate.month % 12 + 1
+                candidate = candidate.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+
+            if hasattr(tz, 'localize'):
+                return tz.localize(candidate)
+            return candidate.replace(tzinfo=tz)
+
+        raise ValueError(f"다음 실행 시각을 찾을 수 없습니다: {self.expression}")
+
+    def previous_before(self, moment, earliest):
+        """earliest 이후 moment 이하에서 마지막으로 맞는 시각 (없으면 None)"""
+        last = None
+        run_at = self.next_after(earliest)
+        while run_at <= moment:
+            last = run_at
+            run_at = self.next_after(run_at)
+        return last
+
+
+class ScheduledJob:
+    """설정 파일의 작업 한 개"""
+
+    def __init__(self, config):
+        self.name = config['name']
+        self.cron = CronExpression(config['cron'])
+        self.action = config.get('action', 'post')
+        self.message = config.get('message', '')
+        self.visibility = config.get('visibility', 'public')
+        self.enabled = config.get('enabled', True)
+        self.catch_up = config.get('catch_up', True)
+
 
 class BotScheduler:
-    def __init__(self, mastodon_bot):
+    """
+    힙 기반 타이머 스케줄러
+
+    설정 파일(schedule_config.json)의 크론 작업을 다음 실행 시각 순으로 힙에 넣고,
+    가장 가까운 작업 시각까지 잠들었다가 실행합니다. 깨어난 시각이 늦어져도
+    catch_up_minutes 안이면 놓친 실행을 한 번 보충하고, 설정 파일이 바뀌면
+    다시 읽어 코드 수정 없이 공지를 추가할 수 있습니다.
+
+    작업별 마지막 실행 시각, 실행 기록, 출석 체크 상태는 상태 파일에 저장되어
+    재시작 후에도 이미 게시한 공지를 다시 올리지 않고 출석 체크 창을 이어갑니다.
+    """
+
+    def __init__(self, mastodon_bot, config_path=None, state_path=None):
         self.mastodon_bot = mastodon_bot
+        self.config_path = config_path or DEFAULT_CONFIG_PATH
         self.korea_tz = pytz.timezone('Asia/Seoul')
         self.running = True
         self.scheduler_thread = None
         self.attendance_active = False
         self.attendance_start_time = None
         self.logger = logging.getLogger(__name__)
-        
+
+        self.state = JSONStateStore(state_path or DEFAULT_STATE_PATH)
+
+        self.catch_up = timedelta(minutes=60)
+        self.jobs = {}
+        self.last_runs = self._load_last_runs()
+        self._heap = []
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._config_mtime = None
+
+        self._actions = {
+            'post': self._run_post,
+            'curfew': self._run_curfew,
+            'attendance_start': self._run_attendance_start,
+            'attendance_end': self._run_attendance_end,
+        }
+
+        self.load_config()
+        self._restore_attendance()
+
+    def _load_last_runs(self):
+        last_runs = {}
+        for name, value in self.state.get('last_runs', {}).items():
+            try:
+                last_runs[name] = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                self.logger.warning(f"'{name}' 작업의 마지막 실행 시각을 읽을 수 없습니다: {value}")
+        return last_runs
+
+    def _record_run(self, job, run_at, success):
+        """작업 실행 결과 저장 (성공한 경우에만 마지막 실행 시각 갱신, 실패는 재시작 시 보충 대상)"""
+        if success:
+            self.last_runs[job.name] = run_at
+        entry = {
+            'job': job.name,
+            'scheduled_at': run_at.isoformat(),
+            'ran_at': datetime.now(self.korea_tz).isoformat(),
+            'success': success
+        }
+        try:
+            self.state.update(last_runs={name: value.isoformat() for name, value in self.last_runs.items()})
+            self.state.modify('history', lambda history: (history + [entry])[-RUN_HISTORY_LIMIT:], default=[])
+        except Exception as e:
+            self.logger.error(f"스케줄 상태 저장 오류: {e}")
+
+    def _save_attendance(self):
+        try:
+            self.state.update(attendance={
+                'active': self.attendance_active,
+                'started_at': self.attendance_start_time.isoformat() if self.attendance_start_time else None
+            })
+        except Exception as e:
+            self.logger.error(f"출석 체크 상태 저장 오류: {e}")
+
+    def _latest_occurrence(self, actions, now):
+        """지정한 종류의 작업들이 now 이전에 마지막으로 예정되었던 시각"""
+        latest = None
+        for job in self.jobs.values():
+            if job.action not in actions:
+                continue
+            occurrence = job.cron.previous_before(now, now - ATTENDANCE_LOOKBACK)
+            if occurrence is not None and (latest is None or occurrence > latest):
+                latest = occurrence
+        return latest
+
+    def _restore_attendance(self):
+        """
+        재시작 시 출석 체크 창 복원
+
+        스케줄상 마지막 출석 시작이 마지막 종료(통금)보다 늦으면 창이 열린 상태로 보고,
+        공지는 다시 올리지 않습니다. 시작 시각은 저장된 값이 있으면 그 값을 사용합니다.
+        """
+        now = datetime.now(self.korea_tz)
+        latest_start = self._latest_occurrence(('attendance_start',), now)
+        latest_end = self._latest_occurrence(('curfew', 'attendance_end'), now)
+        active = latest_start is not None and (latest_end is None or latest_start > latest_end)
+
+        started_at = None
+        if active:
+            started_at = latest_start
+            saved = self.state.get('attendance') or {}
+            if saved.get('active') and saved.get('started_at'):
+                try:
+                    saved_start = datetime.fromisoformat(saved['started_at'])
+                    if saved_start >= latest_start:
+                        started_at = saved_start
+                except ValueError:
+                    pass
+
+        self.attendance_active = active
+        self.attendance_start_time = started_at
+        self._save_attendance()
+        if active:
+            self.logger.info(f"출석 체크 창을 이어갑니다 (시작: {started_at:%Y-%m-%d %H:%M})")
+
+    def _read_config(self):
+        if not os.path.exists(self.config_path):
+            return DEFAULT_SCHEDULE, None
+        with open(self.config_path, 'r', encoding='utf-8') as f:
+            return json.load(f), os.path.getmtime(self.config_path)
+
+    def load_config(self):
+        """설정 파일에서 작업 목록을 읽어 힙을 다시 구성"""
+        try:
+            config, mtime = self._read_config()
+            jobs = {}
+            for job_config in config.get('jobs', []):
+                job = ScheduledJob(job_config)
+                if job.action not in self._actions:
+                    raise ValueError(f"알 수 없는 작업 종류입니다: {job.action} ({job.name})")
+                if job.enabled:
+                    jobs[job.name] = job
+            timezone = pytz.timezone(config.get('timezone', 'Asia/Seoul'))
+        except Exception as e:
+            self.logger.error(f"스케줄 설정을 읽는 중 오류 (기존 설정 유지): {e}")
+            return False
+
+        with self._condition:
+            self.korea_tz = timezone
+            self.catch_up = timedelta(minutes=config.get('catch_up_minutes', 60))
+            self.jobs = jobs
+            self._config_mtime = mtime
+            self._rebuild_heap()
+            self._condition.notify_all()
+
+        self.logger.info(f"스케줄 작업 {len(jobs)}개 로드: {', '.join(jobs) or '없음'}")
+        return True
+
+    def _config_changed(self):
+        if not os.path.exists(self.config_path):
+            return self._config_mtime is not None
+        return os.path.getmtime(self.config_path) != self._config_mtime
+
+    def _rebuild_heap(self):
+        """작업별 다음 실행 시각 계산 (놓친 실행이 catch_up 안이면 그 시각부터)"""
+        now = datetime.now(self.korea_tz)
+        self._heap = []
+        for job in self.jobs.values():
+            run_at = job.cron.next_after(now)
+
+            last_run = self.last_runs.get(job.name)
+            if job.catch_up and last_run is not None:
+                missed = job.cron.previous_before(now, max(last_run, now - self.catch_up))
+                if missed is not None:
+                    run_at = missed
+
+            heapq.heappush(self._heap, (run_at, next(self._seq), job.name))
+
+    def add_job(self, config):
+        """실행 중에 작업 추가 (설정 파일에는 저장하지 않음)"""
+        job = ScheduledJob(config)
+        if job.action not in self._actions:
+            raise ValueError(f"알 수 없는 작업 종류입니다: {job.action}")
+        with self._condition:
+            self.jobs[job.name] = job
+            run_at = job.cron.next_after(datetime.now(self.korea_tz))
+            heapq.heappush(self._heap, (run_at, next(self._seq), job.name))
+            self._condition.notify_all()
+
+    def remove_job(self, name):
+        """작업 제거 (힙에 남은 항목은 꺼낼 때 무시)"""
+        with self._condition:
+            self.jobs.pop(name, None)
+            self._condition.notify_all()
+
+    def next_runs(self):
+        """작업별 다음 실행 시각"""
+        with self._condition:
+            return {name: run_at for run_at, _, name in sorted(self._heap) if name in self.jobs}
+
     def start(self):
         """스케줄러 시작"""
         if self.scheduler_thread is None or not self.scheduler_thread.is_alive():
@@ -21,87 +350,123 @@ class BotScheduler:
             self.scheduler_thread = threading.Thread(target=self._run_scheduler, daemon=True)
             self.scheduler_thread.start()
             self.logger.info("스케줄러가 시작되었습니다.")
-    
+
     def stop(self):
         """스케줄러 중지"""
-        self.running = False
+        with self._condition:
+            self.running = False
+            self._condition.notify_all()
         if self.scheduler_thread:
             self.scheduler_thread.join(timeout=5)
         self.logger.info("스케줄러가 중지되었습니다.")
-    
+
+    def _pop_due_job(self):
+        """실행할 작업이 생길 때까지 대기 후 (작업, 예정 시각, 현재 시각) 반환 (중지 시 None)"""
+        while True:
+            with self._condition:
+                reload = False
+                while self.running:
+                    now = datetime.now(self.korea_tz)
+                    if self._heap and self._heap[0][0] <= now:
+                        run_at, _, name = heapq.heappop(self._heap)
+                        job = self.jobs.get(name)
+                        if job is None:
+                            continue
+                        # 다음 실행은 지금 시각 기준으로 예약 (밀린 실행은 한 번만 보충)
+                        next_run = job.cron.next_after(max(run_at, now))
+                        heapq.heappush(self._heap, (next_run, next(self._seq), name))
+                        return job, run_at, now
+
+                    timeout = CONFIG_CHECK_INTERVAL
+                    if self._heap:
+                        timeout = min(timeout, (self._heap[0][0] - now).total_seconds())
+                    self._condition.wait(max(0.0, timeout))
+                    if self.running and self._config_changed():
+                        reload = True
+                        break
+
+                if not reload:
+                    return None
+
+            # 설정 파일이 바뀐 경우 다시 읽고 대기 계속
+            self.load_config()
+
     def _run_scheduler(self):
         """스케줄러 메인 루프"""
-        last_curfew_day = None
-        last_attendance_day = None
-        
         while self.running:
+            due = self._pop_due_job()
+            if due is None:
+                break
+
+            job, run_at, now = due
+            if now - run_at > self.catch_up:
+                self.logger.warning(f"'{job.name}' 작업이 {run_at:%Y-%m-%d %H:%M}에 실행되지 못해 건너뜁니다.")
+                continue
+            if now - run_at > timedelta(minutes=1):
+                self.logger.info(f"'{job.name}' 작업의 {run_at:%Y-%m-%d %H:%M} 실행을 보충합니다.")
+
             try:
-                now = datetime.now(self.korea_tz)
-                current_date = now.date()
-                
-                # 자정 통금 체크 (00:00)
-                if (now.hour == 0 and now.minute == 0 and 
-                    last_curfew_day != current_date):
-                    self._post_curfew_message()
-                    last_curfew_day = current_date
-                
-                # 오전 7시 출석 체크 (07:00)
-                if (now.hour == 7 and now.minute == 0 and 
-                    last_attendance_day != current_date):
-                    self._post_attendance_message()
-                    last_attendance_day = current_date
-                
-                # 출석 체크 종료 시간 확인 (다음날 자정)
-                if self.attendance_active and now.hour == 0 and now.minute == 0:
-                    self._end_attendance_check()
-                
-                # 30초마다 체크
-                time.sleep(30)
-                
+                self._actions[job.action](job)
+                self._record_run(job, run_at, True)
             except Exception as e:
-                self.logger.error(f"스케줄러 오류: {e}")
-                time.sleep(60)  # 오류 시 1분 대기
-    
-    def _post_curfew_message(self):
-        """통금 메시지 게시"""
-        try:
-            message = "🌙 통금이 시작되었습니다. 학생들은 기숙사로 돌아가세요."
-            self.mastodon_bot.post_status(message)
-            self.logger.info("통금 메시지가 게시되었습니다.")
-            
-            # 출석 체크 종료
-            if self.attendance_active:
-                self._end_attendance_check()
-                
-        except Exception as e:
-            self.logger.error(f"통금 메시지 게시 오류: {e}")
-    
-    def _post_attendance_message(self):
-        """출석 체크 메시지 게시"""
-        try:
-            message = "☀️ 아침이 밝았습니다. 출석 체크를 시작합니다.\n\n📢 출석하려면 이 툿에 '출석'을 포함해서 멘션해주세요!"
-            self.mastodon_bot.post_status(message)
-            
-            # 출석 체크 활성화
-            self.attendance_active = True
-            self.attendance_start_time = datetime.now(self.korea_tz)
-            
-            self.logger.info("출석 체크 메시지가 게시되고 출석 체크가 활성화되었습니다.")
-            
-        except Exception as e:
-            self.logger.error(f"출석 체크 메시지 게시 오류: {e}")
-    
+                self.logger.error(f"스케줄 작업 '{job.name}' 실행 오류: {e}")
+                self._record_run(job, run_at, False)
+
+    def _post(self, message, visibility='public'):
+        """공지를 게시 대기열에 등록 (실패하면 예외를 던져 실패한 실행으로 기록되게 함)"""
+        if not self.mastodon_bot.post_status(message, visibility=visibility):
+            raise RuntimeError("공지를 게시 대기열에 등록하지 못했습니다.")
+
+    def _run_post(self, job):
+        """공지 게시"""
+        self._post(job.message, visibility=job.visibility)
+        self.logger.info(f"'{job.name}' 공지가 게시되었습니다.")
+
+    def _run_curfew(self, job):
+        self._post_curfew_message(job.message)
+
+    def _run_attendance_start(self, job):
+        self._post_attendance_message(job.message)
+
+    def _run_attendance_end(self, job):
+        if job.message:
+            self._post(job.message, visibility=job.visibility)
+        self._end_attendance_check()
+
+    def _post_curfew_message(self, message=None):
+        """통금 메시지 게시 (실패하면 예외를 그대로 던짐)"""
+        message = message or DEFAULT_SCHEDULE['jobs'][0]['message']
+        self._post(message)
+        self.logger.info("통금 메시지가 게시되었습니다.")
+
+        # 출석 체크 종료
+        if self.attendance_active:
+            self._end_attendance_check()
+
+    def _post_attendance_message(self, message=None):
+        """출석 체크 메시지 게시 (실패하면 예외를 그대로 던지고 출석 체크를 활성화하지 않음)"""
+        message = message or DEFAULT_SCHEDULE['jobs'][1]['message']
+        self._post(message)
+
+        # 출석 체크 활성화
+        self.attendance_active = True
+        self.attendance_start_time = datetime.now(self.korea_tz)
+        self._save_attendance()
+
+        self.logger.info("출석 체크 메시지가 게시되고 출석 체크가 활성화되었습니다.")
+
     def _end_attendance_check(self):
         """출석 체크 종료"""
         if self.attendance_active:
             self.attendance_active = False
             self.attendance_start_time = None
+            self._save_attendance()
             self.logger.info("출석 체크가 종료되었습니다.")
-    
+
     def is_attendance_active(self):
         """출석 체크 활성화 상태 확인"""
         return self.attendance_active
-    
+
     def get_attendance_start_time(self):
         """출석 체크 시작 시간 반환"""
-        return self.attendance_start_time
\ No newline at end of file
+        return self.attendance_start_time
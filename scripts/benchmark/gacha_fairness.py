@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+가챠 공정성/속도 벤치마크 스크립트
+
+시나리오별로 많은 횟수를 추첨해 다음을 확인합니다:
+- 등급/아이템별 관측 분포와 기대 분포의 카이제곱 검정
+- 한 번씩 추첨(draw)과 NumPy 일괄 추첨(draw_many)의 초당 추첨 수
+- 천장 설정이 있는 등급의 최대 연속 미출현 횟수
+
+결과는 JSON으로 출력하며, 검정에 실패하면 종료 코드 1을 반환합니다.
+
+사용법:
+    python scripts/benchmark/gacha_fairness.py [--draws N] [--scalar-draws N] [--seed N]
+        [--alpha A] [--scenarios 파일] [--output 파일]
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+BOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(BOT_DIR))
+
+from gacha_system import build_legacy_pool, build_sheet_pool
+
+DEFAULT_SCENARIOS = Path(__file__).resolve().parent / "gacha_scenarios.json"
+
+
+def _upper_incomplete_gamma_ratio(a, x):
+    """정규화 상부 불완전 감마 함수 Q(a, x)"""
+    if x <= 0:
+        return 1.0
+    log_prefix = a * math.log(x) - x - math.lgamma(a)
+
+    if x < a + 1:
+        # 급수 전개로 P(a, x)를 구한 뒤 1 - P
+        term = 1.0 / a
+        total = term
+        n = a
+        for _ in range(10000):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefix))
+
+    # 연분수 전개 (Lentz 방법)
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 10000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        if abs(d) < tiny:
+            d = tiny
+        c = b + an / c
+        if abs(c) < tiny:
+            c = tiny
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return min(1.0, math.exp(log_prefix) * h)
+
+
+def chi_square_test(observed, expected_probabilities, total):
+    """관측 횟수와 기대 확률로 카이제곱 통계량과 p-value 계산"""
+    chi2 = 0.0
+    for key, probability in expected_probabilities.items():
+        expected = probability * total
+        if expected <= 0:
+            continue
+        diff = observed.get(key, 0) - expected
+        chi2 += diff * diff / expected
+
+    # 기대 확률이 0인 값이 나오면 분포가 틀린 것
+    unexpected = sum(count for key, count in observed.items() if key not in expected_probabilities)
+
+    dof = max(1, len(expected_probabilities) - 1)
+    p_value = _upper_incomplete_gamma_ratio(dof / 2, chi2 / 2) if len(expected_probabilities) > 1 else 1.0
+    if unexpected:
+        p_value = 0.0
+    return {
+        'chi2': round(chi2, 4),
+        'dof': dof,
+        'p_value': p_value,
+        'unexpected': unexpected,
+    }
+
+
+def build_pool(scenario):
+    if scenario.get('format') == 'sheet':
+        return build_sheet_pool(scenario['rows'])
+
+    items = scenario['items']
+    if isinstance(items, int):
+        items = [f"아이템 {i}" for i in range(1, items + 1)]
+    return build_legacy_pool(items)
+
+
+def expected_item_probabilities(pool):
+    tier_probabilities = pool.expected_distribution()
+    expected = {}
+    for tier in pool.active:
+        total_weight = sum(tier.weights)
+        for item, weight in zip(tier.items, tier.weights):
+            key = f"{tier.name}:{item}"
+            expected[key] = expected.get(key, 0.0) + tier_probabilities[tier.name] * weight / total_weight
+    return expected
+
+
+def summarize(results, pool, alpha):
+    tier_counts = {}
+    item_counts = {}
+    for item, rarity in results:
+        tier_counts[rarity] = tier_counts.get(rarity, 0) + 1
+        key = f"{rarity}:{item}"
+        item_counts[key] = item_counts.get(key, 0) + 1
+
+    total = len(results)
+    tier_expected = pool.expected_distribution()
+    tier_test = chi_square_test(tier_counts, tier_expected, total)
+    item_test = chi_square_test(item_counts, expected_item_probabilities(pool), total)
+
+    return {
+        'draws': total,
+        'tiers': dict(tier_test, observed={name: tier_counts.get(name, 0) / total for name in tier_expected},
+                      expected=tier_expected),
+        'items': item_test,
+        'passed': tier_test['p_value'] >= alpha and item_test['p_value'] >= alpha,
+    }
+
+
+def check_pity(pool, draws, generator):
+    """천장이 있는 등급의 최대 연속 미출현 횟수가 천장을 넘지 않는지 확인"""
+    pity_tiers = [tier for tier in pool.active if tier.pity]
+    if not pity_tiers:
+        return None
+
+    pity = {}
+    results = pool.draw_many(draws, generator, pity)
+    ranks = {tier.name: rank for rank, tier in enumerate(pool.tiers)}
+
+    report = {}
+    for tier in pity_tiers:
+        rank = ranks[tier.name]
+        gap = 0
+        max_gap = 0
+        for _, rarity in results:
+            if ranks[rarity] <= rank:
+                gap = 0
+            else:
+                gap += 1
+                max_gap = max(max_gap, gap)
+        report[tier.name] = {
+            'pity': tier.pity,
+            'max_pulls_without': max_gap,
+            'passed': max_gap < tier.pity,
+        }
+    return report
+
+
+def run_scenario(scenario, draws, scalar_draws, seed, alpha):
+    pool = build_pool(scenario)
+    report = {'name': scenario['name'], 'description': scenario.get('description', '')}
+    if not pool:
+        report.update({'error': '추첨 가능한 아이템이 없습니다', 'passed': False})
+        return report
+
+    # NumPy 일괄 추첨
+    generator = np.random.default_rng(seed)
+    started = time.perf_counter()
+    vectorized = pool.draw_many(draws, generator)
+    vectorized_elapsed = time.perf_counter() - started
+
+    # 한 번씩 추첨
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    scalar = [pool.draw(rng) for _ in range(scalar_draws)]
+    scalar_elapsed = time.perf_counter() - started
+
+    report['vectorized'] = summarize(vectorized, pool, alpha)
+    report['scalar'] = summarize(scalar, pool, alpha)
+    report['draws_per_second'] = {
+        'vectorized': round(draws / vectorized_elapsed) if vectorized_elapsed else None,
+        'scalar': round(scalar_draws / scalar_elapsed) if scalar_elapsed else None,
+    }
+
+    pity = check_pity(pool, min(draws, 200000), np.random.default_rng(seed + 1))
+    if pity is not None:
+        report['pity'] = pity
+
+    report['passed'] = (
+        report['vectorized']['passed']
+        and report['scalar']['passed']
+        and all(entry['passed'] for entry in (pity or {}).values())
+    )
+    return report
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="가챠 공정성/속도 벤치마크")
+    parser.add_argument('--draws', type=int, default=2000000, help="시나리오별 일괄 추첨 횟수")
+    parser.add_argument('--scalar-draws', type=int, default=200000, help="시나리오별 한 번씩 추첨 횟수")
+    parser.add_argument('--seed', type=int, default=20240101)
+    parser.add_argument('--alpha', type=float, default=0.001, help="카이제곱 검정 유의수준")
+    parser.add_argument('--scenarios', default=str(DEFAULT_SCENARIOS), help="시나리오 JSON 파일")
+    parser.add_argument('--output', help="결과를 저장할 JSON 파일 (없으면 표준 출력)")
+    args = parser.parse_args()
+
+    with open(args.scenarios, 'r', encoding='utf-8') as f:
+        scenarios = json.load(f)['scenarios']
+
+    results = [
+        run_scenario(scenario, args.draws, args.scalar_draws, args.seed + index, args.alpha)
+        for index, scenario in enumerate(scenarios)
+    ]
+    report = {
+        'generated_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'seed': args.seed,
+        'alpha': args.alpha,
+        'draws': args.draws,
+        'scalar_draws': args.scalar_draws,
+        'scenarios': results,
+        'passed': all(result['passed'] for result in results),
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    return 0 if report['passed'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
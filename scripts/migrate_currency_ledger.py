@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+유저 소지품 시트의 갈레온 -> 갈레온 장부 시트 이전 스크립트
+
+모든 유저 소지품 시트를 한 번의 batchGet으로 읽어 갈레온 행을 찾고, 장부 시트에
+한 번의 batchUpdate로 기록합니다. 이미 장부에 있는 유저는 --overwrite 없이는
+건너뜁니다. --remove-inventory-rows를 주면 이전한 갈레온 행을 소지품 시트에서
+한 번의 batchUpdate로 지웁니다. 이전하는 동안에는 봇을 중지해 두세요.
+
+사용법:
+    python scripts/migrate_currency_ledger.py [--sheet 갈레온장부] [--dry-run]
+                                              [--overwrite] [--remove-inventory-rows]
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+BOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BOT_DIR))
+
+from dotenv import load_dotenv
+from currency_ledger import CURRENCY_ITEM
+from google_sheets import INVENTORY_HEADER, GoogleSheetsManager, non_inventory_sheet_names
+from sheets_transaction import parse_quantity
+
+
+def collect_inventory_balances(manager, sheet_names):
+    """
+    유저 소지품 시트별 갈레온 잔액과 갈레온 행 번호 목록
+
+    Returns:
+        {유저: (잔액, [갈레온 행 번호])} (갈레온 행이 없는 유저는 잔액 0)
+    """
+    manager.prefetch_inventories(sheet_names)
+
+    balances = {}
+    for username in sheet_names:
+        rows = manager.inventory_cache.get(username)
+        if not rows or rows[0][:3] != INVENTORY_HEADER:
+            continue  # 유저 소지품 시트가 아님
+
+        currency_rows = [
+            row_number for row_number, row in enumerate(rows[1:], start=2)
+            if row and row[0] == CURRENCY_ITEM
+        ]
+        # 봇과 같은 기준으로 첫 갈레온 행의 수량을 잔액으로 사용
+        balance = parse_quantity(rows[currency_rows[0] - 1], 0) if currency_rows else 0
+        balances[username] = (balance, currency_rows)
+    return balances
+
+
+def remove_currency_rows(manager, rows_by_user):
+    """소지품 시트의 갈레온 행을 한 번의 batchUpdate로 삭제 (아래 행부터)"""
+    requests = []
+    for username, row_numbers in rows_by_user.items():
+        sheet_id = manager._lookup_sheet_id(username)
+        for row_number in sorted(row_numbers, reverse=True):
+            requests.append({
+                'deleteDimension': {
+                    'range': {
+                        'sheetId': sheet_id,
+                        'dimension': 'ROWS',
+                        'startIndex': row_number - 1,
+                        'endIndex': row_number
+                    }
+                }
+            })
+    if not requests:
+        return True
+
+    manager._execute(manager.service.spreadsheets().batchUpdate(
+        spreadsheetId=manager.spreadsheet_id,
+        body={'requests': requests}
+    ))
+    for username in rows_by_user:
+        manager.invalidate_user_cache(username)
+    return True
+
+
+def main():
+    """메인 함수"""
+    load_dotenv(BOT_DIR / ".env")
+
+    parser = argparse.ArgumentParser(description="유저 소지품 시트의 갈레온을 장부 시트로 이전")
+    parser.add_argument('--sheet', default=os.getenv('CURRENCY_LEDGER_SHEET'),
+                        help="장부 시트 이름 (기본: CURRENCY_LEDGER_SHEET)")
+    parser.add_argument('--dry-run', action='store_true', help="시트를 수정하지 않고 이전할 내용만 출력")
+    parser.add_argument('--overwrite', action='store_true', help="이미 장부에 있는 유저 잔액도 덮어씀")
+    parser.add_argument('--remove-inventory-rows', action='store_true',
+                        help="이전한 갈레온 행을 유저 소지품 시트에서 삭제")
+    args = parser.parse_args()
+
+    if not args.sheet:
+        print("장부 시트 이름이 필요합니다 (--sheet 또는 CURRENCY_LEDGER_SHEET)")
+        return 1
+
+    manager = GoogleSheetsManager(
+        os.getenv('GOOGLE_SERVICE_ACCOUNT_FILE'),
+        os.getenv('SPREADSHEET_ID'),
+        currency_ledger_sheet=args.sheet,
+        non_inventory_sheets=non_inventory_sheet_names()
+    )
+    ledger = manager.currency_ledger
+
+    # 봇의 전체 잔액 조회와 같은 기준으로 키워드/획득 로그/가챠/상점/장부 시트 제외
+    sheet_names = manager.inventory_sheet_names()
+    inventory_balances = collect_inventory_balances(manager, sheet_names)
+
+    existing = {}
+    if manager._lookup_sheet_id(args.sheet) is not None:
+        existing = ledger.get_all_balances()
+
+    migrate = {}
+    skipped = {}
+    remove_rows = {}
+    for username, (balance, currency_rows) in sorted(inventory_balances.items()):
+        if username in existing and not args.overwrite:
+            skipped[username] = {'inventory': balance, 'ledger': existing[username]}
+            continue
+        migrate[username] = balance
+        if currency_rows:
+            remove_rows[username] = currency_rows
+
+    plan = {
+        'ledger_sheet': args.sheet,
+        'migrate': migrate,
+        'skipped': skipped,
+        'remove_rows': remove_rows if args.remove_inventory_rows else {},
+    }
+
+    if args.dry_run:
+        print(json.dumps(plan, ensure_ascii=False, indent=2))
+        return 0
+
+    if not ledger.set_balances(migrate):
+        return 1
+    print(f"장부에 {len(migrate)}명 잔액 기록 완료 (건너뜀: {len(skipped)}명)")
+
+    if args.remove_inventory_rows and remove_rows:
+        remove_currency_rows(manager, remove_rows)
+        print(f"유저 소지품 시트 {len(remove_rows)}개에서 갈레온 행 삭제 완료")
+
+    manager.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+획득 로그 -> 유저 소지품 증분 동기화 스크립트
+
+마지막으로 동기화한 행 이후의 획득 로그만 읽어 유저별로 묶어 반영합니다.
+--dry-run 옵션을 주면 시트를 수정하지 않고 반영될 내용만 출력합니다.
+
+사용법:
+    python scripts/sync_acquisitions.py [--dry-run]
+"""
+
+import os
+import sys
+import json
+from pathlib import Path
+
+BOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BOT_DIR))
+
+from dotenv import load_dotenv
+from google_sheets import GoogleSheetsManager, non_inventory_sheet_names
+from sqlite_store import SQLiteInventoryManager
+
+
+def main():
+    """메인 함수"""
+    dry_run = "--dry-run" in sys.argv[1:]
+
+    load_dotenv(BOT_DIR / ".env")
+    acquisition_sheet = os.getenv('ACQUISITION_LOG_SHEET_NAME', 'acquisition_log')
+
+    use_sqlite = os.getenv('STORAGE_BACKEND', 'sheets').lower() == 'sqlite'
+
+    # 봇과 같은 기준으로 갈레온 장부(시트 저장소에서만)와 소지품이 아닌 시트를 설정
+    google_sheets = GoogleSheetsManager(
+        os.getenv('GOOGLE_SERVICE_ACCOUNT_FILE'),
+        os.getenv('SPREADSHEET_ID'),
+        currency_ledger_sheet=None if use_sqlite else os.getenv('CURRENCY_LEDGER_SHEET') or None,
+        non_inventory_sheets=non_inventory_sheet_names()
+    )
+
+    storage = google_sheets
+    if use_sqlite:
+        db_path = os.getenv('SQLITE_DB_PATH', str(BOT_DIR / 'data' / 'bot.db'))
+        storage = SQLiteInventoryManager(google_sheets, db_path)
+
+    try:
+        result = storage.sync_acquisitions_to_inventories(acquisition_sheet, dry_run=dry_run)
+    finally:
+        # SQLite 저장소는 변경분을 시트에 바로 복제한 뒤 시트 연결까지 닫음
+        storage.close()
+
+    if dry_run:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0 if result is not False else 1
+
+    return 0 if result else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+import heapq
+import itertools
+import logging
+import random
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from googleapiclient.errors import HttpError
+
+# 숫자가 작을수록 먼저 처리
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+_priority_local = threading.local()
+
+
+def current_priority():
+    """현재 스레드의 요청 우선순위 (기본: 유저 응답용)"""
+    return getattr(_priority_local, 'priority', PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority):
+    """with 블록 안의 시트 API 요청 우선순위 지정"""
+    previous = current_priority()
+    _priority_local.priority = priority
+    try:
+        yield
+    finally:
+        _priority_local.priority = previous
+
+
+def background_priority():
+    """백그라운드 동기화/복제 작업용 우선순위"""
+    return request_priority(PRIORITY_BACKGROUND)
+
+
+class TokenBucket:
+    """분당 할당량을 초당 보충 속도로 나눠 쓰는 토큰 버킷 (스레드 안전하지 않음, 호출 측에서 잠금)"""
+
+    def __init__(self, per_minute, burst=None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst if burst is not None else max(1, per_minute // 4))
+        self.tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self, now):
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self._updated_at = now
+
+    def try_take(self, now):
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def time_until_token(self, now):
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def drain(self, now):
+        """429 응답을 받았을 때 남은 토큰을 비워 다른 요청도 잠시 쉬게 함"""
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+
+
+class _Lane:
+    """읽기/쓰기 각각의 토큰 버킷과 우선순위 대기열"""
+
+    def __init__(self, name, per_minute, burst=None):
+        self.name = name
+        self.bucket = TokenBucket(per_minute, burst)
+        self.condition = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._recent = deque()
+
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.server_errors = 0
+        self.failures = 0
+        self.wait_seconds = 0.0
+
+    def acquire(self, priority):
+        """토큰 하나를 얻을 때까지 대기 (우선순위가 높은 요청부터, 같으면 먼저 온 순서)"""
+        started = time.monotonic()
+        with self.condition:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._waiters[0] == ticket and self.bucket.try_take(now):
+                        heapq.heappop(self._waiters)
+                        break
+                    self.condition.wait(max(0.01, self.bucket.time_until_token(now)))
+            except BaseException:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                raise
+            finally:
+                self.condition.notify_all()
+
+            now = time.monotonic()
+            self.requests += 1
+            self.wait_seconds += now - started
+            self._recent.append(now)
+
+    def backoff(self):
+        """할당량 초과 응답 후 버킷을 비움"""
+        with self.condition:
+            self.bucket.drain(time.monotonic())
+
+    def used_last_minute(self, now):
+        while self._recent and now - self._recent[0] > 60:
+            self._recent.popleft()
+        return len(self._recent)
+
+    def metrics(self):
+        with self.condition:
+            now = time.monotonic()
+            self.bucket._refill(now)
+            return {
+                'requests': self.requests,
+                'used_last_minute': self.used_last_minute(now),
+                'tokens_available': round(self.bucket.tokens, 2),
+                'waiting': len(self._waiters),
+                'retries': self.retries,
+                'rate_limited': self.rate_limited,
+                'server_errors': self.server_errors,
+                'failures': self.failures,
+                'wait_seconds': round(self.wait_seconds, 3),
+            }
+
+
+class SheetsRequestExecutor:
+    """
+    시트 API 요청을 실행하는 공용 실행기
+
+    모든 요청은 읽기/쓰기 레인의 토큰 버킷을 통과한 뒤 실행됩니다.
+    토큰을 기다리는 요청은 유저 응답용이 백그라운드 작업보다 먼저 처리되며,
+    429/5xx 응답이나 연결 오류는 지수 백오프(지터 포함)로 재시도합니다.
+    """
+
+    def __init__(self, read_per_minute=60, write_per_minute=60, burst=None,
+                 max_retries=5, base_delay=1.0, max_delay=32.0):
+        self.lanes = {
+            'read': _Lane('read', read_per_minute, burst),
+            'write': _Lane('write', write_per_minute, burst),
+        }
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.logger = logging.getLogger(__name__)
+
+    def _retry_delay(self, attempt, error=None):
+        """Retry-After 헤더가 있으면 따르고, 없으면 full jitter 지수 백오프"""
+        if error is not None:
+            retry_after = error.resp.get('retry-after') if error.resp is not None else None
+            if retry_after:
+                try:
+                    return min(self.max_delay, float(retry_after))
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def execute(self, request, write=None, priority=None):
+        """
+        API 요청 실행
+
+        Args:
+            request: googleapiclient HttpRequest
+            write: 쓰기 요청 여부 (None이면 HTTP 메서드로 판단)
+            priority: 우선순위 (None이면 현재 스레드 설정)
+        """
+        if write is None:
+            write = getattr(request, 'method', 'GET').upper() != 'GET'
+        if priority is None:
+            priority = current_priority()
+        lane = self.lanes['write' if write else 'read']
+
+        attempt = 0
+        while True:
+            lane.acquire(priority)
+            try:
+                return request.execute()
+            except HttpError as e:
+                status = e.resp.status if e.resp is not None else None
+                if status not in RETRYABLE_STATUS:
+                    raise
+                with lane.condition:
+                    if status == 429:
+                        lane.rate_limited += 1
+                    else:
+                        lane.server_errors += 1
+                if status == 429:
+                    lane.backoff()
+                error = e
+            except (ConnectionError, socket.timeout, TimeoutError) as e:
+                error = e
+
+            if attempt >= self.max_retries:
+                with lane.condition:
+                    lane.failures += 1
+                raise error
+
+            delay = self._retry_delay(attempt, error if isinstance(error, HttpError) else None)
+            with lane.condition:
+                lane.retries += 1
+            self.logger.warning(f"시트 API {lane.name} 요청 재시도 {attempt + 1}/{self.max_retries} ({delay:.1f}초 후): {error}")
+            time.sleep(delay)
+            attempt += 1
+
+    def metrics(self):
+        """레인별 할당량 사용/재시도 카운터"""
+        return {name: lane.metrics() for name, lane in self.lanes.items()}
@@ -0,0 +1,357 @@
+import threading
+from datetime import datetime
+
+from currency_ledger import CURRENCY_ITEM
+
+# 트랜잭션 도중 선언하지 않은 유저를 잠글 때 이름순을 어기게 되면 교착을 피하려고 최대 이만큼만 대기
+LOCK_TIMEOUT = 30
+
+
+def parse_quantity(row, default=1):
+    """소지품 행의 수량(C열) 파싱 (숫자가 아니면 default)"""
+    if len(row) > 2 and str(row[2]).isdigit():
+        return int(row[2])
+    return default
+
+
+def _sheet_value(value):
+    """RAW 입력과 같은 형태로 변환 (숫자 문자열은 숫자로 기록)"""
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return value
+
+
+def _cell_data(value):
+    value = _sheet_value(value)
+    if isinstance(value, int):
+        return {'userEnteredValue': {'numberValue': value}}
+    return {'userEnteredValue': {'stringValue': str(value)}}
+
+
+class UserLocks:
+    """
+    유저별 재진입 잠금 목록
+
+    같은 유저를 건드리는 트랜잭션끼리 읽기부터 커밋까지를 직렬화합니다.
+    (작업 풀은 멘션 작성자별로만 직렬화하므로 양도처럼 다른 유저의 소지품도
+    바꾸는 트랜잭션은 여기서 받는 사람도 함께 잠가야 합니다.)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks = {}
+
+    def get(self, username):
+        with self._lock:
+            lock = self._locks.get(username)
+            if lock is None:
+                lock = threading.RLock()
+                self._locks[username] = lock
+            return lock
+
+
+class UserLockedTransaction:
+    """
+    건드리는 유저를 모두 잠근 채 진행하는 트랜잭션의 공통 부분
+
+    begin_transaction에 넘긴 유저는 생성 시 이름순으로 한꺼번에 잠가 교착을 막고,
+    넘기지 않은 유저는 처음 읽거나 쓸 때 잠급니다. 잠금은 commit이 끝나거나
+    with 블록을 벗어날 때 풀립니다.
+    """
+
+    def _init_locks(self, user_locks, usernames):
+        self._user_locks = user_locks
+        self._held = []  # (유저, 잠금) 잠근 순서
+        self.lock_users(*usernames)
+
+    def lock_users(self, *usernames):
+        """유저 잠금 획득 (이름순, 이미 잠근 유저는 건너뜀)"""
+        held = {username for username, _ in self._held}
+        for username in sorted(set(usernames) - held):
+            lock = self._user_locks.get(username)
+            if not held or username > max(held):
+                lock.acquire()
+            elif not lock.acquire(timeout=LOCK_TIMEOUT):
+                raise RuntimeError(f"{username} 소지품 잠금을 얻지 못했습니다.")
+            self._held.append((username, lock))
+            held.add(username)
+
+    def release(self):
+        """잡고 있는 유저 잠금 모두 해제 (여러 번 호출해도 됨)"""
+        while self._held:
+            _, lock = self._held.pop()
+            lock.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
+
+
+class _Entry:
+    """트랜잭션 안에서 다루는 소지품 한 행"""
+
+    def __init__(self, row_number, values):
+        self.row_number = row_number  # 원래 시트상의 행 번호 (새 행이면 None)
+        self.values = list(values)
+        self.dirty = False
+        self.deleted = False
+
+
+class _UserState:
+    """
+    트랜잭션 안에서 다루는 유저 한 명의 소지품 시트
+
+    시트 전체를 복사하지 않고, 캐시의 아이템 인덱스로 필요한 행만 찾아 가져옵니다.
+    """
+
+    def __init__(self, manager, username):
+        self.manager = manager
+        self.username = username
+        self.load()
+
+    def load(self):
+        self.original_length = self.manager._inventory_row_count(self.username)
+        self.exists = self.original_length is not None
+        if not self.exists:
+            self.original_length = 0
+        self.items = {}  # 아이템 -> _Entry (조회했지만 없으면 None)
+        self.entries = []  # 이 트랜잭션에서 읽거나 추가한 행 (추가 순서 유지)
+
+    def find(self, item):
+        if item not in self.items:
+            entry = None
+            if self.exists:
+                row_number, values = self.manager._lookup_inventory_row(self.username, item)
+                if row_number is not None:
+                    entry = _Entry(row_number, values)
+                    self.entries.append(entry)
+            self.items[item] = entry
+
+        entry = self.items[item]
+        if entry is None or entry.deleted:
+            return None
+        return entry
+
+    def append(self, values):
+        entry = _Entry(None, values)
+        self.entries.append(entry)
+        self.items[values[0]] = entry
+        return entry
+
+
+class InventoryTransaction(UserLockedTransaction):
+    """
+    여러 유저 소지품 변경을 모아 한 번에 반영하는 트랜잭션
+
+    변경 내용은 캐시된 시트 값(아이템 -> 행 번호 인덱스)을 기준으로 메모리에서
+    계산되므로 캐시가 유효하면 시트를 다시 읽지 않습니다. commit 시
+    행 삭제가 없으면 values.batchUpdate 한 번, 있으면 updateCells와
+    deleteDimension을 묶은 spreadsheets.batchUpdate 한 번으로 기록됩니다.
+    갈레온 장부를 쓰는 경우 갈레온은 유저 소지품 시트 대신 장부 행에 기록되며,
+    같은 한 번의 요청에 함께 포함됩니다.
+    캐시된 행 번호와 수량을 기준으로 쓰므로, 건드리는 유저는 커밋까지 잠가 둡니다.
+    """
+
+    def __init__(self, manager, usernames=()):
+        self.manager = manager
+        self.timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._states = {}
+        self._ledger = getattr(manager, 'currency_ledger', None)
+        self._balances = {}  # username -> [잔액, 변경 여부] (장부 사용 시)
+        self._ledger_rows = {}  # username -> (장부 행 번호, 잔액) (커밋 후 장부 캐시 반영용)
+        self._init_locks(manager.user_locks, usernames)
+
+    def _state(self, username, create=False):
+        state = self._states.get(username)
+        if state is None:
+            self.lock_users(username)
+            state = _UserState(self.manager, username)
+            self._states[username] = state
+
+        if create and not state.exists:
+            if not self.manager.create_user_inventory_sheet(username):
+                raise RuntimeError(f"{username} 소지품 시트를 만들 수 없습니다.")
+            state.load()
+        return state
+
+    def _uses_ledger(self, item):
+        return self._ledger is not None and item == CURRENCY_ITEM
+
+    def _balance(self, username):
+        balance = self._balances.get(username)
+        if balance is None:
+            self.lock_users(username)
+            balance = [self._ledger.get_balance(username), False]
+            self._balances[username] = balance
+        return balance
+
+    def get_quantity(self, username, item, default=1):
+        """현재(미반영 변경 포함) 수량 조회 (아이템이 없으면 0)"""
+        if self._uses_ledger(item):
+            return self._balance(username)[0]
+        entry = self._state(username).find(item)
+        if entry is None:
+            return 0
+        return parse_quantity(entry.values, default)
+
+    def set_quantity(self, username, item, quantity, timestamp=None):
+        """아이템 수량 설정 (없으면 새 행 추가)"""
+        if self._uses_ledger(item):
+            self._balance(username)[:] = [int(quantity), True]
+            return
+
+        state = self._state(username, create=True)
+        values = [item, timestamp or self.timestamp, str(quantity)]
+
+        entry = state.find(item)
+        if entry is None:
+            entry = state.append(values)
+        else:
+            entry.values = values
+        entry.dirty = True
+
+    def add_item(self, username, item, quantity=1, timestamp=None):
+        """아이템 추가 (이미 있으면 수량 증가)"""
+        current_quantity = self.get_quantity(username, item)
+        self.set_quantity(username, item, current_quantity + quantity, timestamp)
+
+    def remove_item(self, username, item, quantity=1):
+        """아이템 차감 (0개가 되면 행 삭제). (성공 여부, 메시지) 반환"""
+        if self._uses_ledger(item):
+            balance = self._balance(username)
+            if balance[0] < quantity:
+                return False, f"{item}이(가) 부족합니다. (보유: {balance[0]}, 필요: {quantity})"
+            balance[:] = [balance[0] - quantity, True]
+            return True, f"{item} {quantity}개를 제거했습니다."
+
+        state = self._state(username)
+        entry = state.find(item)
+        if entry is None:
+            return False, f"{item}을(를) 소지품에서 찾을 수 없습니다."
+
+        current_quantity = parse_quantity(entry.values)
+        if current_quantity < quantity:
+            return False, f"{item}이(가) 부족합니다. (보유: {current_quantity}, 필요: {quantity})"
+
+        new_quantity = current_quantity - quantity
+        if new_quantity <= 0:
+            if entry.row_number is None:
+                state.entries.remove(entry)
+                state.items[item] = None
+            else:
+                entry.deleted = True
+        else:
+            entry.values = [item, self.timestamp, str(new_quantity)]
+            entry.dirty = True
+        return True, f"{item} {quantity}개를 제거했습니다."
+
+    def _collect_changes(self):
+        """(유저, 행 번호, 값) 쓰기 목록과 (유저, 행 번호) 삭제 목록 계산"""
+        writes = []
+        deletes = []
+        for username, state in self._states.items():
+            next_row = state.original_length + 1
+            for entry in state.entries:
+                if entry.row_number is None:
+                    writes.append((username, next_row, entry.values))
+                    next_row += 1
+                elif entry.deleted:
+                    deletes.append((username, entry.row_number))
+                elif entry.dirty:
+                    writes.append((username, entry.row_number, entry.values))
+
+        for username, (balance, dirty) in self._balances.items():
+            if dirty:
+                row = self._ledger.row_for(username)
+                self._ledger_rows[username] = (row, balance)
+                writes.append((self._ledger.sheet_name, row, [username, balance, self.timestamp]))
+        return writes, deletes
+
+    def commit(self):
+        """모든 변경을 한 번의 API 호출로 반영 (끝나면 유저 잠금 해제)"""
+        try:
+            return self._commit()
+        finally:
+            self.release()
+
+    def _commit(self):
+        try:
+            writes, deletes = self._collect_changes()
+        except Exception as e:
+            print(f"갈레온 장부 행 준비 중 오류 발생: {e}")
+            return False
+        if not writes and not deletes:
+            return True
+
+        try:
+            sheet = self.manager.service.spreadsheets()
+
+            if not deletes:
+                data = [{
+                    'range': f'{username}!A{row}:C{row}',
+                    'values': [[_sheet_value(value) for value in values]]
+                } for username, row, values in writes]
+
+                self.manager._execute(sheet.values().batchUpdate(
+                    spreadsheetId=self.manager.spreadsheet_id,
+                    body={'valueInputOption': 'RAW', 'data': data}
+                ))
+            else:
+                requests = []
+                for username, row, values in writes:
+                    requests.append({
+                        'updateCells': {
+                            'start': {
+                                'sheetId': self.manager._lookup_sheet_id(username),
+                                'rowIndex': row - 1,
+                                'columnIndex': 0
+                            },
+                            'rows': [{'values': [_cell_data(value) for value in values]}],
+                            'fields': 'userEnteredValue'
+                        }
+                    })
+
+                # 아래 행부터 삭제해야 위쪽 행 번호가 바뀌지 않음
+                for username, row in sorted(deletes, key=lambda d: (d[0], -d[1])):
+                    requests.append({
+                        'deleteDimension': {
+                            'range': {
+                                'sheetId': self.manager._lookup_sheet_id(username),
+                                'dimension': 'ROWS',
+                                'startIndex': row - 1,
+                                'endIndex': row
+                            }
+                        }
+                    })
+
+                self.manager._execute(sheet.batchUpdate(
+                    spreadsheetId=self.manager.spreadsheet_id,
+                    body={'requests': requests}
+                ))
+
+        except Exception as e:
+            print(f"소지품 일괄 반영 중 오류 발생: {e}")
+            for username in self._states:
+                self.manager.inventory_cache.invalidate(username)
+            if self._ledger_rows:
+                self._ledger.invalidate()
+            return False
+
+        # 캐시에도 같은 순서로 반영 (행 삭제 시 인덱스의 아래 행 번호도 당겨짐)
+        cache = self.manager.inventory_cache
+        for username, row, values in writes:
+            state = self._states.get(username)
+            if state is None:
+                continue  # 갈레온 장부 행
+            if row > state.original_length:
+                cache.append_row(username, values, row)
+            else:
+                cache.update_row(username, row, values)
+        for username, row in sorted(deletes, key=lambda d: (d[0], -d[1])):
+            cache.delete_row(username, row)
+        if self._ledger_rows:
+            self._ledger.apply(self._ledger_rows, self.timestamp)
+        return True
@@ -0,0 +1,126 @@
+import json
+import os
+import socket
+import threading
+
+import httplib2
+import requests
+from google.auth.transport.requests import AuthorizedSession
+from google.oauth2.service_account import Credentials
+from googleapiclient.discovery import build_from_document
+
+DISCOVERY_URL = 'https://sheets.googleapis.com/$discovery/rest?version=v4'
+
+
+class PooledHttp:
+    """
+    googleapiclient가 기대하는 httplib2.Http 인터페이스를 requests 연결 풀로 구현
+
+    httplib2는 스레드 안전하지 않고 연결을 자주 다시 맺으므로, 인증된
+    requests 세션(keep-alive 연결 풀)을 사용합니다. 세션은 스레드마다 하나씩
+    만들어 사용하고, 연결 오류는 내장 ConnectionError/socket.timeout으로
+    바꿔 요청 실행기의 재시도 로직이 처리하게 합니다.
+    """
+
+    def __init__(self, credentials, pool_maxsize=4, connect_timeout=5, read_timeout=30):
+        self.credentials = credentials
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = AuthorizedSession(credentials)
+
+        # 재시도는 SheetsRequestExecutor에서 처리하므로 어댑터 재시도는 끔
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_maxsize,
+            max_retries=0
+        )
+        self.session.mount('https://', adapter)
+        self.session.headers['Connection'] = 'keep-alive'
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        try:
+            response = self.session.request(
+                method, uri, data=body, headers=headers, timeout=self.timeout
+            )
+        except requests.exceptions.Timeout as e:
+            raise socket.timeout(str(e)) from e
+        except requests.exceptions.ConnectionError as e:
+            raise ConnectionError(str(e)) from e
+
+        info = {key.lower(): value for key, value in response.headers.items()}
+        info['status'] = str(response.status_code)
+        return httplib2.Response(info), response.content
+
+    def close(self):
+        self.session.close()
+
+
+class SheetsClientFactory:
+    """
+    스레드별 시트 API 클라이언트 생성기
+
+    서비스 계정 인증 정보와 디스커버리 문서는 한 번만 읽어 모든 스레드가 공유하고,
+    디스커버리 문서는 로컬 파일에 캐시해 시작할 때마다 내려받지 않습니다.
+    """
+
+    def __init__(self, service_account_file, scopes, discovery_cache_path,
+                 pool_maxsize=4, connect_timeout=5, read_timeout=30):
+        self.credentials = Credentials.from_service_account_file(service_account_file, scopes=scopes)
+        self.discovery_cache_path = discovery_cache_path
+        self.pool_maxsize = pool_maxsize
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        self._document = None
+        self._lock = threading.Lock()
+        self._sessions = []
+
+    def _load_discovery_document(self):
+        """로컬 캐시 -> 라이브러리 내장 문서 -> 네트워크 순으로 디스커버리 문서 로드"""
+        if os.path.exists(self.discovery_cache_path):
+            with open(self.discovery_cache_path, 'r', encoding='utf-8') as f:
+                return f.read()
+
+        document = None
+        try:
+            from googleapiclient.discovery_cache import get_static_doc
+            document = get_static_doc('sheets', 'v4')
+        except ImportError:
+            pass
+
+        if document is None:
+            response = requests.get(DISCOVERY_URL, timeout=(self.connect_timeout, self.read_timeout))
+            response.raise_for_status()
+            document = response.text
+
+        json.loads(document)  # 손상된 문서는 캐시하지 않음
+        os.makedirs(os.path.dirname(os.path.abspath(self.discovery_cache_path)), exist_ok=True)
+        tmp_path = self.discovery_cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(document)
+        os.replace(tmp_path, self.discovery_cache_path)
+        return document
+
+    def discovery_document(self):
+        with self._lock:
+            if self._document is None:
+                self._document = self._load_discovery_document()
+            return self._document
+
+    def build(self):
+        """현재 스레드에서 사용할 시트 API 클라이언트 생성"""
+        http = PooledHttp(
+            self.credentials,
+            pool_maxsize=self.pool_maxsize,
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout
+        )
+        with self._lock:
+            self._sessions.append(http)
+        return build_from_document(self.discovery_document(), http=http)
+
+    def close(self):
+        """모든 스레드의 연결 풀 닫기"""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for http in sessions:
+            http.close()
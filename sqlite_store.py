@@ -0,0 +1,623 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from acquisition_sync import SyncCheckpoint, sync_acquisitions
+from sheets_executor import background_priority
+from sheets_transaction import UserLockedTransaction, UserLocks, parse_quantity
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    imported_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS inventory (
+    username TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    item TEXT NOT NULL,
+    acquired_at TEXT NOT NULL DEFAULT '',
+    quantity INTEGER NOT NULL,
+    PRIMARY KEY (username, position)
+);
+CREATE INDEX IF NOT EXISTS idx_inventory_user_item ON inventory(username, item);
+
+CREATE TABLE IF NOT EXISTS acquisition_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sheet_name TEXT NOT NULL,
+    logged_at TEXT NOT NULL,
+    username TEXT NOT NULL,
+    item TEXT NOT NULL,
+    replicated INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_acquisition_pending ON acquisition_log(replicated, id);
+CREATE INDEX IF NOT EXISTS idx_acquisition_user ON acquisition_log(username);
+
+CREATE TABLE IF NOT EXISTS sheet_mirror (
+    username TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    mirrored_version INTEGER NOT NULL DEFAULT 0,
+    mirrored_rows INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_sheet_mirror_dirty ON sheet_mirror(mirrored_version, version);
+"""
+
+
+class _TransactionAbort(Exception):
+    """커밋 도중 조건이 맞지 않아 롤백해야 하는 경우"""
+
+
+class SQLiteInventoryTransaction(UserLockedTransaction):
+    """
+    SQLite 저장소용 트랜잭션 (InventoryTransaction과 같은 인터페이스)
+
+    변경은 메모리에 모아 두었다가 commit 시 하나의 SQLite 트랜잭션에서
+    다시 검증하며 적용합니다. 갈레온처럼 읽은 값으로 계산해 설정하는 변경이
+    다른 트랜잭션에 덮이지 않도록 건드리는 유저는 커밋까지 잠가 둡니다.
+    """
+
+    def __init__(self, store, usernames=()):
+        self.store = store
+        self.timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._ops = []
+        self._init_locks(store.user_locks, usernames)
+
+    def _current(self, username, item):
+        """(존재 여부, 수량) - 아직 반영되지 않은 변경 포함"""
+        self.lock_users(username)
+        row = self.store._read_item(username, item)
+        exists = row is not None
+        quantity = row['quantity'] if exists else 0
+
+        for op, op_user, op_item, amount, _ in self._ops:
+            if op_user != username or op_item != item:
+                continue
+            if op == 'set':
+                exists, quantity = True, amount
+            elif op == 'add':
+                exists, quantity = True, quantity + amount
+            elif op == 'remove':
+                quantity -= amount
+                if quantity <= 0:
+                    exists, quantity = False, 0
+        return exists, quantity
+
+    def get_quantity(self, username, item, default=1):
+        """현재(미반영 변경 포함) 수량 조회 (아이템이 없으면 0)"""
+        return self._current(username, item)[1]
+
+    def set_quantity(self, username, item, quantity, timestamp=None):
+        """아이템 수량 설정 (없으면 새 행 추가)"""
+        self.lock_users(username)
+        self._ops.append(('set', username, item, quantity, timestamp or self.timestamp))
+
+    def add_item(self, username, item, quantity=1, timestamp=None):
+        """아이템 추가 (이미 있으면 수량 증가)"""
+        self.lock_users(username)
+        self._ops.append(('add', username, item, quantity, timestamp or self.timestamp))
+
+    def remove_item(self, username, item, quantity=1):
+        """아이템 차감 (0개가 되면 행 삭제). (성공 여부, 메시지) 반환"""
+        exists, current_quantity = self._current(username, item)
+        if not exists:
+            return False, f"{item}을(를) 소지품에서 찾을 수 없습니다."
+        if current_quantity < quantity:
+            return False, f"{item}이(가) 부족합니다. (보유: {current_quantity}, 필요: {quantity})"
+
+        self._ops.append(('remove', username, item, quantity, self.timestamp))
+        return True, f"{item} {quantity}개를 제거했습니다."
+
+    def commit(self):
+        """모든 변경을 하나의 SQLite 트랜잭션으로 반영 (끝나면 유저 잠금 해제)"""
+        try:
+            return self._commit()
+        finally:
+            self.release()
+
+    def _commit(self):
+        if not self._ops:
+            return True
+
+        try:
+            usernames = {op[1] for op in self._ops}
+            for username in usernames:
+                self.store._ensure_user(username)
+
+            with self.store._write() as conn:
+                for op, username, item, amount, timestamp in self._ops:
+                    self.store._apply(conn, op, username, item, amount, timestamp)
+                for username in usernames:
+                    self.store._mark_dirty(conn, username)
+        except _TransactionAbort as e:
+            print(f"소지품 변경 취소: {e}")
+            return False
+        except Exception as e:
+            print(f"소지품 저장 중 오류 발생: {e}")
+            return False
+
+        self.store.notify_replicator()
+        return True
+
+
+class SQLiteInventoryManager:
+    """
+    소지품/갈레온/획득 로그를 로컬 SQLite에 저장하는 저장소
+
+    GoogleSheetsManager와 같은 공개 메서드를 제공하므로 MastodonBot은 설정만으로
+    저장소를 바꿀 수 있습니다. 키워드/가챠/상점 등 관리자가 편집하는 시트는
+    그대로 구글 시트에서 읽고, 변경된 소지품과 획득 로그는 백그라운드
+    복제 스레드가 기존 유저 시트와 획득 로그 시트에 반영합니다.
+    처음 보는 유저는 구글 시트의 소지품을 가져와 초기값으로 사용합니다.
+    """
+
+    def __init__(self, sheets_manager, db_path, replicate_interval=5):
+        self.sheets = sheets_manager
+        self.db_path = db_path
+        self.replicate_interval = replicate_interval
+
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+
+        self._local = threading.local()
+        # 유저별 트랜잭션 잠금 (읽기~커밋 구간 직렬화)
+        self.user_locks = UserLocks()
+        self._replicate_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._replicator_thread = None
+
+        # 로컬 저장소 기준 획득 로그 동기화 체크포인트
+        self.sync_checkpoint = SyncCheckpoint(os.path.splitext(db_path)[0] + '_sync_checkpoint.json')
+
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+
+    def _connection(self):
+        """현재 스레드 전용 SQLite 연결 (WAL 모드)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self):
+        """쓰기 트랜잭션 (BEGIN IMMEDIATE ~ COMMIT, 예외 시 ROLLBACK)"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            conn.execute('COMMIT')
+
+    # ------------------------------------------------------------------
+    # 유저 데이터 가져오기 / 내부 헬퍼
+    # ------------------------------------------------------------------
+
+    def _ensure_user(self, username):
+        """
+        처음 보는 유저면 구글 시트의 소지품을 가져와 저장
+
+        시트를 읽지 못하면 예외를 그대로 던집니다. 빈 소지품으로 가져오면 복제 스레드가
+        기존 시트를 빈 내용으로 덮어쓰므로, 시트가 없다고 확인된 경우에만 새 유저로 만듭니다.
+        """
+        conn = self._connection()
+        if conn.execute('SELECT 1 FROM users WHERE username = ?', (username,)).fetchone():
+            return
+
+        values = self.sheets.read_inventory_rows(username)
+        rows = []
+        for row in (values or [])[1:]:  # 헤더 제외
+            if not row or not row[0]:
+                continue
+            default = 0 if row[0] == '갈레온' else 1
+            acquired_at = row[1] if len(row) > 1 else ''
+            rows.append((row[0], acquired_at, parse_quantity(row, default)))
+
+        with self._write() as conn:
+            if conn.execute('SELECT 1 FROM users WHERE username = ?', (username,)).fetchone():
+                return
+            conn.execute(
+                'INSERT INTO users (username, imported_at) VALUES (?, ?)',
+                (username, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+            conn.executemany(
+                'INSERT INTO inventory (username, position, item, acquired_at, quantity) VALUES (?, ?, ?, ?, ?)',
+                [(username, position, item, acquired_at, quantity)
+                 for position, (item, acquired_at, quantity) in enumerate(rows, start=1)]
+            )
+            conn.execute(
+                'INSERT OR REPLACE INTO sheet_mirror (username, version, mirrored_version, mirrored_rows) '
+                'VALUES (?, 0, 0, ?)',
+                (username, len(values or []))
+            )
+
+    def _read_item(self, username, item):
+        self._ensure_user(username)
+        return self._connection().execute(
+            'SELECT position, quantity FROM inventory WHERE username = ? AND item = ? '
+            'ORDER BY position LIMIT 1',
+            (username, item)
+        ).fetchone()
+
+    def _apply(self, conn, op, username, item, amount, timestamp):
+        """트랜잭션 연산 하나를 연결에 적용"""
+        row = conn.execute(
+            'SELECT position, quantity FROM inventory WHERE username = ? AND item = ? '
+            'ORDER BY position LIMIT 1',
+            (username, item)
+        ).fetchone()
+
+        if op == 'remove':
+            if row is None:
+                raise _TransactionAbort(f"{username}: {item} 없음")
+            new_quantity = row['quantity'] - amount
+            if new_quantity < 0:
+                raise _TransactionAbort(f"{username}: {item} 부족")
+            if new_quantity == 0:
+                conn.execute('DELETE FROM inventory WHERE username = ? AND position = ?',
+                             (username, row['position']))
+            else:
+                conn.execute('UPDATE inventory SET quantity = ?, acquired_at = ? WHERE username = ? AND position = ?',
+                             (new_quantity, timestamp, username, row['position']))
+            return
+
+        if row is None:
+            position = conn.execute(
+                'SELECT COALESCE(MAX(position), 0) + 1 FROM inventory WHERE username = ?', (username,)
+            ).fetchone()[0]
+            conn.execute(
+                'INSERT INTO inventory (username, position, item, acquired_at, quantity) VALUES (?, ?, ?, ?, ?)',
+                (username, position, item, timestamp, amount)
+            )
+        else:
+            new_quantity = amount if op == 'set' else row['quantity'] + amount
+            conn.execute('UPDATE inventory SET quantity = ?, acquired_at = ? WHERE username = ? AND position = ?',
+                         (new_quantity, timestamp, username, row['position']))
+
+    def _mark_dirty(self, conn, username):
+        conn.execute(
+            'INSERT INTO sheet_mirror (username, version) VALUES (?, 1) '
+            'ON CONFLICT(username) DO UPDATE SET version = version + 1',
+            (username,)
+        )
+
+    # ------------------------------------------------------------------
+    # GoogleSheetsManager와 같은 공개 인터페이스
+    # ------------------------------------------------------------------
+
+    def get_keywords_data(self, sheet_name):
+        """키워드 데이터를 가져옴 (구글 시트)"""
+        return self.sheets.get_keywords_data(sheet_name)
+
+    def get_gacha_items(self, sheet_name):
+        """가챠 시트에서 아이템 목록을 가져옴 (구글 시트)"""
+        return self.sheets.get_gacha_items(sheet_name)
+
+    def get_gacha_config(self, sheet_name):
+        """가챠 시트의 아이템/등급표 원본 행 (구글 시트)"""
+        return self.sheets.get_gacha_config(sheet_name)
+
+    def get_store_items(self, sheet_name="상점"):
+        """상점 시트에서 아이템과 가격 정보를 가져옴 (구글 시트)"""
+        return self.sheets.get_store_items(sheet_name)
+
+    def setup_acquisition_log_sheet(self, sheet_name):
+        """획득 로그 시트에 헤더 설정 (구글 시트)"""
+        return self.sheets.setup_acquisition_log_sheet(sheet_name)
+
+    def api_metrics(self):
+        """복제에 쓰는 구글 시트 API 할당량 사용량과 재시도 카운터"""
+        return self.sheets.api_metrics()
+
+    def begin_transaction(self, *usernames):
+        """
+        여러 소지품/갈레온 변경을 한 번에 반영하는 트랜잭션 생성
+
+        건드릴 유저를 넘기면 이름순으로 미리 잠급니다 (with 블록으로 사용).
+        """
+        return SQLiteInventoryTransaction(self, usernames)
+
+    def prefetch_inventories(self, usernames):
+        """아직 가져오지 않은 유저의 소지품 시트를 한 번에 읽어 둠 (이미 DB에 있는 유저는 건너뜀)"""
+        conn = self._connection()
+        missing = [
+            username for username in set(usernames)
+            if not conn.execute('SELECT 1 FROM users WHERE username = ?', (username,)).fetchone()
+        ]
+        if not missing:
+            return 0
+        return self.sheets.prefetch_inventories(missing)
+
+    def invalidate_user_cache(self, username=None):
+        """
+        유저 데이터를 구글 시트에서 다시 가져오도록 표시
+
+        아직 시트에 복제되지 않은 변경이 있는 유저는 로컬 데이터를 유지합니다.
+        """
+        with self._write() as conn:
+            condition = 'mirrored_version = version'
+            params = ()
+            if username is not None:
+                condition += ' AND username = ?'
+                params = (username,)
+
+            targets = [row['username'] for row in conn.execute(
+                f'SELECT username FROM sheet_mirror WHERE {condition}', params
+            )]
+            for target in targets:
+                conn.execute('DELETE FROM inventory WHERE username = ?', (target,))
+                conn.execute('DELETE FROM users WHERE username = ?', (target,))
+        self.sheets.invalidate_user_cache(username)
+
+    def log_acquisition(self, sheet_name, username, item, timestamp=None):
+        """획득 로그를 기록 (시트에는 복제 스레드가 반영)"""
+        return self.append_acquisition_rows(sheet_name, [[
+            timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S"), username, item
+        ]])
+
+    def append_acquisition_rows(self, sheet_name, rows):
+        """획득 로그 여러 행 기록"""
+        try:
+            with self._write() as conn:
+                conn.executemany(
+                    'INSERT INTO acquisition_log (sheet_name, logged_at, username, item) VALUES (?, ?, ?, ?)',
+                    [(sheet_name, row[0], row[1], row[2]) for row in rows]
+                )
+            self.notify_replicator()
+            return True
+        except Exception as e:
+            print(f"획득 로그 기록 중 오류 발생: {e}")
+            return False
+
+    def create_user_inventory_sheet(self, username):
+        """유저 소지품 생성 (시트 탭은 복제 시 생성)"""
+        try:
+            self._ensure_user(username)
+            return True
+        except Exception as e:
+            print(f"{username} 소지품 생성 중 오류 발생: {e}")
+            return False
+
+    def add_item_to_user_inventory(self, username, item, timestamp=None, quantity=1):
+        """유저 소지품에 아이템 추가"""
+        try:
+            with self.begin_transaction(username) as txn:
+                txn.add_item(username, item, quantity, timestamp)
+                if not txn.commit():
+                    return False
+
+            print(f"{username} 소지품에 {item} 추가 완료 (수량: {quantity})")
+            return True
+        except Exception as e:
+            print(f"{username} 소지품 추가 중 오류 발생: {e}")
+            return False
+
+    def get_user_inventory(self, username):
+        """유저 소지품 조회"""
+        try:
+            self._ensure_user(username)
+            rows = self._connection().execute(
+                'SELECT item, acquired_at, quantity FROM inventory WHERE username = ? ORDER BY position',
+                (username,)
+            ).fetchall()
+            return [{'item': row['item'], 'date': row['acquired_at'], 'quantity': row['quantity']} for row in rows]
+        except Exception as e:
+            print(f"{username} 소지품 조회 중 오류 발생: {e}")
+            return []
+
+    def get_user_currency(self, username):
+        """유저의 갈레온 보유량 조회"""
+        try:
+            row = self._read_item(username, '갈레온')
+            return row['quantity'] if row else 0
+        except Exception as e:
+            print(f"{username} 갈레온 조회 중 오류 발생: {e}")
+            return 0
+
+    def get_all_balances(self):
+        """DB로 가져온 전체 유저의 갈레온 잔액 {유저: 잔액}"""
+        rows = self._connection().execute(
+            "SELECT username, quantity FROM inventory WHERE item = '갈레온' ORDER BY username, position DESC"
+        ).fetchall()
+        # 같은 유저에 갈레온 행이 여럿이면 첫 행 기준 (position 내림차순이라 마지막에 덮어씀)
+        return {row['username']: row['quantity'] for row in rows}
+
+    def credit_balances(self, amounts):
+        """여러 유저에게 갈레온 일괄 지급/차감 ({유저: 증감량})"""
+        try:
+            with self.begin_transaction(*amounts) as txn:
+                for username, amount in amounts.items():
+                    current = txn.get_quantity(username, '갈레온', default=0)
+                    txn.set_quantity(username, '갈레온', max(0, current + amount))
+                return txn.commit()
+        except Exception as e:
+            print(f"갈레온 일괄 지급 중 오류 발생: {e}")
+            return False
+
+    def update_user_currency(self, username, amount, operation='set'):
+        """유저의 갈레온 업데이트 (set: 설정, add: 추가, subtract: 차감)"""
+        try:
+            with self.begin_transaction(username) as txn:
+                current_amount = txn.get_quantity(username, '갈레온', default=0)
+
+                if operation == 'set':
+                    new_amount = amount
+                elif operation == 'add':
+                    new_amount = current_amount + amount
+                elif operation == 'subtract':
+                    new_amount = max(0, current_amount - amount)  # 음수 방지
+                else:
+                    return False
+
+                txn.set_quantity(username, '갈레온', new_amount)
+                if not txn.commit():
+                    return False
+
+            print(f"{username} 갈레온 업데이트: {current_amount} -> {new_amount}")
+            return True
+        except Exception as e:
+            print(f"{username} 갈레온 업데이트 중 오류 발생: {e}")
+            return False
+
+    def purchase_item(self, username, item_name, price):
+        """아이템 구매 처리 (갈레온 차감 및 아이템 추가)"""
+        try:
+            with self.begin_transaction(username) as txn:
+                current_currency = txn.get_quantity(username, '갈레온', default=0)
+
+                if current_currency < price:
+                    return False, f"갈레온이 부족합니다. (보유: {current_currency}, 필요: {price})"
+
+                new_currency = current_currency - price
+                txn.set_quantity(username, '갈레온', new_currency)
+                txn.add_item(username, item_name)
+                if not txn.commit():
+                    return False, "구매 처리 중 오류가 발생했습니다."
+
+            return True, f"{item_name}을(를) 구매했습니다! (잔액: {new_currency} 갈레온)"
+        except Exception as e:
+            print(f"{username} 아이템 구매 중 오류 발생: {e}")
+            return False, "구매 처리 중 오류가 발생했습니다."
+
+    def remove_item_from_inventory(self, username, item_name, quantity=1):
+        """유저 소지품에서 아이템 제거/차감"""
+        try:
+            with self.begin_transaction(username) as txn:
+                success, message = txn.remove_item(username, item_name, quantity)
+                if not success:
+                    return False, message
+                if not txn.commit():
+                    return False, "아이템 제거 중 오류가 발생했습니다."
+
+            print(f"{username}에서 {item_name} {quantity}개 제거 완료")
+            return True, message
+        except Exception as e:
+            print(f"{username} 아이템 제거 중 오류 발생: {e}")
+            return False, "아이템 제거 중 오류가 발생했습니다."
+
+    def transfer_item(self, from_user, to_user, item_name, quantity=1):
+        """유저간 아이템 양도"""
+        try:
+            with self.begin_transaction(from_user, to_user) as txn:
+                success, message = txn.remove_item(from_user, item_name, quantity)
+                if not success:
+                    return False, message
+
+                txn.add_item(to_user, item_name, quantity)
+                if not txn.commit():
+                    return False, "아이템 양도 중 오류가 발생했습니다."
+
+            print(f"아이템 양도 완료: {from_user} -> {to_user}, {item_name} x{quantity}")
+            return True, f"{item_name} {quantity}개를 {to_user}에게 양도했습니다."
+        except Exception as e:
+            print(f"아이템 양도 중 오류 발생: {e}")
+            return False, "아이템 양도 중 오류가 발생했습니다."
+
+    def sync_acquisitions_to_inventories(self, acquisition_sheet, dry_run=False):
+        """획득 로그 시트에서 각 유저 소지품으로 증분 동기화 (로컬 저장소에 반영)"""
+        try:
+            return sync_acquisitions(self, self.sheets, acquisition_sheet, self.sync_checkpoint, dry_run)
+        except Exception as e:
+            print(f"획득 로그 동기화 중 오류 발생: {e}")
+            return False
+
+    # ------------------------------------------------------------------
+    # 구글 시트 복제
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """복제 스레드 시작"""
+        if self._replicator_thread is None or not self._replicator_thread.is_alive():
+            self._stop_event.clear()
+            self._replicator_thread = threading.Thread(target=self._run_replicator, daemon=True)
+            self._replicator_thread.start()
+
+    def notify_replicator(self):
+        """변경이 생겼음을 복제 스레드에 알림"""
+        self._replicate_event.set()
+
+    def close(self):
+        """복제 스레드 중지 (남은 변경은 마지막으로 한 번 더 복제)"""
+        self._stop_event.set()
+        self._replicate_event.set()
+        if self._replicator_thread:
+            self._replicator_thread.join(timeout=30)
+        self.replicate()
+        self.sheets.close()
+
+    def _run_replicator(self):
+        while not self._stop_event.is_set():
+            self._replicate_event.wait(self.replicate_interval)
+            self._replicate_event.clear()
+            if self._stop_event.is_set():
+                break
+            self.replicate()
+
+    def replicate(self):
+        """아직 시트에 반영되지 않은 획득 로그와 소지품을 복제"""
+        try:
+            with background_priority():
+                self._replicate_acquisition_log()
+                self._replicate_inventories()
+        except Exception as e:
+            print(f"구글 시트 복제 중 오류 발생: {e}")
+
+    def _replicate_acquisition_log(self):
+        conn = self._connection()
+        pending = conn.execute(
+            'SELECT id, sheet_name, logged_at, username, item FROM acquisition_log '
+            'WHERE replicated = 0 ORDER BY id LIMIT 500'
+        ).fetchall()
+        if not pending:
+            return
+
+        by_sheet = {}
+        for row in pending:
+            by_sheet.setdefault(row['sheet_name'], []).append(row)
+
+        for sheet_name, rows in by_sheet.items():
+            values = [[row['logged_at'], row['username'], row['item']] for row in rows]
+            if self.sheets.append_acquisition_rows(sheet_name, values):
+                with self._write() as conn:
+                    conn.executemany('UPDATE acquisition_log SET replicated = 1 WHERE id = ?',
+                                     [(row['id'],) for row in rows])
+
+    def _replicate_inventories(self):
+        conn = self._connection()
+        dirty = conn.execute(
+            'SELECT username, version, mirrored_rows FROM sheet_mirror '
+            'WHERE version > mirrored_version LIMIT 50'
+        ).fetchall()
+        if not dirty:
+            return
+
+        rows_by_user = {}
+        for mirror in dirty:
+            rows = conn.execute(
+                'SELECT item, acquired_at, quantity FROM inventory WHERE username = ? ORDER BY position',
+                (mirror['username'],)
+            ).fetchall()
+            rows_by_user[mirror['username']] = (
+                [[row['item'], row['acquired_at'], row['quantity']] for row in rows],
+                mirror['mirrored_rows']
+            )
+
+        if not self.sheets.write_inventory_rows(rows_by_user):
+            return
+
+        with self._write() as conn:
+            for mirror in dirty:
+                username = mirror['username']
+                conn.execute(
+                    'UPDATE sheet_mirror SET mirrored_version = ?, mirrored_rows = ? WHERE username = ?',
+                    (mirror['version'], len(rows_by_user[username][0]) + 1, username)
+                )
@@ -0,0 +1,59 @@
+import copy
+import json
+import logging
+import os
+import threading
+
+
+class JSONStateStore:
+    """
+    작은 상태값을 JSON 파일 하나에 보관하는 저장소
+
+    시작할 때 한 번 읽어 메모리에 두고, 변경할 때마다 임시 파일에 쓴 뒤
+    os.replace로 바꿔 끼우므로 기록 도중 종료되어도 이전 상태가 남습니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.error(f"상태 파일을 읽을 수 없어 빈 상태로 시작합니다 ({self.path}): {e}")
+            return {}
+
+    def _write(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def get(self, key, default=None):
+        """값 조회 (복사본 반환)"""
+        with self._lock:
+            return copy.deepcopy(self._data.get(key, default))
+
+    def update(self, **values):
+        """여러 값을 한 번에 바꾸고 파일에 원자적으로 기록"""
+        with self._lock:
+            self._data.update(copy.deepcopy(values))
+            self._write()
+
+    def modify(self, key, func, default=None):
+        """key의 값을 func(현재값)의 결과로 바꾸고 기록 (읽기-수정-쓰기를 잠금 안에서 수행)"""
+        with self._lock:
+            value = func(copy.deepcopy(self._data.get(key, default)))
+            self._data[key] = value
+            self._write()
+            return copy.deepcopy(value)
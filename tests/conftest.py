@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# 봇 모듈은 저장소 최상위에 있으므로 테스트에서 바로 import할 수 있게 경로 추가
+BOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BOT_DIR))
@@ -0,0 +1,171 @@
+import re
+import threading
+import time
+
+from google_sheets import GoogleSheetsManager
+
+_RANGE_PATTERN = re.compile(r'^(?P<sheet>[^!]+)!A(?P<start>\d*):C(?P<end>\d*)$')
+
+
+class _Request:
+    def __init__(self, func):
+        self._func = func
+
+    def execute(self):
+        return self._func()
+
+
+class FakeSheetsService:
+    """
+    테스트용 메모리 구글 시트 (GoogleSheetsManager가 쓰는 A:C 범위 요청만 지원)
+
+    write_delay를 주면 쓰기 요청이 그만큼 늦게 끝나 동시 트랜잭션이 겹치도록 만들 수 있습니다.
+    """
+
+    def __init__(self, sheets=None, write_delay=0.0):
+        self.sheets = {}  # 시트 이름 -> 행 목록
+        self.sheet_ids = {}  # 시트 이름 -> 시트 ID
+        self.write_delay = write_delay
+        self.calls = []  # (요청 종류, 인자)
+        self.fail_next = {}  # 요청 종류 -> 던질 예외 (한 번만)
+        self._lock = threading.Lock()
+        for name, rows in (sheets or {}).items():
+            self.add_sheet(name, rows)
+
+    def add_sheet(self, name, rows=()):
+        self.sheets[name] = [[str(value) for value in row] for row in rows]
+        self.sheet_ids[name] = len(self.sheet_ids) + 1
+
+    def rows(self, name):
+        """빈 행을 뺀 시트 내용"""
+        return [row for row in self.sheets[name] if any(row)]
+
+    # 구글 API 클라이언트와 같은 호출 형태
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return _ValuesResource(self)
+
+    def get(self, spreadsheetId, fields=None):
+        return _Request(lambda: self._call('get', fields, lambda: {
+            'sheets': [{'properties': {'title': name, 'sheetId': sheet_id}}
+                       for name, sheet_id in self.sheet_ids.items()]
+        }))
+
+    def batchUpdate(self, spreadsheetId, body):
+        return _Request(lambda: self._call('batchUpdate', body, lambda: self._batch_update(body)))
+
+    def _call(self, kind, args, func):
+        error = self.fail_next.pop(kind, None)
+        if error is not None:
+            raise error
+        with self._lock:
+            self.calls.append((kind, args))
+        return func()
+
+    def _write(self, func):
+        if self.write_delay:
+            time.sleep(self.write_delay)
+        with self._lock:
+            return func()
+
+    def _batch_update(self, body):
+        def apply():
+            replies = []
+            deletes = []
+            for request in body['requests']:
+                if 'addSheet' in request:
+                    title = request['addSheet']['properties']['title']
+                    self.add_sheet(title)
+                    replies.append({'addSheet': {'properties': {'title': title, 'sheetId': self.sheet_ids[title]}}})
+                elif 'updateCells' in request:
+                    update = request['updateCells']
+                    name = self._sheet_name(update['start']['sheetId'])
+                    values = [str(next(iter(cell['userEnteredValue'].values())))
+                              for cell in update['rows'][0]['values']]
+                    self._set_row(name, update['start']['rowIndex'] + 1, values)
+                    replies.append({})
+                elif 'deleteDimension' in request:
+                    deletes.append(request['deleteDimension']['range'])
+                    replies.append({})
+            for dimension in deletes:
+                del self.sheets[self._sheet_name(dimension['sheetId'])][dimension['startIndex']]
+            return {'replies': replies}
+        return self._write(apply)
+
+    def _sheet_name(self, sheet_id):
+        return next(name for name, value in self.sheet_ids.items() if value == sheet_id)
+
+    def _set_row(self, name, row_number, values):
+        rows = self.sheets[name]
+        while len(rows) < row_number:
+            rows.append([])
+        rows[row_number - 1] = [str(value) for value in values]
+
+    def _read(self, range_name):
+        match = _RANGE_PATTERN.match(range_name)
+        rows = self.sheets[match.group('sheet')]
+        # 실제 API처럼 끝의 빈 행은 돌려주지 않음
+        while rows and not any(rows[-1]):
+            rows = rows[:-1]
+        return {'range': range_name, 'values': [list(row) for row in rows]}
+
+
+class _ValuesResource:
+    def __init__(self, service):
+        self.service = service
+
+    def get(self, spreadsheetId, range):
+        return _Request(lambda: self.service._call('values.get', range, lambda: self.service._read(range)))
+
+    def batchGet(self, spreadsheetId, ranges):
+        return _Request(lambda: self.service._call('values.batchGet', ranges, lambda: {
+            'valueRanges': [self.service._read(range_name) for range_name in ranges]
+        }))
+
+    def update(self, spreadsheetId, range, valueInputOption, body):
+        return _Request(lambda: self.service._call('values.update', range, lambda: self._update(range, body)))
+
+    def append(self, spreadsheetId, range, valueInputOption, insertDataOption, body):
+        return _Request(lambda: self.service._call('values.append', range, lambda: self.service._write(
+            lambda: self._append_locked(range, body)
+        )))
+
+    def batchUpdate(self, spreadsheetId, body):
+        return _Request(lambda: self.service._call('values.batchUpdate', body, lambda: self.service._write(
+            lambda: [self._update_locked(data['range'], data) for data in body['data']]
+        )))
+
+    def _update(self, range_name, body):
+        return self.service._write(lambda: self._update_locked(range_name, body))
+
+    def _append_locked(self, range_name, body):
+        sheet = _RANGE_PATTERN.match(range_name).group('sheet')
+        start = len(self.service.rows(sheet)) + 1
+        for offset, values in enumerate(body['values']):
+            self.service._set_row(sheet, start + offset, values)
+        end = start + len(body['values']) - 1
+        return {'updates': {'updatedRange': f'{sheet}!A{start}:C{end}'}}
+
+    def _update_locked(self, range_name, body):
+        match = _RANGE_PATTERN.match(range_name)
+        start = int(match.group('start') or 1)
+        for offset, values in enumerate(body['values']):
+            self.service._set_row(match.group('sheet'), start + offset, values)
+        return {}
+
+
+class FakeSheetsManager(GoogleSheetsManager):
+    """가짜 시트 서비스를 쓰는 GoogleSheetsManager (할당량 대기 없이 바로 실행)"""
+
+    def __init__(self, fake_service, **kwargs):
+        self.fake_service = fake_service
+        super().__init__(None, 'spreadsheet', **kwargs)
+
+    @property
+    def service(self):
+        return self.fake_service
+
+    def _execute(self, request):
+        return request.execute()
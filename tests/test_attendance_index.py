@@ -0,0 +1,34 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from attendance_index import AttendanceIndex
+
+
+class AttendanceIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'attendance_index.json')
+        self.index = AttendanceIndex(self.path)
+
+    def test_claim_once_per_day_and_survives_restart(self):
+        self.assertTrue(self.index.claim('alice', '2024-01-01'))
+        self.assertFalse(self.index.claim('alice', '2024-01-01'))
+
+        reloaded = AttendanceIndex(self.path)
+        self.assertTrue(reloaded.has_attended('alice', '2024-01-01'))
+        self.assertTrue(reloaded.claim('alice', '2024-01-02'))
+        self.assertEqual(reloaded.daily_counts(), {'2024-01-01': 1, '2024-01-02': 1})
+
+    def test_failed_save_does_not_mark_user_as_claimed(self):
+        with mock.patch.object(self.index.store, 'update', side_effect=OSError("디스크 가득 참")):
+            with self.assertRaises(OSError):
+                self.index.claim('alice', '2024-01-01')
+
+        self.assertFalse(self.index.has_attended('alice', '2024-01-01'))
+        self.assertEqual(self.index.daily_counts(), {'2024-01-01': 0})
+        self.assertTrue(self.index.claim('alice', '2024-01-01'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import re
+import unittest
+
+from command_router import Command, CommandContext, CommandRouter
+
+
+class CommandRouterTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.router = CommandRouter()
+        self.router.register('inventory', lambda ctx: self.calls.append('inventory'), ('소지품', '인벤토리'))
+        self.router.register('gacha', lambda ctx: self.calls.append('gacha'), ('가챠',))
+        self.router.register('purchase', lambda ctx: self.calls.append('purchase'), ('구매',),
+                             match=Command.MATCH_PREFIX)
+        self.router.register('dice', lambda ctx: self.calls.append('dice'), ('1d100',),
+                             pattern=re.compile(r'\d*d\d+'))
+
+    def dispatch(self, text):
+        return self.router.dispatch(CommandContext('alice', '1', text))
+
+    def test_first_word_is_dispatched_directly(self):
+        self.assertTrue(self.dispatch('가챠 소지품'))
+        self.assertEqual(self.calls, ['gacha'])
+
+    def test_fallback_matching_follows_registration_order(self):
+        self.assertTrue(self.dispatch('오늘 가챠 하고 소지품 볼래요'))
+        self.assertEqual(self.calls, ['inventory'])
+
+    def test_prefix_command_matches_only_at_start(self):
+        self.assertFalse(self.dispatch('상점에서 구매'))
+        self.assertTrue(self.dispatch('구매하기 투명 망토'))
+        self.assertEqual(self.calls, ['purchase'])
+
+    def test_pattern_matches_only_at_start(self):
+        self.assertTrue(self.dispatch('2d6+3'))
+        self.assertFalse(self.dispatch('room d4 please'))
+        self.assertEqual(self.calls, ['dice'])
+
+    def test_duplicate_keyword_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.router.register('shop', lambda ctx: None, ('가챠',))
+
+    def test_stats_and_timing_hooks_count_failed_calls(self):
+        timings = []
+        self.router.add_timing_hook(lambda name, elapsed, ctx: timings.append(name))
+        self.router.register('broken', lambda ctx: 1 / 0, ('고장',))
+
+        with self.assertRaises(ZeroDivisionError):
+            self.dispatch('고장')
+        self.assertEqual(timings, ['broken'])
+        stats = self.router.stats()['broken']
+        self.assertEqual((stats['calls'], stats['errors']), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
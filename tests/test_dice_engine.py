@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+
+import dice_engine
+from command_router import CommandContext, CommandRouter
+
+
+class FormatResultsTest(unittest.TestCase):
+    def roll(self, text):
+        return dice_engine.roll_text(text, np.random.default_rng(0), default='1d100')
+
+    def test_long_details_fall_back_to_totals(self):
+        results = self.roll(' '.join(['20d6'] * dice_engine.MAX_EXPRESSIONS))
+        self.assertGreater(len("\n".join(detail for _, _, detail in results)), dice_engine.MAX_REPLY_LENGTH)
+
+        text = dice_engine.format_results(results, dice_engine.MAX_REPLY_LENGTH - len("@user "))
+        self.assertLessEqual(len(text), dice_engine.MAX_REPLY_LENGTH - len("@user "))
+        self.assertEqual(len(text.splitlines()), dice_engine.MAX_EXPRESSIONS)
+        self.assertTrue(text.startswith('20d6 = '))
+
+    def test_raises_when_totals_do_not_fit(self):
+        results = self.roll(' '.join(['20d6'] * dice_engine.MAX_EXPRESSIONS))
+        with self.assertRaises(dice_engine.DiceError):
+            dice_engine.format_results(results, 50)
+
+    def test_single_1d100_keeps_old_format(self):
+        results = self.roll('1d100')
+        self.assertEqual(dice_engine.format_results(results), f"{results[0][1]}이 나왔습니다!")
+
+
+class DiceRoutingTest(unittest.TestCase):
+    def setUp(self):
+        self.router = CommandRouter()
+        self.router.register('dice', lambda ctx: None, ('1d100',), pattern=dice_engine.DICE_COMMAND_PATTERN)
+
+    def routes_to_dice(self, text):
+        return self.router.resolve(CommandContext('user', '1', text)) is not None
+
+    def test_leading_expression_or_verb_routes_to_dice(self):
+        for text in ('2d6+3', '4d6kh3 공격', 'd20', '주사위 2d6', 'roll 3d6', '오늘 운세 1d100'):
+            self.assertTrue(self.routes_to_dice(text), text)
+
+    def test_expression_inside_text_goes_to_keywords(self):
+        for text in ('hello d2', '마법d4', 'HP 10d10', '주사위'):
+            self.assertFalse(self.routes_to_dice(text), text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from gacha_system import AliasTable, GachaSystem, build_sheet_pool
+
+SHEET_ROWS = [
+    ['아이템', '등급', '가중치', '', '등급', '확률', '천장'],
+    ['불사조 깃털', 'SSR', '1', '', 'SSR', '1', '90'],
+    ['은의 검', 'SR', '1', '', 'SR', '9', '10'],
+    ['나무 막대', 'N', '3', '', 'N', '90', ''],
+    ['돌멩이', 'N', '1'],
+]
+
+
+def alias_probabilities(table):
+    """별칭 테이블이 실제로 뽑는 확률 (칸마다 자기 자신 prob, 나머지는 alias)"""
+    probabilities = [0.0] * table.size
+    for column in range(table.size):
+        probabilities[column] += table.prob[column] / table.size
+        probabilities[table.alias[column]] += (1.0 - table.prob[column]) / table.size
+    return probabilities
+
+
+class AliasTableTest(unittest.TestCase):
+    def test_table_reproduces_weights_exactly(self):
+        weights = [1, 5, 15, 79, 0.5]
+        table = AliasTable(weights)
+        total = sum(weights)
+        for actual, weight in zip(alias_probabilities(table), weights):
+            self.assertAlmostEqual(actual, weight / total, places=12)
+
+    def test_seeded_samples_follow_weights(self):
+        table = AliasTable([1, 2, 7])
+        draws = 100000
+
+        counts = np.bincount(table.sample_many(draws, np.random.default_rng(1234)), minlength=3)
+        np.testing.assert_allclose(counts / draws, [0.1, 0.2, 0.7], atol=0.005)
+
+        rng = random.Random(1234)
+        counts = np.bincount([table.sample(rng) for _ in range(draws)], minlength=3)
+        np.testing.assert_allclose(counts / draws, [0.1, 0.2, 0.7], atol=0.005)
+
+    def test_empty_or_zero_weights_are_rejected(self):
+        with self.assertRaises(ValueError):
+            AliasTable([])
+        with self.assertRaises(ValueError):
+            AliasTable([0, 0])
+
+
+class GachaPityTest(unittest.TestCase):
+    def setUp(self):
+        self.pool = build_sheet_pool(SHEET_ROWS)
+
+    def test_hard_pity_is_never_exceeded(self):
+        pity = {}
+        results = self.pool.draw_many(5000, np.random.default_rng(42), pity)
+
+        since = {'SSR': 0, 'SR': 0}
+        for _, rarity in results:
+            for name, limit in (('SSR', 90), ('SR', 10)):
+                if rarity == 'SSR' or rarity == name:
+                    since[name] = 0
+                else:
+                    since[name] += 1
+                self.assertLess(since[name], limit, f"{name} 천장 초과")
+        self.assertEqual(pity, since)
+
+    def test_pity_counter_forces_tier_on_last_pull(self):
+        pity = {'SSR': 89, 'SR': 3}
+        item, rarity = self.pool.draw(random.Random(0), pity)
+        self.assertEqual((item, rarity), ('불사조 깃털', 'SSR'))
+        # 더 흔한 등급의 카운터도 함께 초기화
+        self.assertEqual(pity, {'SSR': 0, 'SR': 0})
+
+    def test_common_pull_advances_rarer_counters(self):
+        pity = {'SSR': 5, 'SR': 2}
+        self.pool._advance_pity(pity, self.pool.tiers[2])
+        self.assertEqual(pity, {'SSR': 6, 'SR': 3})
+        self.pool._advance_pity(pity, self.pool.tiers[1])
+        self.assertEqual(pity, {'SSR': 7, 'SR': 0})
+
+
+class GachaSystemTest(unittest.TestCase):
+    def make_system(self, loader=None):
+        directory = tempfile.mkdtemp()
+        return GachaSystem(os.path.join(directory, 'gacha_pity.json'), loader=loader)
+
+    def test_legacy_draw_does_not_replace_sheet_pool(self):
+        system = self.make_system()
+        pool = system.load(SHEET_ROWS)
+
+        system.get_random_item(['아이템 1', '아이템 2'], random.Random(0))
+
+        self.assertIs(system.pool, pool)
+        results, _ = system.draw(20, generator=np.random.default_rng(0))
+        self.assertTrue({rarity for _, rarity in results} <= {'SSR', 'SR', 'N'})
+
+    def test_failed_refresh_keeps_current_pool(self):
+        responses = [SHEET_ROWS, []]
+        system = self.make_system(loader=lambda: responses.pop(0))
+
+        pool = system.current_pool()
+        self.assertIsNotNone(pool)
+        self.assertIs(system.refresh(), pool)
+        self.assertIs(system.current_pool(), pool)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+
+from google_sheets import INVENTORY_HEADER
+from fake_sheets import FakeSheetsManager, FakeSheetsService
+
+
+class GetAllBalancesTest(unittest.TestCase):
+    def setUp(self):
+        self.service = FakeSheetsService({
+            '키워드': [['키워드', '응답'], ['안녕', '안녕하세요!']],
+            'acquisition_log': [['시간', '유저', '아이템'], ['2024-01-01 00:00:00', 'alice', '갈레온']],
+            'alice': [INVENTORY_HEADER, ['갈레온', '', '10']],
+            'bob': [INVENTORY_HEADER, ['투명 망토', '', '1']],
+        })
+        self.manager = FakeSheetsManager(self.service, non_inventory_sheets={'키워드', 'acquisition_log'})
+
+    def test_only_inventory_tabs_are_read_and_cached(self):
+        self.assertEqual(self.manager.get_all_balances(), {'alice': 10, 'bob': 0})
+
+        batch_gets = [args for kind, args in self.service.calls if kind == 'values.batchGet']
+        self.assertEqual(batch_gets, [['alice!A:C', 'bob!A:C']])
+        self.assertFalse(self.manager.inventory_cache.contains('키워드'))
+        self.assertFalse(self.manager.inventory_cache.contains('acquisition_log'))
+
+
+if __name__ == '__main__':
+    unittest.main()
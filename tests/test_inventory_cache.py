@@ -0,0 +1,79 @@
+import unittest
+
+from google_sheets import INVENTORY_HEADER
+from inventory_cache import InventoryCache
+
+ROWS = [
+    INVENTORY_HEADER,
+    ['갈레온', '', '10'],
+    ['마법 지팡이', '', '1'],
+    ['투명 망토', '', '1'],
+    ['마법 지팡이', '', '2'],
+    ['부엉이', '', '1'],
+]
+
+
+class InventoryCacheIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = InventoryCache(ttl=None)
+        self.cache.put('alice', ROWS)
+
+    def assertRowsMatchLookups(self):
+        """인덱스로 찾은 행이 실제 행 목록의 같은 이름 첫 행과 같은지 확인"""
+        rows = self.cache.get('alice')
+        for item in {row[0] for row in rows[1:] if row}:
+            expected = next(number for number, row in enumerate(rows[1:], start=2) if row and row[0] == item)
+            self.assertEqual(self.cache.lookup('alice', item), (expected, rows[expected - 1]), item)
+
+    def test_delete_row_shifts_rows_below(self):
+        self.cache.delete_row('alice', 2)
+
+        self.assertEqual(self.cache.lookup('alice', '갈레온'), (None, None))
+        self.assertEqual(self.cache.lookup('alice', '마법 지팡이')[0], 2)
+        self.assertEqual(self.cache.lookup('alice', '부엉이')[0], 5)
+        self.assertRowsMatchLookups()
+
+    def test_deleting_first_duplicate_points_to_next_one(self):
+        self.cache.delete_row('alice', 3)
+
+        self.assertEqual(self.cache.lookup('alice', '마법 지팡이'), (4, ['마법 지팡이', '', '2']))
+        self.assertRowsMatchLookups()
+
+    def test_deleting_rows_bottom_up_keeps_index_consistent(self):
+        for row_number in (6, 5, 2):
+            self.cache.delete_row('alice', row_number)
+
+        self.assertEqual(self.cache.row_count('alice'), 3)
+        self.assertEqual(self.cache.lookup('alice', '투명 망토')[0], 3)
+        self.assertRowsMatchLookups()
+
+    def test_append_row_indexes_new_item(self):
+        self.cache.append_row('alice', ['불사조 깃털', '', '1'])
+        self.cache.append_row('alice', ['마법 지팡이', '', '5'])
+
+        self.assertEqual(self.cache.lookup('alice', '불사조 깃털')[0], 7)
+        # 같은 이름은 첫 행을 계속 가리킴
+        self.assertEqual(self.cache.lookup('alice', '마법 지팡이')[0], 3)
+        self.assertRowsMatchLookups()
+
+    def test_append_at_known_row_after_delete(self):
+        self.cache.delete_row('alice', 4)
+        self.cache.append_row('alice', ['불사조 깃털', '', '1'], row_number=6)
+
+        self.assertEqual(self.cache.lookup('alice', '불사조 깃털')[0], 6)
+        self.assertRowsMatchLookups()
+
+    def test_append_at_mismatched_row_drops_cache(self):
+        self.cache.append_row('alice', ['불사조 깃털', '', '1'], row_number=3)
+        self.assertFalse(self.cache.contains('alice'))
+
+    def test_update_row_renaming_item_reindexes(self):
+        self.cache.update_row('alice', 3, ['불사조 깃털', '', '1'])
+
+        self.assertEqual(self.cache.lookup('alice', '불사조 깃털')[0], 3)
+        self.assertEqual(self.cache.lookup('alice', '마법 지팡이')[0], 5)
+        self.assertRowsMatchLookups()
+
+
+if __name__ == '__main__':
+    unittest.main()
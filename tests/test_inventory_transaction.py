@@ -0,0 +1,105 @@
+import threading
+import time
+import unittest
+
+from google_sheets import INVENTORY_HEADER
+from fake_sheets import FakeSheetsManager, FakeSheetsService
+
+
+def inventory(service, username):
+    """{아이템: 수량} (헤더 제외)"""
+    return {row[0]: int(row[2]) for row in service.rows(username)[1:]}
+
+
+class ConcurrentTransactionTest(unittest.TestCase):
+    def setUp(self):
+        # 쓰기가 늦게 끝나도록 해 잠금이 없으면 두 트랜잭션이 같은 캐시 값을 읽게 만듦
+        self.service = FakeSheetsService({
+            'alice': [INVENTORY_HEADER, ['갈레온', '', '10'], ['마법 지팡이', '', '3']],
+            'bob': [INVENTORY_HEADER, ['갈레온', '', '20']],
+        }, write_delay=0.2)
+        self.manager = FakeSheetsManager(self.service)
+
+    def run_concurrently(self, *targets):
+        results = [None] * len(targets)
+        start = threading.Barrier(len(targets))
+
+        def run(index, target):
+            start.wait()
+            results[index] = target()
+
+        threads = [threading.Thread(target=run, args=(index, target)) for index, target in enumerate(targets)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+            self.assertFalse(thread.is_alive(), "트랜잭션이 끝나지 않음 (교착)")
+        return results
+
+    def test_transfer_and_recipient_purchase_do_not_overwrite_each_other(self):
+        results = self.run_concurrently(
+            lambda: self.manager.transfer_item('alice', 'bob', '마법 지팡이', 1),
+            lambda: self.manager.purchase_item('bob', '투명 망토', 5),
+        )
+        self.assertTrue(all(success for success, _ in results), results)
+
+        self.assertEqual(inventory(self.service, 'alice'), {'갈레온': 10, '마법 지팡이': 2})
+        self.assertEqual(inventory(self.service, 'bob'), {'갈레온': 15, '마법 지팡이': 1, '투명 망토': 1})
+
+    def test_opposite_transfers_do_not_deadlock(self):
+        self.service.sheets['bob'].append(['투명 망토', '', '2'])
+        results = self.run_concurrently(
+            lambda: self.manager.transfer_item('alice', 'bob', '마법 지팡이', 1),
+            lambda: self.manager.transfer_item('bob', 'alice', '투명 망토', 1),
+        )
+        self.assertTrue(all(success for success, _ in results), results)
+
+        self.assertEqual(inventory(self.service, 'alice'), {'갈레온': 10, '마법 지팡이': 2, '투명 망토': 1})
+        self.assertEqual(inventory(self.service, 'bob'), {'갈레온': 20, '투명 망토': 1, '마법 지팡이': 1})
+
+    def test_locks_are_released_when_transaction_is_abandoned(self):
+        success, _ = self.manager.purchase_item('bob', '투명 망토', 100)
+        self.assertFalse(success)
+
+        acquired = []
+        thread = threading.Thread(
+            target=lambda: acquired.append(self.manager.user_locks.get('bob').acquire(timeout=1))
+        )
+        thread.start()
+        thread.join()
+        self.assertEqual(acquired, [True])
+
+
+class LedgerCreditTest(unittest.TestCase):
+    def setUp(self):
+        self.service = FakeSheetsService({
+            '갈레온장부': [['유저', '잔액', '갱신 시각'], ['alice', '100', ''], ['bob', '20', '']],
+            'alice': [INVENTORY_HEADER],
+            'bob': [INVENTORY_HEADER],
+        }, write_delay=0.2)
+        self.manager = FakeSheetsManager(self.service, currency_ledger_sheet='갈레온장부')
+
+    def ledger(self):
+        return {row[0]: int(row[1]) for row in self.service.rows('갈레온장부')[1:]}
+
+    def test_bulk_credit_and_purchase_do_not_overwrite_each_other(self):
+        results = self.run_concurrently(
+            lambda: self.manager.purchase_item('alice', '투명 망토', 10),
+            # 구매가 잔액을 먼저 읽은 뒤 커밋하는 사이에 일괄 지급이 끼어들도록 조금 늦게 시작
+            lambda: time.sleep(0.05) or self.manager.credit_balances({'alice': 50, 'bob': 5}),
+        )
+        self.assertTrue(results[0][0], results)
+        self.assertTrue(results[1], results)
+
+        self.assertEqual(self.ledger(), {'alice': 140, 'bob': 25})
+        self.assertEqual(self.manager.get_user_currency('alice'), 140)
+
+    def test_bulk_credit_adds_ledger_rows_for_new_users(self):
+        self.assertTrue(self.manager.credit_balances({'carol': 30, 'alice': -200}))
+        self.assertEqual(self.ledger(), {'alice': 0, 'bob': 20, 'carol': 30})
+
+    run_concurrently = ConcurrentTransactionTest.run_concurrently
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from keyword_matcher import KeywordIndex, KeywordMatcher
+
+
+class KeywordIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = KeywordIndex({
+            '안녕': '안녕하세요!',
+            '안녕하세요': '반가워요!',
+            '마법': '마법 수업은 3층입니다.',
+            'Hogwarts': '호그와트에 오신 것을 환영합니다.',
+        })
+
+    def test_exact_match_wins_over_earlier_contains_match(self):
+        # '안녕'이 시트에서 먼저지만 본문 전체와 일치하는 키워드를 우선
+        self.assertEqual(self.index.find('안녕하세요'), '반가워요!')
+
+    def test_earliest_keyword_in_sheet_order_wins(self):
+        self.assertEqual(self.index.find('마법사님 안녕하세요 반가워요'), '안녕하세요!')
+        self.assertEqual(self.index.find('오늘 마법 수업 어디서 해요'), '마법 수업은 3층입니다.')
+
+    def test_match_is_case_insensitive(self):
+        self.assertEqual(self.index.find('hogwarts'), '호그와트에 오신 것을 환영합니다.')
+        self.assertEqual(self.index.find('I love HOGWARTS!'), '호그와트에 오신 것을 환영합니다.')
+
+    def test_overlapping_keywords_follow_failure_links(self):
+        index = KeywordIndex({'abcd': '첫 번째', 'bc': '두 번째'})
+        self.assertEqual(index.find('xabcx'), '두 번째')
+        self.assertEqual(index.find('xabcdx'), '첫 번째')
+
+    def test_no_match_returns_none(self):
+        self.assertIsNone(self.index.find('퀴디치 경기 언제예요'))
+
+
+class KeywordMatcherTest(unittest.TestCase):
+    def test_failed_reload_keeps_previous_index(self):
+        responses = [{'안녕': '안녕하세요!'}, {}]
+        matcher = KeywordMatcher(lambda: responses.pop(0))
+
+        self.assertEqual(matcher.find('안녕'), '안녕하세요!')
+        index = matcher._index
+        self.assertIs(matcher.refresh(), index)
+
+    def test_unchanged_sheet_reuses_index(self):
+        matcher = KeywordMatcher(lambda: {'안녕': '안녕하세요!'})
+        self.assertIs(matcher.refresh(), matcher.refresh())
+
+
+if __name__ == '__main__':
+    unittest.main()
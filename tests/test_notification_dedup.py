@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+
+from notification_dedup import ProcessedNotificationStore
+
+
+class ProcessedNotificationStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'processed.db')
+        self.store = ProcessedNotificationStore(self.path, capacity=10)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_last_id_waits_for_unfinished_mentions(self):
+        self.assertTrue(self.store.begin('s1', '101'))
+        self.assertTrue(self.store.begin('s2', '102'))
+        self.store.mark_seen('103')
+        self.assertIsNone(self.store.last_notification_id)
+
+        # 늦게 받은 멘션이 먼저 끝나도 앞선 멘션이 끝날 때까지 기준 ID는 그대로
+        self.store.finish('s2')
+        self.assertIsNone(self.store.last_notification_id)
+        self.assertIn('s2', self.store)  # 처리 완료는 바로 기록됨
+
+        self.store.finish('s1')
+        self.assertEqual(self.store.last_notification_id, '103')
+
+    def test_duplicates_are_skipped_while_in_flight_and_after_finish(self):
+        self.assertTrue(self.store.begin('s1', '101'))
+        self.assertFalse(self.store.begin('s1', '101'))
+        self.store.finish('s1')
+        self.assertFalse(self.store.begin('s1', '101'))
+        self.assertEqual(self.store.last_notification_id, '101')
+
+    def test_unfinished_mentions_are_caught_up_after_restart(self):
+        self.store.begin('s1', '101')
+        self.store.finish('s1')
+        self.store.begin('s2', '102')  # 처리 도중 종료
+        self.store.close()
+
+        self.store = ProcessedNotificationStore(self.path, capacity=10)
+        self.assertEqual(self.store.last_notification_id, '101')
+        self.assertTrue(self.store.begin('s2', '102'))
+        self.assertFalse(self.store.begin('s1', '101'))
+
+    def test_released_mention_holds_last_id_until_retried(self):
+        self.store.begin('s1', '101')
+        self.store.release('s1')
+        self.store.mark_seen('102')
+        self.assertIsNone(self.store.last_notification_id)
+        self.assertNotIn('s1', self.store)
+
+        self.assertTrue(self.store.begin('s1', '101'))
+        self.store.finish('s1')
+        self.assertEqual(self.store.last_notification_id, '102')
+
+
+if __name__ == '__main__':
+    unittest.main()
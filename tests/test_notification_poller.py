@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+from notification_dedup import ProcessedNotificationStore
+from notification_poller import NotificationPoller, fetch_mentions_since
+
+
+def mention(notification_id, status_id=None, username='alice'):
+    status = None
+    if status_id is not None:
+        status = {'id': status_id, 'account': {'username': username}, 'content': '소지품'}
+    return {'id': notification_id, 'type': 'mention', 'status': status}
+
+
+class FakeMastodon:
+    def __init__(self, notifications):
+        self.notifications_by_id = notifications
+        self.requests = []
+        self.markers = []
+
+    def notifications(self, min_id=None, limit=40, types=None):
+        self.requests.append((min_id, types))
+        newer = [n for n in self.notifications_by_id if int(n['id']) > int(min_id)]
+        # 마스토돈처럼 최신 순으로 min_id 바로 다음 페이지를 돌려줌
+        return list(reversed(newer[:limit]))
+
+    def markers_set(self, timelines, last_read_ids):
+        self.markers.append(last_read_ids[0])
+
+
+class FakeSheets:
+    def prefetch_inventories(self, usernames):
+        pass
+
+
+class FakeBot:
+    def __init__(self, mastodon, store):
+        self.mastodon = mastodon
+        self.processed_notifications = store
+        self.google_sheets = FakeSheets()
+        self.submitted = []
+
+    def submit_mention(self, status):
+        self.submitted.append(status['id'])
+
+
+class NotificationPollerTest(unittest.TestCase):
+    def setUp(self):
+        self.store = ProcessedNotificationStore(os.path.join(tempfile.mkdtemp(), 'processed.db'))
+        self.store.update_last_notification_id('100')
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_fetch_pages_forward_and_requests_mentions_only(self):
+        mastodon = FakeMastodon([mention(str(i), f's{i}') for i in range(101, 106)])
+        notifications = fetch_mentions_since(mastodon, '100', page_limit=2)
+
+        self.assertEqual([n['id'] for n in notifications], ['101', '102', '103', '104', '105'])
+        self.assertEqual(mastodon.requests, [('100', ['mention']), ('102', ['mention']), ('104', ['mention'])])
+
+    def test_deleted_mention_advances_last_id_and_live_mentions_wait_for_handler(self):
+        mastodon = FakeMastodon([mention('101'), mention('102', 's2')])
+        bot = FakeBot(mastodon, self.store)
+        poller = NotificationPoller(bot)
+
+        self.assertEqual(poller.poll_once(), 1)
+        self.assertEqual(bot.submitted, ['s2'])
+        self.assertEqual(mastodon.markers, ['102'])
+        # 삭제된 멘션까지만 앞당기고, 처리 중인 멘션은 핸들러가 끝난 뒤 반영
+        self.assertEqual(self.store.last_notification_id, '101')
+
+        self.store.finish('s2')
+        self.assertEqual(self.store.last_notification_id, '102')
+
+
+if __name__ == '__main__':
+    unittest.main()
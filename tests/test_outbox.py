@@ -0,0 +1,100 @@
+import os
+import tempfile
+import time
+import unittest
+
+from mastodon.errors import MastodonAPIError
+
+from outbox import ReplyOutbox
+
+
+class FakeMastodon:
+    """status_post 호출을 기록하고, 지정한 횟수만큼 429로 거부하는 가짜 클라이언트"""
+
+    def __init__(self, rate_limited_calls=0):
+        self.rate_limited_calls = rate_limited_calls
+        self.calls = []
+        self.posted = []
+        # 초기화 시각이 이미 지난 상태 (Mastodon.py가 429를 일반 API 오류로 던지는 경우)
+        self.ratelimit_reset = time.time() - 1
+        self.ratelimit_remaining = None
+        self.ratelimit_limit = None
+
+    def status_post(self, message, in_reply_to_id=None, visibility='public', idempotency_key=None):
+        self.calls.append(idempotency_key)
+        if len(self.calls) <= self.rate_limited_calls:
+            raise MastodonAPIError('Mastodon API returned error', 429, 'Too Many Requests', None)
+        self.posted.append((message, in_reply_to_id, idempotency_key))
+        return {'id': str(len(self.posted))}
+
+
+class ReplyOutboxRateLimitTest(unittest.TestCase):
+    def make_outbox(self, mastodon):
+        directory = tempfile.mkdtemp()
+        return ReplyOutbox(mastodon, os.path.join(directory, 'outbox.json'), base_delay=0.01, max_delay=0.05)
+
+    def wait_for(self, predicate, timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.01)
+        return predicate()
+
+    def test_429_api_error_is_retried(self):
+        mastodon = FakeMastodon(rate_limited_calls=2)
+        outbox = self.make_outbox(mastodon)
+        outbox.start()
+        try:
+            outbox.post('@user 안녕하세요', in_reply_to_id='100')
+            self.assertTrue(self.wait_for(lambda: outbox.metrics()['posted'] == 1))
+        finally:
+            outbox.close(timeout=1)
+
+        metrics = outbox.metrics()
+        self.assertEqual(metrics['rate_limited'], 2)
+        self.assertEqual(metrics['dropped'], 0)
+        self.assertEqual(metrics['pending'], 0)
+        # 재시도도 같은 idempotency 키로 보내 서버에 중복 게시되지 않음
+        self.assertEqual(len(set(mastodon.calls)), 1)
+        self.assertEqual(len(mastodon.calls), 3)
+        self.assertEqual(mastodon.posted, [('@user 안녕하세요', '100', mastodon.calls[0])])
+
+    def test_replies_to_same_status_use_separate_idempotency_keys(self):
+        mastodon = FakeMastodon()
+        outbox = self.make_outbox(mastodon)
+        outbox.start()
+        try:
+            outbox.post('@user 첫 번째', in_reply_to_id='100')
+            self.assertTrue(self.wait_for(lambda: outbox.metrics()['posted'] == 1))
+            outbox.post('@user 두 번째', in_reply_to_id='100')
+            self.assertTrue(self.wait_for(lambda: outbox.metrics()['posted'] == 2))
+        finally:
+            outbox.close(timeout=1)
+
+        self.assertEqual([message for message, _, _ in mastodon.posted], ['@user 첫 번째', '@user 두 번째'])
+        self.assertNotEqual(mastodon.calls[0], mastodon.calls[1])
+
+    def test_pending_post_with_same_dedupe_key_is_dropped(self):
+        outbox = self.make_outbox(FakeMastodon())
+        self.assertTrue(outbox.post('@user 안녕하세요', in_reply_to_id='100', dedupe_key='reply-100'))
+        self.assertFalse(outbox.post('@user 다시', in_reply_to_id='100', dedupe_key='reply-100'))
+        self.assertEqual(outbox.metrics()['duplicates'], 1)
+
+    def test_other_4xx_is_dropped(self):
+        class RejectingMastodon(FakeMastodon):
+            def status_post(self, *args, **kwargs):
+                raise MastodonAPIError('Mastodon API returned error', 422, 'Unprocessable Entity', None)
+
+        outbox = self.make_outbox(RejectingMastodon())
+        outbox.start()
+        try:
+            outbox.post('@user 안녕하세요', in_reply_to_id='101')
+            self.assertTrue(self.wait_for(lambda: outbox.metrics()['dropped'] == 1))
+        finally:
+            outbox.close(timeout=1)
+        self.assertEqual(outbox.metrics()['rate_limited'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
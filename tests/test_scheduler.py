@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import pytz
+
+import scheduler
+from scheduler import BotScheduler, CronExpression
+
+SEOUL = pytz.timezone('Asia/Seoul')
+
+
+def seoul(*args):
+    return SEOUL.localize(datetime(*args))
+
+
+class CronExpressionTest(unittest.TestCase):
+    def test_next_after_daily(self):
+        cron = CronExpression('0 7 * * *')
+        self.assertEqual(cron.next_after(seoul(2024, 1, 1, 6, 59)), seoul(2024, 1, 1, 7, 0))
+        # 정확히 실행 시각이면 다음 날
+        self.assertEqual(cron.next_after(seoul(2024, 1, 1, 7, 0)), seoul(2024, 1, 2, 7, 0))
+
+    def test_steps_ranges_and_lists(self):
+        cron = CronExpression('*/15 9-10 * * *')
+        self.assertEqual(cron.next_after(seoul(2024, 1, 1, 9, 40)), seoul(2024, 1, 1, 9, 45))
+        self.assertEqual(cron.next_after(seoul(2024, 1, 1, 10, 45)), seoul(2024, 1, 2, 9, 0))
+
+        cron = CronExpression('30 12 1,15 * *')
+        self.assertEqual(cron.next_after(seoul(2024, 1, 15, 13, 0)), seoul(2024, 2, 1, 12, 30))
+
+    def test_weekday_and_month_rollover(self):
+        # 2024-01-01은 월요일, 7도 일요일
+        self.assertEqual(CronExpression('0 0 * * 7').next_after(seoul(2024, 1, 1)), seoul(2024, 1, 7))
+        self.assertEqual(CronExpression('0 0 1 3 *').next_after(seoul(2024, 12, 31)), seoul(2025, 3, 1))
+
+    def test_day_or_weekday_when_both_restricted(self):
+        cron = CronExpression('0 0 13 * 5')
+        # 13일 이전의 첫 금요일(5일)에도 실행
+        self.assertEqual(cron.next_after(seoul(2024, 1, 1)), seoul(2024, 1, 5))
+
+    def test_previous_before(self):
+        cron = CronExpression('0 7 * * *')
+        moment = seoul(2024, 1, 3, 8, 0)
+        self.assertEqual(cron.previous_before(moment, seoul(2024, 1, 1, 0, 0)), seoul(2024, 1, 3, 7, 0))
+        self.assertEqual(cron.previous_before(moment, seoul(2024, 1, 3, 7, 30)), None)
+        # moment와 같은 시각도 포함
+        self.assertEqual(cron.previous_before(seoul(2024, 1, 3, 7, 0), seoul(2024, 1, 2, 7, 0)),
+                         seoul(2024, 1, 3, 7, 0))
+
+    def test_invalid_expressions_are_rejected(self):
+        for expression in ('0 7 * *', '60 * * * *', '*/0 * * * *', '5-1 * * * *'):
+            with self.assertRaises(ValueError, msg=expression):
+                CronExpression(expression)
+
+
+class SchedulerCatchUpTest(unittest.TestCase):
+    def make_scheduler(self, now, last_run, catch_up=True):
+        directory = tempfile.mkdtemp()
+        config_path = os.path.join(directory, 'schedule_config.json')
+        state_path = os.path.join(directory, 'scheduler_state.json')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'timezone': 'Asia/Seoul',
+                'catch_up_minutes': 60,
+                'jobs': [{'name': 'notice', 'cron': '0 9 * * *', 'message': '공지', 'catch_up': catch_up}]
+            }, f)
+        with open(state_path, 'w', encoding='utf-8') as f:
+            json.dump({'last_runs': {'notice': last_run.isoformat()}}, f)
+
+        class FixedDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return now.astimezone(tz) if tz else now.replace(tzinfo=None)
+
+        with mock.patch.object(scheduler, 'datetime', FixedDatetime):
+            return BotScheduler(mock.Mock(), config_path, state_path)
+
+    def test_missed_run_within_window_is_scheduled_first(self):
+        bot_scheduler = self.make_scheduler(seoul(2024, 1, 2, 9, 30), seoul(2024, 1, 1, 9, 0))
+        self.assertEqual(bot_scheduler.next_runs(), {'notice': seoul(2024, 1, 2, 9, 0)})
+
+    def test_missed_run_outside_window_is_skipped(self):
+        bot_scheduler = self.make_scheduler(seoul(2024, 1, 2, 10, 30), seoul(2024, 1, 1, 9, 0))
+        self.assertEqual(bot_scheduler.next_runs(), {'notice': seoul(2024, 1, 3, 9, 0)})
+
+    def test_already_ran_is_not_repeated(self):
+        bot_scheduler = self.make_scheduler(seoul(2024, 1, 2, 9, 30), seoul(2024, 1, 2, 9, 0))
+        self.assertEqual(bot_scheduler.next_runs(), {'notice': seoul(2024, 1, 3, 9, 0)})
+
+    def test_catch_up_disabled(self):
+        bot_scheduler = self.make_scheduler(seoul(2024, 1, 2, 9, 30), seoul(2024, 1, 1, 9, 0), catch_up=False)
+        self.assertEqual(bot_scheduler.next_runs(), {'notice': seoul(2024, 1, 3, 9, 0)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from unittest import mock
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from sheets_executor import SheetsRequestExecutor
+
+
+def http_error(status, retry_after=None):
+    headers = {'status': str(status)}
+    if retry_after is not None:
+        headers['retry-after'] = str(retry_after)
+    return HttpError(httplib2.Response(headers), b'{}')
+
+
+class FakeRequest:
+    """지정한 오류를 차례로 던진 뒤 성공하는 요청"""
+
+    def __init__(self, errors, method='GET'):
+        self.errors = list(errors)
+        self.method = method
+        self.calls = 0
+
+    def execute(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {'ok': True}
+
+
+class SheetsRequestExecutorTest(unittest.TestCase):
+    def setUp(self):
+        self.executor = SheetsRequestExecutor(read_per_minute=6000, write_per_minute=6000, max_retries=3)
+        patcher = mock.patch('sheets_executor.time.sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_429_waits_for_retry_after(self):
+        request = FakeRequest([http_error(429, retry_after=7)])
+        self.assertEqual(self.executor.execute(request), {'ok': True})
+
+        self.assertEqual(request.calls, 2)
+        self.sleep.assert_called_once_with(7.0)
+        metrics = self.executor.metrics()['read']
+        self.assertEqual((metrics['rate_limited'], metrics['retries']), (1, 1))
+
+    def test_retry_after_is_capped(self):
+        request = FakeRequest([http_error(503, retry_after=3600)])
+        self.executor.execute(request)
+        self.sleep.assert_called_once_with(self.executor.max_delay)
+
+    def test_5xx_is_retried_with_backoff_on_write_lane(self):
+        request = FakeRequest([http_error(500), http_error(502)], method='POST')
+        self.assertEqual(self.executor.execute(request), {'ok': True})
+
+        self.assertEqual(request.calls, 3)
+        self.assertEqual(self.sleep.call_count, 2)
+        for (delay,), _ in self.sleep.call_args_list:
+            self.assertLessEqual(delay, self.executor.max_delay)
+        self.assertEqual(self.executor.metrics()['write']['server_errors'], 2)
+        self.assertEqual(self.executor.metrics()['read']['requests'], 0)
+
+    def test_other_errors_are_not_retried(self):
+        request = FakeRequest([http_error(400)])
+        with self.assertRaises(HttpError):
+            self.executor.execute(request)
+        self.assertEqual(request.calls, 1)
+        self.sleep.assert_not_called()
+
+    def test_gives_up_after_max_retries(self):
+        request = FakeRequest([http_error(429)] * 10)
+        with self.assertRaises(HttpError):
+            self.executor.execute(request)
+        self.assertEqual(request.calls, self.executor.max_retries + 1)
+        self.assertEqual(self.executor.metrics()['read']['failures'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+from google_sheets import INVENTORY_HEADER
+from fake_sheets import FakeSheetsManager, FakeSheetsService
+from sqlite_store import SQLiteInventoryManager
+
+
+class EnsureUserTest(unittest.TestCase):
+    def setUp(self):
+        self.service = FakeSheetsService({
+            'bob': [INVENTORY_HEADER, ['갈레온', '', '20'], ['투명 망토', '', '1']],
+        })
+        # 시작 시 시트 목록 조회가 실패해 인덱스가 비어 있는 상태
+        self.service.fail_next['get'] = RuntimeError('503 Service Unavailable')
+        self.sheets = FakeSheetsManager(self.service)
+        self.store = SQLiteInventoryManager(self.sheets, os.path.join(tempfile.mkdtemp(), 'inventory.db'))
+
+    def imported_users(self):
+        return [row['username'] for row in self.store._connection().execute('SELECT username FROM users')]
+
+    def test_index_failure_does_not_import_existing_user_as_empty(self):
+        self.service.fail_next['get'] = RuntimeError('503 Service Unavailable')
+        with self.assertRaises(RuntimeError):
+            self.store._ensure_user('bob')
+        self.assertEqual(self.imported_users(), [])
+
+        # 시트 목록을 다시 읽을 수 있게 되면 실제 소지품을 가져옴
+        self.assertEqual(self.store.get_user_currency('bob'), 20)
+        self.assertEqual(
+            [entry['item'] for entry in self.store.get_user_inventory('bob')],
+            ['갈레온', '투명 망토']
+        )
+
+    def test_missing_tab_creates_new_user(self):
+        self.store._ensure_user('carol')
+        self.assertEqual(self.imported_users(), ['carol'])
+        self.assertEqual(self.store.get_user_inventory('carol'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import logging
+import threading
+import time
+from collections import deque
+
+
+class KeyedWorkerPool:
+    """
+    키(유저)별로 순서를 보장하는 작업 풀
+
+    같은 키의 작업은 한 번에 하나씩 들어온 순서대로 처리되고, 서로 다른 키의
+    작업은 여러 워커가 병렬로 처리합니다. 대기 작업 수가 max_pending에 도달하면
+    submit이 빈자리가 생길 때까지 대기합니다 (백프레셔).
+    """
+
+    def __init__(self, handler, workers=4, max_pending=200, name='worker'):
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+
+        self._cond = threading.Condition()
+        self._pending = {}      # key -> deque(작업, 등록 시각)
+        self._ready = deque()   # 처리 대기 중인 키 (실행 중이 아닌 키만)
+        self._active = set()    # 현재 워커가 처리 중인 키
+        self._size = 0
+        self._threads = []
+        self._accepting = False
+        self._stopping = False
+
+        # 지표
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.blocked_submits = 0
+        self.blocked_time = 0.0
+        self.max_depth = 0
+        self.total_wait_time = 0.0
+
+    def start(self):
+        """워커 스레드 시작"""
+        with self._cond:
+            if self._threads and any(thread.is_alive() for thread in self._threads):
+                self._accepting = True
+                return
+            self._accepting = True
+            self._stopping = False
+            self._threads = []
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'{self.name}-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        self.logger.info(f"작업 풀 시작: 워커 {self.workers}개, 최대 대기 {self.max_pending}개")
+
+    def submit(self, key, item, timeout=None):
+        """
+        작업 등록
+
+        Args:
+            key: 순서를 보장할 키 (같은 키는 직렬 처리)
+            item: handler에 전달할 작업
+            timeout: 대기열이 가득 찼을 때 기다릴 최대 시간 (None이면 무제한)
+
+        Returns:
+            등록 성공 여부
+        """
+        with self._cond:
+            if not self._accepting:
+                self.rejected += 1
+                return False
+
+            if self._size >= self.max_pending:
+                self.blocked_submits += 1
+                start = time.monotonic()
+                self._cond.wait_for(
+                    lambda: self._size < self.max_pending or not self._accepting,
+                    timeout
+                )
+                self.blocked_time += time.monotonic() - start
+                if self._size >= self.max_pending or not self._accepting:
+                    self.rejected += 1
+                    return False
+
+            queue = self._pending.setdefault(key, deque())
+            queue.append((item, time.monotonic()))
+            if len(queue) == 1 and key not in self._active:
+                self._ready.append(key)
+
+            self._size += 1
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, self._size)
+            self._cond.notify_all()
+            return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._ready or self._stopping)
+                if not self._ready:
+                    return
+
+                key = self._ready.popleft()
+                item, queued_at = self._pending[key].popleft()
+                self._active.add(key)
+                self._size -= 1
+                self.total_wait_time += time.monotonic() - queued_at
+                self._cond.notify_all()
+
+            try:
+                self.handler(item)
+                failed = False
+            except Exception as e:
+                self.logger.error(f"작업 처리 중 오류 ({key}): {e}")
+                failed = True
+
+            with self._cond:
+                self._active.discard(key)
+                queue = self._pending.get(key)
+                if queue:
+                    self._ready.append(key)
+                elif queue is not None:
+                    del self._pending[key]
+
+                if failed:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+                self._cond.notify_all()
+
+    def shutdown(self, drain=True, timeout=30):
+        """
+        작업 풀 종료
+
+        Args:
+            drain: True면 남은 작업을 모두 처리한 뒤 종료
+            timeout: 남은 작업 처리를 기다릴 최대 시간
+
+        Returns:
+            남은 작업 없이 종료되었는지 여부
+        """
+        with self._cond:
+            self._accepting = False
+            self._cond.notify_all()
+
+            if drain:
+                self._cond.wait_for(lambda: self._size == 0 and not self._active, timeout)
+
+            dropped = self._size
+            if dropped:
+                self.logger.warning(f"처리되지 못한 작업 {dropped}개를 버립니다.")
+                self._pending.clear()
+                self._ready.clear()
+                self._size = 0
+
+            self._stopping = True
+            self._cond.notify_all()
+
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+        self.logger.info("작업 풀이 종료되었습니다.")
+        return dropped == 0
+
+    def metrics(self):
+        """대기열/백프레셔 지표 반환"""
+        with self._cond:
+            processed = self.completed + self.failed
+            return {
+                'workers': self.workers,
+                'pending': self._size,
+                'active': len(self._active),
+                'max_pending': self.max_pending,
+                'max_depth': self.max_depth,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'blocked_submits': self.blocked_submits,
+                'blocked_time': self.blocked_time,
+                'avg_wait_time': self.total_wait_time / processed if processed else 0.0,
+            }